@@ -30,10 +30,17 @@
         'data/email_template_proctoring_scheduled.xml',
         'data/hr_recruitment_stage.xml',
         'data/email_template.xml',
+        'data/ojt_meeting_cron.xml',
+        'data/ojt_proctoring_cron.xml',
+        'data/ojt_gamification_cron.xml',
+        'data/ojt_checkin_data.xml',
         
         # Reports
         'report/report_certificate.xml',
         'report/report_certificate_template.xml',
+        'report/report_score_distribution.xml',
+        'report/report_attendance_summary.xml',
+        'report/report_checkin_qr.xml',
         'report/report_actions.xml',
         
         # Actions BEFORE menus
@@ -46,6 +53,7 @@
         'views/ojt_batch_views.xml',
         'views/ojt_participant_views.xml',
         'views/ojt_attendance_views.xml',
+        'views/ojt_attendance_matrix_views.xml',
         'views/ojt_progress_views.xml',
         'views/ojt_certificate_views.xml',
         'views/ojt_assignment_views.xml',
@@ -60,6 +68,9 @@
         'views/ojt_gamification_views.xml',
         'views/ojt_proctoring_views.xml',
 
+        # Wizards
+        'wizard/ojt_attendance_import_views.xml',
+
         # Portal templates last
         'views/portal/portal_ojt_dashboard.xml',
         'views/portal/portal_ojt_assignment_view.xml',
@@ -78,6 +89,10 @@
         'web.assets_frontend': [
             'ojt_batch_management/static/src/css/portal.css',
         ],
+        'web.assets_backend': [
+            'ojt_batch_management/static/src/js/violation_tally.js',
+            'ojt_batch_management/static/src/xml/violation_tally.xml',
+        ],
     },
     'installable': True,
     'application': True,
@@ -2,4 +2,7 @@ from . import portal
 from . import portal_public
 from . import website_recruitment
 from . import api
-from . import portal_meeting
\ No newline at end of file
+from . import portal_upload
+from . import portal_meeting
+from . import meeting_webhook
+from . import proctoring
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import hmac
+import json
+import logging
+
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.ojt_batch_management.models.meeting_provider import parse_datetime
+
+_logger = logging.getLogger(__name__)
+
+WEBHOOK_SECRET_PARAM = 'ojt_batch_management.meeting_webhook_secret'
+MAX_WEBHOOK_EVENTS = 5000
+ZOOM_EVENT_TYPES = {
+    'meeting.participant_joined': ('join', 'join_time'),
+    'meeting.participant_left': ('leave', 'leave_time'),
+}
+
+
+class OjtMeetingWebhook(http.Controller):
+    """Receiver for live join/leave events of meeting platforms.
+
+    The handler only checks the signature, normalizes the payload and
+    appends it to ``ojt.meeting.webhook.event`` in one INSERT; attendees are
+    built from there by the folding cron.
+
+    Payloads are either Zoom webhook notifications (``/ojt/meeting/webhook/zoom``,
+    signed with ``x-zm-signature``) or the generic format, signed with
+    ``X-OJT-Signature: sha256=<hex HMAC of the body>``::
+
+        {"events": [{"meeting_id": "...", "event": "join"|"leave",
+                     "email": "...", "name": "...", "time": "<ISO 8601>"}]}
+    """
+
+    @http.route('/ojt/meeting/webhook/<string:platform>', type='http', auth='public',
+                methods=['POST'], csrf=False, save_session=False)
+    def meeting_webhook(self, platform, **kwargs):
+        secret = request.env['ir.config_parameter'].sudo().get_param(WEBHOOK_SECRET_PARAM)
+        body = request.httprequest.get_data()
+        if not secret or not self._check_signature(platform, secret, body):
+            return request.make_json_response({'error': 'invalid_signature'}, status=403)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return request.make_json_response({'error': 'invalid_json'}, status=400)
+
+        if platform == 'zoom':
+            if payload.get('event') == 'endpoint.url_validation':
+                plain_token = (payload.get('payload') or {}).get('plainToken', '')
+                return request.make_json_response({
+                    'plainToken': plain_token,
+                    'encryptedToken': hmac.new(secret.encode(), plain_token.encode(), hashlib.sha256).hexdigest(),
+                })
+            events = self._normalize_zoom(payload)
+        else:
+            events = self._normalize_generic(payload)
+        if events is None or len(events) > MAX_WEBHOOK_EVENTS:
+            return request.make_json_response(
+                {'error': 'invalid_payload', 'max_events': MAX_WEBHOOK_EVENTS}, status=400)
+
+        accepted = request.env['ojt.meeting.webhook.event'].sudo()._append(platform, events)
+        return request.make_json_response({'accepted': accepted}, status=202)
+
+    def _check_signature(self, platform, secret, body):
+        headers = request.httprequest.headers
+        if platform == 'zoom' and headers.get('x-zm-signature'):
+            message = b'v0:' + headers.get('x-zm-request-timestamp', '').encode() + b':' + body
+            expected = 'v0=' + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+            return hmac.compare_digest(expected, headers['x-zm-signature'])
+        expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, headers.get('X-OJT-Signature', ''))
+
+    def _normalize_generic(self, payload):
+        items = payload.get('events') if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            return None
+        events = []
+        for item in items:
+            try:
+                event_time = parse_datetime(item['time'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if item.get('event') not in ('join', 'leave') or not item.get('meeting_id') or not event_time:
+                continue
+            events.append({
+                'meeting_ref': str(item['meeting_id']),
+                'event_type': item['event'],
+                'email': item.get('email') or None,
+                'name': item.get('name') or None,
+                'event_time': event_time,
+            })
+        return events
+
+    def _normalize_zoom(self, payload):
+        event_type, time_key = ZOOM_EVENT_TYPES.get(payload.get('event'), (None, None))
+        if not event_type:
+            # other notifications are acknowledged and dropped
+            return []
+        meeting = (payload.get('payload') or {}).get('object') or {}
+        participant = meeting.get('participant') or {}
+        try:
+            event_time = parse_datetime(participant.get(time_key))
+        except (TypeError, ValueError):
+            event_time = None
+        if not meeting.get('id') or not event_time:
+            return []
+        return [{
+            'meeting_ref': str(meeting['id']),
+            'event_type': event_type,
+            'email': participant.get('email') or None,
+            'name': participant.get('user_name') or None,
+            'event_time': event_time,
+        }]
@@ -3,7 +3,7 @@ import base64
 import logging
 from odoo import http
 from odoo.http import request
-from odoo.exceptions import AccessError
+from odoo.exceptions import AccessError, UserError
 
 _logger = logging.getLogger(__name__)
 
@@ -294,36 +294,60 @@ class OjtPortal(http.Controller):
         if existing_submission:
             return request.redirect(f'/my/ojt/assignment/{assignment.id}?error=already_submitted')
 
-        # Handle file uploads
-        attachment_ids = []
-        if request.httprequest.files:
+        # Reject oversized uploads before any file content is read
+        Attachment = request.env['ir.attachment'].sudo()
+        max_size = Attachment._ojt_upload_max_size()
+        content_length = request.httprequest.content_length
+        if max_size and content_length and content_length > max_size:
+            return request.redirect(f'/my/ojt/assignment/{assignment.id}?error=file_too_large')
+
+        # Stream file uploads to the filestore
+        attachment_vals_list = []
+        try:
             for file_key, file_storage in request.httprequest.files.items():
                 if file_key.startswith('attachment') and file_storage.filename:
-                    attachment_vals = {
-                        'name': file_storage.filename,
-                        'datas': base64.b64encode(file_storage.read()),
-                        'res_model': 'ojt.assignment.submit',
-                        'res_id': 0,  # Will be updated after submission creation
-                    }
-                    attachment = request.env['ir.attachment'].sudo().create(attachment_vals)
-                    attachment_ids.append(attachment.id)
+                    attachment_vals = Attachment._ojt_stream_to_filestore(file_storage.stream, max_size)
+                    attachment_vals['name'] = file_storage.filename
+                    attachment_vals_list.append(attachment_vals)
+        except UserError:
+            return request.redirect(f'/my/ojt/assignment/{assignment.id}?error=file_too_large')
+
+        # Files sent beforehand through the resumable upload API
+        upload_sessions = request.env['ojt.upload.session'].sudo()
+        upload_tokens = request.httprequest.form.getlist('upload_token')
+        if upload_tokens:
+            upload_sessions = upload_sessions.search([
+                ('name', 'in', upload_tokens),
+                ('user_id', '=', request.env.user.id),
+                ('assignment_id', '=', assignment.id),
+                ('state', '=', 'done'),
+            ])
+            if len(upload_sessions) != len(set(upload_tokens)):
+                return request.redirect(f'/my/ojt/assignment/{assignment.id}?error=submit_failed')
 
         # Create submission
         submission_vals = {
             'assignment_id': assignment.id,
             'participant_id': participant.id,
             'url_link': kw.get('url_link'),
-            'attachment_ids': [(6, 0, attachment_ids)],
         }
 
         try:
-            submission = request.env['ojt.assignment.submit'].sudo().create(submission_vals)
-
-            # Update attachment res_id
-            if attachment_ids:
-                request.env['ir.attachment'].sudo().browse(attachment_ids).write({
-                    'res_id': submission.id
-                })
+            with request.env.cr.savepoint():
+                submission = request.env['ojt.assignment.submit'].sudo().with_context(
+                    ojt_defer_attachment_check=True,
+                ).create(submission_vals).with_context(ojt_defer_attachment_check=False)
+
+                # Attachments are created already linked to the submission
+                for attachment_vals in attachment_vals_list:
+                    attachment_vals.update({
+                        'res_model': 'ojt.assignment.submit',
+                        'res_id': submission.id,
+                    })
+                attachments = Attachment._ojt_create_stored(attachment_vals_list)
+                attachments |= upload_sessions._create_attachments('ojt.assignment.submit', submission.id)
+                submission.write({'attachment_ids': [(6, 0, attachments.ids)]})
+                upload_sessions.unlink()
 
             return request.redirect(f'/my/ojt/assignment/{assignment.id}?success=submitted')
         except Exception as e:
@@ -490,14 +514,22 @@ class OjtPortal(http.Controller):
 
         # Get all events for the participant's batch
         events = []
+        checkin_qr = {}
         if participant:
             events = request.env['ojt.event.link'].sudo().search([
                 ('batch_id', '=', participant.batch_id.id)
             ], order='event_date desc')
+            # signed check-in QR codes of the participant, shown at the entrance
+            Attendance = request.env['ojt.attendance'].sudo()
+            checkin_qr = {
+                event_link.id: Attendance._get_checkin_qr_src(event_link.id, participant.id)
+                for event_link in events if event_link.status in ('planned', 'ongoing')
+            }
 
         return request.render('ojt_batch_management.portal_ojt_events', {
             'participant': participant,
             'events': events,
+            'checkin_qr': checkin_qr,
         })
 
     @http.route(['/my/ojt/attendance'], type='http', auth="user", website=True)
@@ -627,15 +659,7 @@ class OjtPortal(http.Controller):
             'presence': 'present',
             'method': 'online',  # Since it's portal check-in
         }
-
-        # Check if late
-        if event_link.event_id and event_link.event_id.date_begin:
-            event_start = event_link.event_id.date_begin
-            if now > event_start:
-                # Calculate if more than 15 minutes late
-                time_diff = (now - event_start).total_seconds() / 60
-                if time_diff > 15:
-                    attendance_vals['presence'] = 'late'
+        # late/present is classified by ojt.attendance.create
 
         try:
             request.env['ojt.attendance'].sudo().create(attendance_vals)
@@ -5,26 +5,6 @@ from odoo.addons.portal.controllers.portal import CustomerPortal, pager as porta
 
 class OJTPortalMeeting(CustomerPortal):
     
-    def _prepare_home_portal_values(self, counters):
-        """Add meeting attendance count to portal home"""
-        values = super()._prepare_home_portal_values(counters)
-        partner = request.env.user.partner_id
-        
-        # Get participant
-        participant = request.env['ojt.participant'].sudo().search([
-            ('partner_id', '=', partner.id)
-        ], limit=1)
-        
-        if participant and 'meeting_count' in counters:
-            # Count meetings for this participant
-            meeting_count = request.env['ojt.meeting.attendance'].sudo().search_count([
-                ('event_link_id.batch_id', '=', participant.batch_id.id),
-                ('state', 'in', ['scheduled', 'ongoing', 'completed'])
-            ])
-            values['meeting_count'] = meeting_count
-            
-        return values
-    
     @http.route(['/my/ojt/meeting', '/my/ojt/meeting/page/<int:page>'], 
                 type='http', auth="user", website=True)
     def portal_my_ojt_meeting_attendance(self, page=1, sortby=None, filterby=None, **kw):
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 from odoo import http, fields, _
-from odoo.http import request
+from odoo.http import request, content_disposition
 from odoo.exceptions import AccessError, ValidationError
 from odoo.addons.auth_signup.controllers.main import AuthSignupHome
 from odoo.addons.portal.controllers.portal import CustomerPortal
 import base64
+import csv
+import io
 import logging
 
 _logger = logging.getLogger(__name__)
 
+MAX_BULK_SCANS = 5000
+
 
 class OjtPortalPublic(http.Controller):
 
@@ -57,53 +61,12 @@ class OjtPortalPublic(http.Controller):
         message_type = 'info'
 
         if qr_token:
-            try:
-                parts = qr_token.split('-')
-                if len(parts) >= 2:
-                    event_id = int(parts[0])
-                    participant_id = int(parts[1])
-
-                    event_link = request.env['ojt.event.link'].sudo().browse(event_id)
-                    participant = request.env['ojt.participant'].sudo().browse(participant_id)
-
-                    if event_link.exists() and participant.exists():
-                        existing_attendance = request.env['ojt.attendance'].sudo().search([
-                            ('event_link_id', '=', event_id),
-                            ('participant_id', '=', participant_id),
-                            ('date', '=', fields.Date.today())
-                        ], limit=1)
-
-                        if existing_attendance:
-                            if existing_attendance.check_out:
-                                message = "Already checked out for today."
-                                message_type = 'warning'
-                            else:
-                                existing_attendance.sudo().write({
-                                    'check_out': fields.Datetime.now(),
-                                    'presence': 'present'
-                                })
-                                message = f"Checked out successfully at {fields.Datetime.now().strftime('%H:%M')}."
-                                message_type = 'success'
-                        else:
-                            request.env['ojt.attendance'].sudo().create({
-                                'event_link_id': event_id,
-                                'participant_id': participant_id,
-                                'date': fields.Date.today(),
-                                'check_in': fields.Datetime.now(),
-                                'presence': 'present',
-                                'method': 'qr'
-                            })
-                            message = f"Checked in successfully at {fields.Datetime.now().strftime('%H:%M')}."
-                            message_type = 'success'
-                    else:
-                        message = "Invalid QR code."
-                        message_type = 'danger'
-                else:
-                    message = "Invalid QR code format."
-                    message_type = 'danger'
-            except (ValueError, IndexError):
-                message = "Invalid QR code."
-                message_type = 'danger'
+            result = request.env['ojt.attendance'].sudo()._qr_checkin(qr_token)
+            status = result['status']
+            message, message_type = self._checkin_message(result)
+            if status != 'invalid':
+                event_link = request.env['ojt.event.link'].sudo().browse(result['event_link_id'])
+                participant = request.env['ojt.participant'].sudo().browse(result['participant_id'])
 
         return request.render('ojt_batch_management.attendance_checkin', {
             'event_link': event_link,
@@ -113,6 +76,72 @@ class OjtPortalPublic(http.Controller):
             'qr_token': qr_token,
         })
 
+    @http.route('/ojt/attend/checkin/scan', type='http', auth='public', methods=['POST'], csrf=False)
+    def attendance_checkin_scan(self, qr='', **kwargs):
+        """Lean check-in for scanners: one signed token in, one upsert, JSON out"""
+        result = request.env['ojt.attendance'].sudo()._qr_checkin(qr)
+        message, message_type = self._checkin_message(result)
+        return request.make_json_response({
+            'status': result['status'],
+            'attendance_id': result.get('attendance_id'),
+            'message': message,
+            'message_type': message_type,
+        }, status=400 if result['status'] == 'invalid' else 200)
+
+    @http.route('/ojt/attend/checkin/bulk', type='json', auth='user', methods=['POST'])
+    def attendance_checkin_bulk(self, scans=None, **kwargs):
+        """Sync scans buffered by an offline scanner (see /ojt/qr/tool).
+
+        Scan times come from the device, so only internal users (mentors,
+        staff) may push them.
+        """
+        if not request.env.user._is_internal():
+            raise AccessError(_("Only staff members can sync attendance scans."))
+        if not isinstance(scans, list) or len(scans) > MAX_BULK_SCANS:
+            return {'error': 'invalid_request', 'max_scans': MAX_BULK_SCANS}
+        return {'results': request.env['ojt.attendance'].sudo()._bulk_qr_checkin(scans)}
+
+    @http.route('/ojt/batch/<int:batch_id>/attendance_matrix.csv', type='http', auth='user', methods=['GET'])
+    def attendance_matrix_csv(self, batch_id, **kwargs):
+        """Participant x event attendance grid of a batch as CSV"""
+        if not request.env.user._is_internal():
+            raise AccessError(_("Only staff members can export attendance."))
+        batch = request.env['ojt.batch'].browse(batch_id).exists()
+        if not batch:
+            return request.not_found()
+        batch.check_access('read')
+
+        codes = {'present': 'P', 'late': 'L', 'absent': 'A', 'none': ''}
+        events, rows = request.env['ojt.attendance.matrix'].sudo()._get_grid(batch.id)
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['Participant', 'Student ID']
+                        + [f"{name} ({event_date})" for _id, name, event_date in events]
+                        + ['Attended'])
+        for name, ref, cells in rows:
+            presences = [cells.get(event_id, 'none') for event_id, _name, _date in events]
+            writer.writerow([name, ref or '']
+                            + [codes[presence] for presence in presences]
+                            + [sum(presence in ('present', 'late') for presence in presences)])
+
+        filename = f"attendance_matrix_{batch.code or batch.id}.csv"
+        return request.make_response(output.getvalue().encode('utf-8-sig'), headers=[
+            ('Content-Type', 'text/csv; charset=utf-8'),
+            ('Content-Disposition', content_disposition(filename)),
+        ])
+
+    def _checkin_message(self, result):
+        status = result['status']
+        if status == 'checked_in':
+            return f"Checked in successfully at {result['time'].strftime('%H:%M')}.", 'success'
+        if status == 'checked_out':
+            return f"Checked out successfully at {result['time'].strftime('%H:%M')}.", 'success'
+        if status == 'already_checked_in':
+            return "Already checked in.", 'warning'
+        if status == 'already_checked_out':
+            return "Already checked out for today.", 'warning'
+        return "Invalid QR code.", 'danger'
+
     @http.route('/ojt/cert/download/<int:cert_id>', type='http', auth='public')
     def certificate_download(self, cert_id):
         """Download certificate PDF"""
@@ -130,7 +159,9 @@ class OjtPortalPublic(http.Controller):
     @http.route('/ojt/qr/tool', type='http', auth='public', website=True)
     def qr_tool_page(self, **kwargs):
         """Public page for QR Code Generator & Scanner"""
-        return request.render('ojt_batch_management.qr_tool_page', {})
+        return request.render('ojt_batch_management.qr_tool_page', {
+            'can_sync': request.env.user._is_internal(),
+        })
 
     # 🔹 Forgot Password Page
     @http.route('/ojt/forgot-password', type='http', auth='public', website=True, methods=['GET', 'POST'])
@@ -320,12 +351,9 @@ class OjtPortalPublic(http.Controller):
 
 class OjtPortal(CustomerPortal):
     def _prepare_home_portal_values(self, counters):
+        """Fill the OJT portal home counters (dashboard, meetings, pending
+        assignments, attendance, certificates) that the page asked for."""
         values = super()._prepare_home_portal_values(counters)
-        if request.env.user.has_group('base.group_portal'):
-            participant = request.env['ojt.participant'].sudo().search([
-                ('user_id', '=', request.env.user.id)
-            ], limit=1)
-            if participant:
-                values['ojt_participant'] = participant
-                values['ojt_batch'] = participant.batch_id
+        values.update(request.env['ojt.participant'].sudo()._get_portal_counters(
+            request.env.user.partner_id, counters))
         return values
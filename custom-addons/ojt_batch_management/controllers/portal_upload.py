@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import logging
+from odoo import http
+from odoo.http import request
+from odoo.exceptions import UserError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+
+class OjtPortalUpload(http.Controller):
+    """Resumable upload of assignment attachments.
+
+    1. ``/my/ojt/upload/init`` registers the file (name, size, SHA1) and
+       returns a token plus the chunk size to use.
+    2. ``/my/ojt/upload/<token>/chunk/<index>`` stores one chunk (raw body),
+       ``/my/ojt/upload/<token>/status`` lists the chunks already received.
+    3. ``/my/ojt/upload/<token>/finalize`` assembles and verifies the file.
+
+    The token is then posted as ``upload_token`` with the regular
+    ``/my/ojt/assignment/submit`` form.
+    """
+
+    def _get_participant(self):
+        participant = request.env['ojt.participant'].sudo().search([
+            ('user_id', '=', request.env.user.id)
+        ], limit=1)
+        if not participant:
+            participant = request.env['ojt.participant'].sudo().search([
+                ('partner_id', '=', request.env.user.partner_id.id)
+            ], limit=1)
+        return participant
+
+    def _get_session(self, token):
+        return request.env['ojt.upload.session'].sudo().search([
+            ('name', '=', token),
+            ('user_id', '=', request.env.user.id),
+        ], limit=1)
+
+    def _session_status(self, session):
+        return {
+            'token': session.name,
+            'state': session.state,
+            'chunk_size': session.chunk_size,
+            'chunk_count': session.chunk_count,
+            'received': session.get_received_chunks() if session.state == 'open' else [],
+        }
+
+    @http.route('/my/ojt/upload/init', type='json', auth='user', methods=['POST'])
+    def upload_init(self, assignment_id, filename, size, checksum, **kw):
+        participant = self._get_participant()
+        if not participant:
+            return {'error': 'no_participant'}
+
+        assignment = request.env['ojt.assignment'].sudo().browse(int(assignment_id))
+        if not assignment.exists() or assignment.batch_id != participant.batch_id:
+            return {'error': 'invalid_assignment'}
+
+        try:
+            session = request.env['ojt.upload.session'].sudo().create({
+                'user_id': request.env.user.id,
+                'participant_id': participant.id,
+                'assignment_id': assignment.id,
+                'filename': filename,
+                'file_size': int(size),
+                'checksum': (checksum or '').lower(),
+            })
+        except (ValidationError, ValueError, TypeError) as e:
+            return {'error': 'invalid_upload', 'message': str(e)}
+        return self._session_status(session)
+
+    @http.route('/my/ojt/upload/<string:token>/status', type='json', auth='user', methods=['POST'])
+    def upload_status(self, token, **kw):
+        session = self._get_session(token)
+        if not session:
+            return {'error': 'invalid_token'}
+        return self._session_status(session)
+
+    # the unguessable upload token stands in for the CSRF token here
+    @http.route('/my/ojt/upload/<string:token>/chunk/<int:index>', type='http', auth='user',
+                methods=['PUT', 'POST'], csrf=False)
+    def upload_chunk(self, token, index, **kw):
+        session = self._get_session(token)
+        if not session:
+            return request.make_json_response({'error': 'invalid_token'}, status=404)
+        try:
+            size = session.write_chunk(index, request.httprequest.stream)
+        except UserError as e:
+            return request.make_json_response({'error': 'invalid_chunk', 'message': str(e)}, status=400)
+        return request.make_json_response({'index': index, 'size': size})
+
+    @http.route('/my/ojt/upload/<string:token>/finalize', type='json', auth='user', methods=['POST'])
+    def upload_finalize(self, token, **kw):
+        session = self._get_session(token)
+        if not session:
+            return {'error': 'invalid_token'}
+        try:
+            session.action_finalize()
+        except UserError as e:
+            _logger.info("Upload %s could not be finalized: %s", token, e)
+            return dict(self._session_status(session), error='finalize_failed', message=str(e))
+        return self._session_status(session)
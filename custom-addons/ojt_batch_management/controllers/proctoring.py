@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+from odoo.addons.ojt_batch_management.models.ojt_proctoring import MAX_INGEST_EVENTS, MAX_INGEST_SNAPSHOTS
+
+
+class OjtProctoring(http.Controller):
+
+    @http.route('/ojt/proctoring/<int:session_id>/events', type='json', auth='user', methods=['POST'])
+    def proctoring_events(self, session_id, events=None, **kwargs):
+        """Batched event upload of the proctoring client.
+
+        The participant is the one of the logged-in user; events are queued
+        client side and posted every few seconds. A call carries at most
+        ``MAX_INGEST_EVENTS`` events, of which at most ``MAX_INGEST_SNAPSHOTS``
+        with a snapshot, and its body at most
+        ``ojt_batch_management.proctoring_max_request_mb`` (16 MB by default).
+        Larger calls are rejected as a whole with ``request_too_large`` or
+        ``invalid_request`` and the limits, clients split them and resend.
+        """
+        Log = request.env['ojt.proctoring.log'].sudo()
+        max_size = Log._ingest_max_request_size()
+        content_length = request.httprequest.content_length
+        if max_size and content_length and content_length > max_size:
+            return {'error': 'request_too_large', 'max_request_size': max_size}
+        if not isinstance(events, list) or len(events) > MAX_INGEST_EVENTS \
+                or sum(1 for event in events if isinstance(event, dict) and event.get('snapshot')) > MAX_INGEST_SNAPSHOTS:
+            return {'error': 'invalid_request', 'max_events': MAX_INGEST_EVENTS,
+                    'max_snapshots': MAX_INGEST_SNAPSHOTS}
+        session = request.env['ojt.quiz.proctoring'].sudo().browse(session_id).exists()
+        if not session or session.state != 'ongoing':
+            return {'error': 'session_closed'}
+        participant = session.participant_ids.filtered(
+            lambda p: p.user_id == request.env.user or p.partner_id == request.env.user.partner_id)[:1]
+        if not participant:
+            return {'error': 'not_a_participant'}
+        return Log._ingest_events(session, participant, events)
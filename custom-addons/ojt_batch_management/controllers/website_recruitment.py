@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from odoo import http, _
+from odoo.exceptions import UserError
 from odoo.http import request
 from odoo.addons.website_hr_recruitment.controllers.main import WebsiteHrRecruitment
 
@@ -94,6 +95,17 @@ class WebsiteOjtRecruitment(WebsiteHrRecruitment):
             except (ValueError, TypeError):
                 error['ojt_batch_id'] = _("Invalid batch selection.")
 
+        # Stream the resume to the filestore; identical CVs share one blob
+        resume_vals = None
+        resume = request.httprequest.files.get('resume')
+        if not error and resume and resume.filename:
+            Attachment = request.env['ir.attachment'].sudo()
+            try:
+                resume_vals = Attachment._ojt_stream_to_filestore(
+                    resume.stream, Attachment._ojt_upload_max_size())
+            except UserError:
+                error['resume'] = _("The uploaded file is too large.")
+
         if error:
             # Return to form with errors
             available_batches = request.env['ojt.batch'].sudo().search([
@@ -123,20 +135,18 @@ class WebsiteOjtRecruitment(WebsiteHrRecruitment):
             'ojt_batch_id': int(batch_id),
         }
 
-        # Handle file upload if present
-        if 'resume' in request.httprequest.files:
-            file = request.httprequest.files['resume']
-            if file and file.filename:
-                import base64
-                applicant_vals['attachment_ids'] = [(0, 0, {
-                    'name': file.filename,
-                    'datas': base64.b64encode(file.read()).decode('utf-8'),
-                    'res_model': 'hr.applicant',
-                    'type': 'binary',
-                })]
-
         applicant = request.env['hr.applicant'].sudo().create(applicant_vals)
 
+        # Attach the uploaded resume, referencing the blob stored above
+        if resume_vals:
+            resume_vals.update({
+                'name': resume.filename,
+                'res_model': 'hr.applicant',
+                'res_id': applicant.id,
+                'type': 'binary',
+            })
+            request.env['ir.attachment'].sudo()._ojt_create_stored([resume_vals])
+
         # Redirect to confirmation page
         return request.render('ojt_batch_management.ojt_application_submitted', {
             'applicant': applicant,
@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+
+from odoo import models, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+from odoo.tools.mimetypes import guess_mimetype
+
+_logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+DEFAULT_UPLOAD_MAX_SIZE_MB = 100
+# columns ir.attachment.create drops from its values, set by _ojt_create_stored
+STORED_FIELDS = ('store_fname', 'checksum', 'file_size')
+MIMETYPE_SNIFF_SIZE = 1024
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    @api.model
+    def _ojt_upload_max_size(self):
+        """Maximum size (bytes) accepted for an OJT portal upload.
+
+        Configurable through the ``ojt_batch_management.upload_max_size_mb``
+        system parameter, 0 disables the limit."""
+        value = self.env['ir.config_parameter'].sudo().get_param(
+            'ojt_batch_management.upload_max_size_mb', DEFAULT_UPLOAD_MAX_SIZE_MB)
+        try:
+            return int(float(value) * 1024 * 1024)
+        except (TypeError, ValueError):
+            return DEFAULT_UPLOAD_MAX_SIZE_MB * 1024 * 1024
+
+    @api.model
+    def _ojt_stream_to_filestore(self, stream, max_size=None):
+        """Copy ``stream`` into the filestore chunk by chunk.
+
+        The content is hashed while it is written so the file never sits in
+        memory as a whole. When a file with the same checksum already exists
+        in the filestore it is reused and the copy is dropped.
+
+        Returns the values to pass to ``_ojt_create_stored`` (without
+        name/res_model/res_id).
+        """
+        if self._storage() != 'file':
+            # database storage cannot be streamed, fall back to raw content
+            data = stream.read(max_size + 1) if max_size else stream.read()
+            if max_size and len(data) > max_size:
+                raise UserError(_('The uploaded file exceeds the maximum allowed size.'))
+            return {'raw': data}
+
+        filestore = self._filestore()
+        os.makedirs(filestore, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=filestore, prefix='.ojt-upload-')
+        sha = hashlib.sha1()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise UserError(_('The uploaded file exceeds the maximum allowed size.'))
+                    sha.update(chunk)
+                    tmp.write(chunk)
+            checksum = sha.hexdigest()
+            fname = self._ojt_store_file(tmp_path, checksum, size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        return {
+            'store_fname': fname,
+            'checksum': checksum,
+            'file_size': size,
+        }
+
+    @api.model
+    def _ojt_blob_fname(self, checksum, size):
+        """Return the store_fname of content ``checksum``: the existing file
+        when the same content is already stored, else where it goes."""
+        # same layout as ir.attachment._get_path, legacy 3-char dirs first
+        for fname in (checksum[:3] + '/' + checksum, checksum[:2] + '/' + checksum):
+            full_path = self._full_path(fname)
+            if os.path.isfile(full_path):
+                if os.path.getsize(full_path) != size:
+                    raise UserError(_("The attachment collides with an existing file."))
+                return fname
+        return fname
+
+    @api.model
+    def _ojt_store_file(self, src_path, checksum, size, keep_source=False):
+        """Move ``src_path`` to its content-addressed location, or drop it
+        when the same content is already stored. Returns the store_fname.
+
+        With ``keep_source`` the file is linked (or copied) instead of moved.
+        """
+        fname = self._ojt_blob_fname(checksum, size)
+        full_path = self._full_path(fname)
+        if os.path.isfile(full_path):
+            return fname
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if keep_source:
+            tmp_path = '%s.%s.tmp' % (full_path, uuid.uuid4().hex)
+            try:
+                try:
+                    os.link(src_path, tmp_path)
+                except OSError:
+                    shutil.copyfile(src_path, tmp_path)
+                os.replace(tmp_path, full_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+        else:
+            os.replace(src_path, full_path)
+        # add fname to checklist, in case the transaction aborts
+        self._mark_for_gc(fname)
+        return fname
+
+    @api.model
+    def _ojt_create_stored(self, vals_list):
+        """Create attachments whose content is already in the filestore.
+
+        ``create`` drops ``store_fname``, ``checksum`` and ``file_size`` from
+        its values, so the records are created without content and the
+        storage columns are then set with one UPDATE. Values without
+        ``store_fname`` (database storage) go through ``create`` as is.
+        """
+        create_vals_list = []
+        stored_list = []
+        for vals in vals_list:
+            vals = dict(vals)
+            stored_list.append({field: vals.pop(field, None) for field in STORED_FIELDS})
+            create_vals_list.append(vals)
+        attachments = self.create(create_vals_list)
+
+        rows = [
+            (attachment, stored) for attachment, stored in zip(attachments, stored_list)
+            if stored['store_fname']
+        ]
+        if not rows:
+            return attachments
+        attachments.flush_recordset()
+        mimetypes = []
+        for attachment, stored in rows:
+            mimetype = attachment.mimetype
+            full_path = self._full_path(stored['store_fname'])
+            if (not mimetype or mimetype == 'application/octet-stream') and os.path.isfile(full_path):
+                # nothing to guess from the name, sniff the stored content
+                with open(full_path, 'rb') as fp:
+                    mimetype = guess_mimetype(fp.read(MIMETYPE_SNIFF_SIZE))
+            mimetypes.append(mimetype)
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ir_attachment a
+               SET store_fname = v.store_fname, checksum = v.checksum,
+                   file_size = v.file_size, mimetype = v.mimetype, db_datas = NULL
+              FROM unnest(%(ids)s::int[], %(fnames)s::varchar[], %(checksums)s::varchar[],
+                          %(sizes)s::int[], %(mimetypes)s::varchar[])
+                   AS v(id, store_fname, checksum, file_size, mimetype)
+             WHERE a.id = v.id
+            """,
+            ids=[attachment.id for attachment, _stored in rows],
+            fnames=[stored['store_fname'] for _attachment, stored in rows],
+            checksums=[stored['checksum'] for _attachment, stored in rows],
+            sizes=[stored['file_size'] for _attachment, stored in rows],
+            mimetypes=mimetypes,
+        ))
+        attachments.invalidate_recordset()
+        return attachments
@@ -0,0 +1,27 @@
+from odoo import models
+
+from .ojt_proctoring import PROCTORING_CHANNEL_PREFIX
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        """Subscribe ``ojt.quiz.proctoring_<id>`` channels to the session, for
+        the sessions the user may read only."""
+        channels = list(channels)
+        session_ids = {
+            int(channel.removeprefix(PROCTORING_CHANNEL_PREFIX))
+            for channel in channels
+            if isinstance(channel, str) and channel.startswith(PROCTORING_CHANNEL_PREFIX)
+            and channel.removeprefix(PROCTORING_CHANNEL_PREFIX).isdigit()
+        }
+        if session_ids:
+            channels = [
+                channel for channel in channels
+                if not (isinstance(channel, str) and channel.startswith(PROCTORING_CHANNEL_PREFIX))
+            ]
+            if self.env.user._is_internal():
+                sessions = self.env['ojt.quiz.proctoring'].browse(session_ids).exists()
+                channels.extend(sessions._filtered_access('read'))
+        return super()._build_bus_channel_list(channels)
@@ -0,0 +1,322 @@
+"""Meeting platform clients used by the attendance sync.
+
+Providers are plain Python objects (no ORM access) so that reports of many
+meetings can be fetched concurrently from worker threads; the caller writes
+the normalized segments back with the ORM in its own thread.
+
+A provider returns a list of segments, one per join/leave interval::
+
+    {'email': 'a@b.c' or None, 'name': 'Display Name',
+     'join_time': datetime, 'leave_time': datetime or None}
+
+with naive UTC datetimes. Reports are read page by page together with a
+JSON cursor (provider page token and the ``since`` watermark of the last
+complete pass) that the caller checkpoints, so a sync can resume where it
+stopped and skip intervals it already imported.
+
+New platforms subclass :class:`MeetingProvider`, set ``code`` to the
+``ojt.meeting.attendance.platform`` value and implement
+:meth:`MeetingProvider._fetch_pages`.
+"""
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0  # seconds, doubled on every retry
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# margin between our clock and the platform's when moving the sync watermark
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+class MeetingProviderError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class RateLimiter:
+    """Token bucket shared by all threads talking to the same platform."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def format_datetime(value):
+    return value.isoformat() if value else None
+
+
+def parse_datetime(value):
+    """ISO 8601 timestamp from an API -> naive UTC datetime."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+class MeetingProvider:
+    code = None
+    default_base_url = None
+    rate_limit = 10  # requests per second, per platform and worker process
+
+    _registry = {}
+    _limiters = {}
+    _limiters_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.code:
+            MeetingProvider._registry[cls.code] = cls
+
+    @classmethod
+    def get(cls, code):
+        return cls._registry.get(code)
+
+    def __init__(self, api_key, api_secret=None, base_url=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = (base_url or self.default_base_url).rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {api_key}'
+        with self._limiters_lock:
+            self.limiter = self._limiters.setdefault(
+                (self.code, self.base_url), RateLimiter(self.rate_limit))
+
+    def fetch_pages(self, meeting_ref, cursor=None):
+        """Yield ``(segments, cursor)`` per report page.
+
+        ``cursor`` is the last checkpointed one; ``cursor['page']`` resumes an
+        interrupted pass, ``cursor['since']`` drops intervals that ended
+        before the previous complete pass. The last cursor of a complete pass
+        has no ``page`` and a new ``since``.
+        """
+        cursor = dict(cursor or {})
+        since = parse_datetime(cursor.get('since'))
+        page = cursor.get('page')
+        # everything that ended before this pass started is final in it
+        started = parse_datetime(cursor.get('started')) if page else None
+        if not started:
+            started = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0) - CLOCK_SKEW
+        try:
+            pages = self._fetch_pages(meeting_ref, page, since)
+            first = next(pages, None)
+        except MeetingProviderError as e:
+            # page tokens expire, start the pass over
+            if not page or e.status not in (400, 404, 410):
+                raise
+            _logger.info("%s: page token of %s expired, restarting the pass", self.code, meeting_ref)
+            started = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0) - CLOCK_SKEW
+            pages = self._fetch_pages(meeting_ref, None, since)
+            first = next(pages, None)
+        if first is not None:
+            pages = itertools.chain([first], pages)
+
+        for segments, next_page in pages:
+            # intervals closed before the last complete pass are imported already
+            new_segments = [
+                segment for segment in segments
+                if not (since and segment.get('leave_time') and segment['leave_time'] <= since)
+            ]
+            if next_page:
+                yield new_segments, {'page': next_page, 'since': format_datetime(since),
+                                     'started': format_datetime(started)}
+            else:
+                yield new_segments, {'page': None, 'since': format_datetime(started)}
+
+    def _fetch_pages(self, meeting_ref, page, since):
+        """Yield ``(segments, next_page)``; ``next_page`` is None on the last page.
+
+        ``since`` may be used to skip report parts the API can filter out.
+        """
+        raise NotImplementedError()
+
+    def _request(self, method, url, **kwargs):
+        """JSON request with rate limiting and retries on throttling/server errors."""
+        if not url.startswith('http'):
+            url = self.base_url + url
+        delay = RETRY_BACKOFF
+        for attempt in range(1, MAX_RETRIES + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == MAX_RETRIES:
+                    raise MeetingProviderError(f"{self.code}: {e}") from e
+                error = str(e)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    if not response.ok:
+                        raise MeetingProviderError(
+                            f"{self.code}: HTTP {response.status_code} on {url}: {response.text[:200]}",
+                            status=response.status_code)
+                    return response.json()
+                if attempt == MAX_RETRIES:
+                    raise MeetingProviderError(f"{self.code}: HTTP {response.status_code} on {url}",
+                                               status=response.status_code)
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            _logger.info("%s request failed (%s), retry %d in %.1fs", self.code, error, attempt, delay)
+            time.sleep(delay)
+            delay *= 2
+
+
+class ZoomProvider(MeetingProvider):
+    """Zoom report API; ``api_key`` is a server-to-server OAuth access token."""
+    code = 'zoom'
+    default_base_url = 'https://api.zoom.us/v2'
+    rate_limit = 10
+
+    def _fetch_pages(self, meeting_ref, page, since):
+        params = {'page_size': 300}
+        while True:
+            if page:
+                params['next_page_token'] = page
+            data = self._request('GET', f'/report/meetings/{meeting_ref}/participants', params=params)
+            segments = [{
+                'email': item.get('user_email') or None,
+                'name': item.get('name'),
+                'join_time': parse_datetime(item.get('join_time')),
+                'leave_time': parse_datetime(item.get('leave_time')),
+            } for item in data.get('participants', [])]
+            page = data.get('next_page_token') or None
+            yield segments, page
+            if not page:
+                return
+
+
+class TeamsProvider(MeetingProvider):
+    """Microsoft Graph attendance reports; ``meeting_ref`` is
+    ``<organizer user id>/<online meeting id>``."""
+    code = 'teams'
+    default_base_url = 'https://graph.microsoft.com/v1.0'
+    rate_limit = 5
+
+    def _fetch_pages(self, meeting_ref, page, since):
+        organizer, _sep, meeting = meeting_ref.partition('/')
+        if not meeting:
+            raise MeetingProviderError("teams: meeting ID must be '<organizer id>/<meeting id>'")
+        path = f'/users/{organizer}/onlineMeetings/{meeting}/attendanceReports'
+        # one report per occurrence of the meeting; the page cursor is
+        # "<report id> <records page url>" so a pass resumes inside a report
+        reports = []
+        url = path
+        while url:
+            data = self._request('GET', url)
+            reports += data.get('value', [])
+            url = data.get('@odata.nextLink')
+        report_id, _sep, url = (page or '').partition(' ')
+        if report_id:
+            reports = reports[next((i for i, r in enumerate(reports) if r['id'] == report_id), 0):]
+        reports = [
+            report for report in reports
+            if report['id'] == report_id or not since
+            or not report.get('meetingEndDateTime') or parse_datetime(report['meetingEndDateTime']) > since
+        ]
+        if not reports:
+            yield [], None
+            return
+        for index, report in enumerate(reports):
+            if report['id'] != report_id or not url:
+                url = f"{path}/{report['id']}/attendanceRecords"
+            while url:
+                data = self._request('GET', url)
+                segments = []
+                for record in data.get('value', []):
+                    name = (record.get('identity') or {}).get('displayName')
+                    for interval in record.get('attendanceIntervals', []):
+                        segments.append({
+                            'email': record.get('emailAddress') or None,
+                            'name': name,
+                            'join_time': parse_datetime(interval.get('joinDateTime')),
+                            'leave_time': parse_datetime(interval.get('leaveDateTime')),
+                        })
+                url = data.get('@odata.nextLink')
+                if url:
+                    next_page = f"{report['id']} {url}"
+                elif index + 1 < len(reports):
+                    next_page = reports[index + 1]['id']
+                else:
+                    next_page = None
+                yield segments, next_page
+
+
+class MeetProvider(MeetingProvider):
+    """Google Meet REST API; ``meeting_ref`` is the meeting code. Meet does not
+    expose e-mail addresses, attendees are matched on their display name."""
+    code = 'meet'
+    default_base_url = 'https://meet.googleapis.com/v2'
+    rate_limit = 5
+
+    def _fetch_pages(self, meeting_ref, page, since):
+        code = meeting_ref.rstrip('/').rsplit('/', 1)[-1]
+        records = []
+        params = {'filter': f'space.meeting_code="{code}"', 'pageSize': 100}
+        while True:
+            data = self._request('GET', '/conferenceRecords', params=params)
+            records += [record['name'] for record in data.get('conferenceRecords', [])]
+            if not data.get('nextPageToken'):
+                break
+            params['pageToken'] = data['nextPageToken']
+        if not records:
+            yield [], None
+            return
+
+        # page cursor: "<conference record> <participants page token>"
+        record_name, _sep, token = (page or '').partition(' ')
+        if record_name in records:
+            records = records[records.index(record_name):]
+        for index, name in enumerate(records):
+            params = {'pageSize': 250}
+            if since:
+                params['filter'] = f'latest_end_time IS NULL OR latest_end_time > "{since.isoformat()}Z"'
+            if name == record_name and token:
+                params['pageToken'] = token
+            while True:
+                data = self._request('GET', f'/{name}/participants', params=params)
+                segments = []
+                for participant in data.get('participants', []):
+                    user = participant.get('signedinUser') or participant.get('anonymousUser') or {}
+                    segments.append({
+                        'email': None,
+                        'name': user.get('displayName'),
+                        'join_time': parse_datetime(participant.get('earliestStartTime')),
+                        'leave_time': parse_datetime(participant.get('latestEndTime')),
+                    })
+                token = data.get('nextPageToken')
+                if token:
+                    next_page = f"{name} {token}"
+                elif index + 1 < len(records):
+                    next_page = records[index + 1]
+                else:
+                    next_page = None
+                yield segments, next_page
+                if not token:
+                    break
+                params['pageToken'] = token
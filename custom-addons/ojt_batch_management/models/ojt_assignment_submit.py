@@ -47,6 +47,9 @@ class OjtAssignmentSubmit(models.Model):
 
     @api.constrains('attachment_ids', 'url_link')
     def _check_attachments(self):
+        if self.env.context.get('ojt_defer_attachment_check'):
+            # attachments are linked right after creation (portal upload)
+            return
         for record in self:
             if record.assignment_id.attachment_required and not record.attachment_ids and not record.url_link:
                 raise ValidationError(_('At least one attachment or URL is required for this assignment.'))
@@ -1,5 +1,28 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+
+from werkzeug.urls import url_encode
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL, consteq
+from odoo.tools.misc import hmac
+
+_logger = logging.getLogger(__name__)
+
+CHECKIN_TOKEN_SCOPE = 'ojt.attendance.checkin'
+CHECKIN_SIGNATURE_LENGTH = 32
+# unsigned <event_link>-<participant> QR codes printed before the signed
+# tokens are accepted up to this date (YYYY-MM-DD), none once it is unset
+LEGACY_QR_UNTIL_PARAM = 'ojt_batch_management.checkin_legacy_qr_until'
+QR_IMAGE_SIZE = 200
+# default late threshold, batches can override it (ojt.batch.late_threshold_minutes)
+LATE_AFTER_MINUTES = 15
+# a second scan within this window is treated as a duplicate, not a check-out
+CHECKOUT_MIN_MINUTES = 5
+# offline scanners may run slightly ahead of the server clock
+SCAN_CLOCK_SKEW_MINUTES = 5
 
 
 class OjtAttendance(models.Model):
@@ -58,17 +81,357 @@ class OjtAttendance(models.Model):
             if record.presence == 'present' and not record.check_in:
                 raise ValidationError(_('Check in time is required for present status.'))
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._apply_late_rule(vals_list)
+        records = super().create(vals_list)
+        records._after_attendance_change(records._get_matrix_pairs())
+        return records
+
+    @api.model
+    def _apply_late_rule(self, vals_list):
+        """Set ``presence`` to late in the values whose check-in comes after
+        the event start plus the batch threshold. Presence is never lowered
+        from late, so other late classifications are kept."""
+        # event start times of the whole batch are read in one go
+        event_links = self.env['ojt.event.link'].browse({
+            vals['event_link_id'] for vals in vals_list
+            if vals.get('event_link_id') and vals.get('check_in')
+        })
+        late_rules = {
+            link.id: (link.event_id.date_begin, link.batch_id.late_threshold_minutes
+                      if link.batch_id else LATE_AFTER_MINUTES)
+            for link in event_links
+        }
+        for vals in vals_list:
+            event_start, threshold = late_rules.get(vals.get('event_link_id'), (None, None))
+            if not event_start or not vals.get('check_in'):
+                continue
+            check_in = fields.Datetime.to_datetime(vals['check_in'])
+            # If check-in is more than the batch threshold late, mark as late
+            if (check_in - event_start).total_seconds() / 60 > threshold:
+                vals['presence'] = 'late'
+        return vals_list
+
+    def write(self, vals):
+        matrix_fields = {'participant_id', 'event_link_id', 'presence', 'check_in', 'check_out'}
+        if not matrix_fields.intersection(vals):
+            return super().write(vals)
+        pairs = self._get_matrix_pairs()
+        res = super().write(vals)
+        self._after_attendance_change(pairs | self._get_matrix_pairs())
+        return res
+
+    def unlink(self):
+        pairs = self._get_matrix_pairs()
+        res = super().unlink()
+        self._after_attendance_change(pairs)
+        return res
+
+    def _get_matrix_pairs(self):
+        return {(record.participant_id.id, record.event_link_id.id) for record in self}
+
+    @api.model
+    def _after_attendance_change(self, pairs):
+        """Propagate changed ``(participant_id, event_link_id)`` attendances to
+        the attendance matrix and the participants' KPIs."""
+        pairs = set(pairs)
+        self.env['ojt.attendance.matrix']._refresh_cells(pairs)
+        self.env['ojt.participant'].browse({pair[0] for pair in pairs if pair[0]})._recompute_kpi_later()
+
+    # ---------------------------------------------------------
+    # QR CHECK-IN
+    # ---------------------------------------------------------
+    @api.model
+    def _get_checkin_token(self, event_link_id, participant_id):
+        """Signed QR payload ``<event_link>-<participant>-<signature>``."""
+        payload = f"{int(event_link_id)}-{int(participant_id)}"
+        signature = hmac(self.env(su=True), CHECKIN_TOKEN_SCOPE, payload, hashlib.sha256)
+        return f"{payload}-{signature[:CHECKIN_SIGNATURE_LENGTH]}"
+
+    @api.model
+    def _get_checkin_url(self, event_link_id, participant_id):
+        """Check-in page URL carried by the QR code; the scanner tool reads
+        the token from it and phone cameras open the check-in page."""
+        token = self._get_checkin_token(event_link_id, participant_id)
+        return f"{self.get_base_url()}/ojt/attend/checkin?{url_encode({'qr': token})}"
+
+    @api.model
+    def _get_checkin_qr_src(self, event_link_id, participant_id, size=QR_IMAGE_SIZE):
+        """Image URL of the check-in QR code, rendered by /report/barcode."""
+        return '/report/barcode?' + url_encode({
+            'barcode_type': 'QR',
+            'value': self._get_checkin_url(event_link_id, participant_id),
+            'width': size,
+            'height': size,
+        })
+
     @api.model
-    def create(self, vals):
-        record = super().create(vals)
-        # Auto-set presence based on check-in time vs event start
-        if record.check_in and record.event_link_id and record.event_link_id.event_id:
-            event_start = record.event_link_id.event_id.date_begin
-            if event_start and record.check_in > event_start:
-                # If check-in is more than 15 minutes late, mark as late
-                if (record.check_in - event_start).total_seconds() / 60 > 15:
-                    record.presence = 'late'
-        return record
+    def _accept_legacy_checkin_token(self):
+        until = self.env['ir.config_parameter'].sudo().get_param(LEGACY_QR_UNTIL_PARAM)
+        try:
+            return bool(until) and fields.Date.context_today(self) <= fields.Date.to_date(until)
+        except ValueError:
+            return False
+
+    @api.model
+    def _parse_checkin_token(self, token):
+        """Return ``(event_link_id, participant_id)`` for a valid token, else None.
+
+        Only the signature is checked (the database secret is cached), the
+        records themselves are validated by the check-in statement. Unsigned
+        legacy payloads are accepted until ``checkin_legacy_qr_until``.
+        """
+        parts = (token or '').strip().split('-')
+        if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+            if not self._accept_legacy_checkin_token():
+                return None
+            _logger.info("Legacy unsigned check-in QR code %s accepted", token.strip())
+            return int(parts[0]), int(parts[1])
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            return None
+        event_link_id, participant_id = int(parts[0]), int(parts[1])
+        expected = self._get_checkin_token(event_link_id, participant_id)
+        if not consteq(expected, token.strip()):
+            return None
+        return event_link_id, participant_id
+
+    @api.model
+    def _qr_checkin(self, token):
+        """Check in (first scan) or check out (later scan) from a QR token.
+
+        Runs as a single idempotent upsert on the (participant_id, event_link_id)
+        unique constraint, without ORM overhead or chatter tracking, so it
+        holds up when a whole session scans at once.
+
+        Returns a dict with ``status`` in ``invalid``, ``checked_in``,
+        ``checked_out``, ``already_checked_in`` or ``already_checked_out``.
+        """
+        ids = self._parse_checkin_token(token)
+        if not ids:
+            return {'status': 'invalid'}
+        event_link_id, participant_id = ids
+        now = fields.Datetime.now()
+
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_attendance (
+                participant_id, event_link_id, batch_id, event_id, company_id,
+                check_in, presence, method, duration_minutes,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT p.id, l.id, p.batch_id, l.event_id, p.company_id,
+                   %(now)s,
+                   CASE WHEN e.date_begin IS NOT NULL
+                         AND %(now)s > e.date_begin + make_interval(mins => COALESCE(b.late_threshold_minutes, %(late)s))
+                        THEN 'late' ELSE 'present' END,
+                   'qr', 0,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM ojt_participant p
+              JOIN ojt_event_link l ON l.id = %(event_link_id)s AND l.batch_id = p.batch_id
+              LEFT JOIN event_event e ON e.id = l.event_id
+              LEFT JOIN ojt_batch b ON b.id = l.batch_id
+             WHERE p.id = %(participant_id)s
+            ON CONFLICT (participant_id, event_link_id) DO UPDATE SET
+                -- a row without check-in (e.g. marked absent) is checked in now
+                check_in = COALESCE(ojt_attendance.check_in, EXCLUDED.check_in),
+                presence = CASE WHEN ojt_attendance.check_in IS NULL
+                                THEN EXCLUDED.presence ELSE ojt_attendance.presence END,
+                method = CASE WHEN ojt_attendance.check_in IS NULL
+                              THEN EXCLUDED.method ELSE ojt_attendance.method END,
+                write_uid = CASE WHEN ojt_attendance.check_in IS NULL
+                                 THEN EXCLUDED.write_uid ELSE ojt_attendance.write_uid END,
+                write_date = CASE WHEN ojt_attendance.check_in IS NULL
+                                  THEN EXCLUDED.write_date ELSE ojt_attendance.write_date END,
+                check_out = CASE
+                    WHEN ojt_attendance.check_out IS NULL
+                     AND ojt_attendance.check_in < %(now)s - make_interval(mins => %(gap)s)
+                    THEN %(now)s ELSE ojt_attendance.check_out END,
+                duration_minutes = CASE
+                    WHEN ojt_attendance.check_out IS NULL
+                     AND ojt_attendance.check_in < %(now)s - make_interval(mins => %(gap)s)
+                    THEN EXTRACT(EPOCH FROM (%(now)s - ojt_attendance.check_in)) / 60
+                    ELSE ojt_attendance.duration_minutes END
+            RETURNING id, check_in, check_out
+            """,
+            now=now, late=LATE_AFTER_MINUTES, gap=CHECKOUT_MIN_MINUTES, uid=self.env.uid,
+            event_link_id=event_link_id, participant_id=participant_id,
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            return {'status': 'invalid'}
+        attendance_id, check_in, check_out = row
+        self.browse(attendance_id).invalidate_recordset()
+        self._after_attendance_change([(participant_id, event_link_id)])
+        if check_in == now:
+            status = 'checked_in'
+        elif check_out == now:
+            status = 'checked_out'
+        elif check_out:
+            status = 'already_checked_out'
+        else:
+            status = 'already_checked_in'
+        return {
+            'status': status,
+            'attendance_id': attendance_id,
+            'event_link_id': event_link_id,
+            'participant_id': participant_id,
+            'time': now,
+        }
+
+    @api.model
+    def _parse_scanned_at(self, value):
+        """ISO 8601 scan time -> naive UTC datetime, None when unusable."""
+        if not isinstance(value, str) or not value:
+            return None
+        try:
+            scanned_at = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if scanned_at.tzinfo:
+            scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+        scanned_at = scanned_at.replace(microsecond=0)
+        if scanned_at > fields.Datetime.now() + timedelta(minutes=SCAN_CLOCK_SKEW_MINUTES):
+            return None
+        return scanned_at
+
+    @api.model
+    def _bulk_qr_checkin(self, scans):
+        """Ingest a batch of buffered QR scans in one transaction.
+
+        ``scans`` is a list of dicts with ``event_link_id``, ``token`` and
+        ``scanned_at`` (ISO 8601). Scans of the same participant and event are
+        merged: the earliest one is the check-in, the latest one the check-out
+        when it comes at least ``CHECKOUT_MIN_MINUTES`` later. Rows already in
+        the database are merged the same way, so re-sending a batch is harmless.
+
+        Returns one result per scan, in input order, with ``status`` in
+        ``invalid``, ``checked_in``, ``checked_out`` or ``duplicate``.
+        """
+        results = [{'index': index, 'status': 'invalid'} for index in range(len(scans))]
+        groups = {}  # (participant_id, event_link_id) -> [first, last, row indexes]
+        scan_times = {}
+        for index, scan in enumerate(scans):
+            if not isinstance(scan, dict):
+                continue
+            ids = self._parse_checkin_token(scan.get('token'))
+            scanned_at = self._parse_scanned_at(scan.get('scanned_at'))
+            if not ids or not scanned_at or str(scan.get('event_link_id')) != str(ids[0]):
+                continue
+            scan_times[index] = scanned_at
+            key = (ids[1], ids[0])
+            group = groups.setdefault(key, [scanned_at, scanned_at, []])
+            group[0] = min(group[0], scanned_at)
+            group[1] = max(group[1], scanned_at)
+            group[2].append(index)
+        if not groups:
+            return results
+
+        keys = list(groups)
+        gap = timedelta(minutes=CHECKOUT_MIN_MINUTES)
+        now = fields.Datetime.now()
+        self.env.flush_all()
+
+        # new (participant, event) pairs: plain insert, presence decided set-wise
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_attendance (
+                participant_id, event_link_id, batch_id, event_id, company_id,
+                check_in, check_out, presence, method, duration_minutes,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT p.id, l.id, p.batch_id, l.event_id, p.company_id,
+                   d.first_scan,
+                   CASE WHEN d.last_scan >= d.first_scan + %(gap)s THEN d.last_scan END,
+                   CASE WHEN e.date_begin IS NOT NULL
+                         AND d.first_scan > e.date_begin + make_interval(mins => COALESCE(b.late_threshold_minutes, %(late)s))
+                        THEN 'late' ELSE 'present' END,
+                   'qr',
+                   CASE WHEN d.last_scan >= d.first_scan + %(gap)s
+                        THEN EXTRACT(EPOCH FROM (d.last_scan - d.first_scan)) / 60 ELSE 0 END,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(participant_ids)s::int[], %(event_link_ids)s::int[],
+                          %(first_scans)s::timestamp[], %(last_scans)s::timestamp[])
+                   AS d(participant_id, event_link_id, first_scan, last_scan)
+              JOIN ojt_participant p ON p.id = d.participant_id
+              JOIN ojt_event_link l ON l.id = d.event_link_id AND l.batch_id = p.batch_id
+              LEFT JOIN event_event e ON e.id = l.event_id
+              LEFT JOIN ojt_batch b ON b.id = l.batch_id
+            ON CONFLICT (participant_id, event_link_id) DO NOTHING
+            RETURNING id, participant_id, event_link_id, check_in, check_out
+            """,
+            gap=gap, late=LATE_AFTER_MINUTES, uid=self.env.uid, now=now,
+            participant_ids=[key[0] for key in keys],
+            event_link_ids=[key[1] for key in keys],
+            first_scans=[groups[key][0] for key in keys],
+            last_scans=[groups[key][1] for key in keys],
+        ))
+        rows = self.env.cr.fetchall()
+
+        # existing pairs: merge the scans into the stored check-in/check-out
+        inserted = {(row[1], row[2]) for row in rows}
+        existing = [key for key in keys if key not in inserted]
+        if existing:
+            self.env.cr.execute(SQL(
+                """
+                WITH d AS (
+                    SELECT *
+                      FROM unnest(%(participant_ids)s::int[], %(event_link_ids)s::int[],
+                                  %(first_scans)s::timestamp[], %(last_scans)s::timestamp[])
+                           AS d(participant_id, event_link_id, first_scan, last_scan)
+                ), merged AS (
+                    SELECT a.id,
+                           LEAST(a.check_in, d.first_scan) AS new_in,
+                           GREATEST(a.check_out, d.last_scan) AS latest,
+                           (a.check_in IS NULL OR d.first_scan < a.check_in) AS earlier,
+                           e.date_begin,
+                           COALESCE(b.late_threshold_minutes, %(late)s) AS late_threshold
+                      FROM ojt_attendance a
+                      JOIN d ON d.participant_id = a.participant_id AND d.event_link_id = a.event_link_id
+                      LEFT JOIN event_event e ON e.id = a.event_id
+                      LEFT JOIN ojt_event_link l ON l.id = a.event_link_id
+                      LEFT JOIN ojt_batch b ON b.id = l.batch_id
+                )
+                UPDATE ojt_attendance a
+                   SET check_in = m.new_in,
+                       check_out = CASE WHEN m.latest >= m.new_in + %(gap)s THEN m.latest ELSE a.check_out END,
+                       duration_minutes = CASE WHEN m.latest >= m.new_in + %(gap)s
+                                               THEN EXTRACT(EPOCH FROM (m.latest - m.new_in)) / 60
+                                               ELSE a.duration_minutes END,
+                       presence = CASE WHEN NOT m.earlier THEN a.presence
+                                       WHEN m.date_begin IS NOT NULL
+                                        AND m.new_in > m.date_begin + make_interval(mins => m.late_threshold)
+                                       THEN 'late' ELSE 'present' END,
+                       write_uid = %(uid)s,
+                       write_date = %(now)s
+                  FROM merged m
+                 WHERE a.id = m.id
+                RETURNING a.id, a.participant_id, a.event_link_id, a.check_in, a.check_out
+                """,
+                gap=gap, late=LATE_AFTER_MINUTES, uid=self.env.uid, now=now,
+                participant_ids=[key[0] for key in existing],
+                event_link_ids=[key[1] for key in existing],
+                first_scans=[groups[key][0] for key in existing],
+                last_scans=[groups[key][1] for key in existing],
+            ))
+            rows += self.env.cr.fetchall()
+        self.invalidate_model()
+        self._after_attendance_change((row[1], row[2]) for row in rows)
+
+        for attendance_id, participant_id, event_link_id, check_in, check_out in rows:
+            indexes = groups[(participant_id, event_link_id)][2]
+            check_in_done = check_out_done = False
+            for index in sorted(indexes, key=scan_times.get):
+                scanned_at = scan_times[index]
+                if scanned_at == check_in and not check_in_done:
+                    status, check_in_done = 'checked_in', True
+                elif scanned_at == check_out and not check_out_done:
+                    status, check_out_done = 'checked_out', True
+                else:
+                    status = 'duplicate'
+                results[index].update(status=status, attendance_id=attendance_id)
+        return results
 
     def action_mark_present(self):
         self.write({'presence': 'present'})
@@ -0,0 +1,177 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class OjtAttendanceMatrix(models.Model):
+    """One row per participant and event of a batch, whatever attendance exists.
+
+    The table is maintained from ``ojt.attendance`` (and from the batch
+    membership of participants and events) with set-based upserts, so the
+    participant x event grid is read from a single indexed table instead
+    of being pivoted from the attendance records on every open.
+    """
+    _name = 'ojt.attendance.matrix'
+    _description = 'OJT Attendance Matrix'
+    _order = 'batch_id, participant_id, event_date, event_link_id'
+
+    batch_id = fields.Many2one('ojt.batch', string='Batch', required=True, readonly=True,
+                               index=True, ondelete='cascade')
+    participant_id = fields.Many2one('ojt.participant', string='Participant', required=True,
+                                     readonly=True, ondelete='cascade')
+    event_link_id = fields.Many2one('ojt.event.link', string='Event', required=True,
+                                    readonly=True, index=True, ondelete='cascade')
+    event_date = fields.Date(string='Event Date', readonly=True)
+    attendance_id = fields.Many2one('ojt.attendance', string='Attendance', readonly=True,
+                                    ondelete='set null')
+    presence = fields.Selection([
+        ('present', 'Present'),
+        ('late', 'Late'),
+        ('absent', 'Absent'),
+        ('none', 'Not Recorded'),
+    ], string='Presence', required=True, readonly=True, default='none')
+    attended = fields.Integer(string='Attended', readonly=True, aggregator='sum')
+    late = fields.Integer(string='Late', readonly=True, aggregator='sum')
+    duration_minutes = fields.Float(string='Duration (min)', readonly=True, aggregator='sum')
+
+    _sql_constraints = [
+        ('unique_cell', 'unique(participant_id, event_link_id)',
+         'Attendance matrix cell must be unique per participant and event!'),
+    ]
+
+    def init(self):
+        # fill the matrix for data that predates it, a no-op once in sync
+        self._upsert_cells(SQL("p.batch_id IS NOT NULL"))
+
+    # ---------------------------------------------------------
+    # REFRESH
+    # ---------------------------------------------------------
+    def _upsert_cells(self, where):
+        """Recompute the cells of the participant/event pairs matched by ``where``
+        (an SQL condition on ``p`` participant and ``l`` event link)."""
+        now = fields.Datetime.now()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_attendance_matrix (
+                batch_id, participant_id, event_link_id, event_date,
+                attendance_id, presence, attended, late, duration_minutes,
+                create_uid, create_date, write_uid, write_date
+            )
+            SELECT p.batch_id, p.id, l.id, l.event_date,
+                   a.id, COALESCE(a.presence, 'none'),
+                   CASE WHEN a.presence IN ('present', 'late') THEN 1 ELSE 0 END,
+                   CASE WHEN a.presence = 'late' THEN 1 ELSE 0 END,
+                   COALESCE(a.duration_minutes, 0),
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM ojt_participant p
+              JOIN ojt_event_link l ON l.batch_id = p.batch_id
+              LEFT JOIN ojt_attendance a ON a.participant_id = p.id AND a.event_link_id = l.id
+             WHERE %(where)s
+            ON CONFLICT (participant_id, event_link_id) DO UPDATE SET
+                batch_id = EXCLUDED.batch_id,
+                event_date = EXCLUDED.event_date,
+                attendance_id = EXCLUDED.attendance_id,
+                presence = EXCLUDED.presence,
+                attended = EXCLUDED.attended,
+                late = EXCLUDED.late,
+                duration_minutes = EXCLUDED.duration_minutes,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+            WHERE (ojt_attendance_matrix.batch_id, ojt_attendance_matrix.event_date,
+                   ojt_attendance_matrix.attendance_id, ojt_attendance_matrix.presence,
+                   ojt_attendance_matrix.duration_minutes)
+                  IS DISTINCT FROM
+                  (EXCLUDED.batch_id, EXCLUDED.event_date, EXCLUDED.attendance_id,
+                   EXCLUDED.presence, EXCLUDED.duration_minutes)
+            """,
+            uid=self.env.uid, now=now, where=where,
+        ))
+
+    @api.model
+    def _refresh_cells(self, pairs):
+        """Refresh the cells of ``(participant_id, event_link_id)`` pairs."""
+        pairs = {(int(participant_id), int(event_link_id))
+                 for participant_id, event_link_id in pairs if participant_id and event_link_id}
+        if not pairs:
+            return
+        self.env.flush_all()
+        self._upsert_cells(SQL(
+            "(p.id, l.id) IN (SELECT * FROM unnest(%s::int[], %s::int[]))",
+            [pair[0] for pair in pairs], [pair[1] for pair in pairs],
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_members(self, participant_ids=(), event_link_ids=(), batch_ids=()):
+        """Rebuild the rows and columns of the given participants, events and
+        whole batches, dropping the cells of those that moved out of a batch."""
+        participant_ids = [id_ for id_ in set(participant_ids) if id_]
+        event_link_ids = [id_ for id_ in set(event_link_ids) if id_]
+        batch_ids = [id_ for id_ in set(batch_ids) if id_]
+        if not (participant_ids or event_link_ids or batch_ids):
+            return
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM ojt_attendance_matrix m
+             USING ojt_participant p, ojt_event_link l
+             WHERE (m.participant_id = ANY(%(participant_ids)s)
+                    OR m.event_link_id = ANY(%(event_link_ids)s)
+                    OR m.batch_id = ANY(%(batch_ids)s))
+               AND p.id = m.participant_id
+               AND l.id = m.event_link_id
+               AND (p.batch_id IS DISTINCT FROM m.batch_id OR l.batch_id IS DISTINCT FROM m.batch_id)
+            """,
+            participant_ids=participant_ids, event_link_ids=event_link_ids, batch_ids=batch_ids,
+        ))
+        self._upsert_cells(SQL(
+            "(p.id = ANY(%(participant_ids)s) OR l.id = ANY(%(event_link_ids)s) OR p.batch_id = ANY(%(batch_ids)s))",
+            participant_ids=participant_ids, event_link_ids=event_link_ids, batch_ids=batch_ids,
+        ))
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_batches(self, batch_ids):
+        """Rebuild the matrix of whole batches."""
+        self._refresh_members(batch_ids=batch_ids)
+
+    @api.model
+    def _refresh_all(self):
+        """Rebuild the whole matrix, e.g. after raw data fixes."""
+        self._refresh_batches(self.env['ojt.batch'].with_context(active_test=False).search([]).ids)
+
+    # ---------------------------------------------------------
+    # EXPORT
+    # ---------------------------------------------------------
+    @api.model
+    def _get_grid(self, batch_id):
+        """Return ``(events, rows)`` for a batch: events as ``(id, name, date)``
+        in date order, rows as ``(participant_name, student_id, {event_id: presence})``."""
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT l.id, l.name, l.event_date
+              FROM ojt_event_link l
+             WHERE l.batch_id = %(batch_id)s
+             ORDER BY l.event_date, l.id
+            """,
+            batch_id=batch_id,
+        ))
+        events = self.env.cr.fetchall()
+        self.env.cr.execute(SQL(
+            """
+            SELECT m.participant_id, p.name, rp.ref,
+                   array_agg(m.event_link_id), array_agg(m.presence)
+              FROM ojt_attendance_matrix m
+              JOIN ojt_participant p ON p.id = m.participant_id
+              LEFT JOIN res_partner rp ON rp.id = p.partner_id
+             WHERE m.batch_id = %(batch_id)s
+             GROUP BY m.participant_id, p.name, rp.ref
+             ORDER BY p.name, m.participant_id
+            """,
+            batch_id=batch_id,
+        ))
+        rows = [
+            (name, ref, dict(zip(event_ids, presences)))
+            for _participant_id, name, ref, event_ids, presences in self.env.cr.fetchall()
+        ]
+        return events, rows
@@ -1,6 +1,7 @@
 import uuid
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
 
 
 class OjtBatch(models.Model):
@@ -45,6 +46,8 @@ class OjtBatch(models.Model):
                                                help='Minimum attendance percentage for certificate')
     certificate_rule_score = fields.Float(string='Min Final Score', default=70.0,
                                           help='Minimum final score for certificate')
+    late_threshold_minutes = fields.Integer(string='Late After (min)', default=15,
+                                            help='Check-ins later than this after the event start are marked late')
 
     progress_ratio = fields.Float(compute='_compute_progress_ratio', store=True,
                                   string='Progress %')
@@ -69,6 +72,12 @@ class OjtBatch(models.Model):
     completed_count = fields.Integer(compute='_compute_state_counts', store=True)
     cancelled_count = fields.Integer(compute='_compute_state_counts', store=True)
 
+    # Attachment storage (submissions + applicant resumes)
+    attachment_size = fields.Float(compute='_compute_attachment_storage', string='Uploaded (MB)',
+                                   help='Total size of submission and resume attachments')
+    attachment_saved_size = fields.Float(compute='_compute_attachment_storage', string='Saved by Dedup (MB)',
+                                         help='Space not stored twice because identical files share one blob')
+
     @api.depends('participant_ids')
     def _compute_counts(self):
         for record in self:
@@ -86,6 +95,44 @@ class OjtBatch(models.Model):
             record.completed_count = len(participants.filtered(lambda p: p.state == 'completed'))
             record.cancelled_count = len(participants.filtered(lambda p: p.state in ['failed', 'left']))
 
+    def _compute_attachment_storage(self):
+        batch_ids = tuple(batch_id for batch_id in self._origin.ids if batch_id)
+        if not batch_ids:
+            self.attachment_size = self.attachment_saved_size = 0.0
+            return
+        self.env.flush_all()
+        # attachments sharing a blob are stored once: per batch and store_fname only one copy counts
+        self.env.cr.execute(SQL(
+            """
+            WITH files AS (
+                SELECT s.batch_id, a.store_fname, a.file_size
+                  FROM ir_attachment a
+                  JOIN ojt_assignment_submit_attachment_rel rel ON rel.ir_attachment_id = a.id
+                  JOIN ojt_assignment_submit s ON s.id = rel.ojt_assignment_submit_id
+                 WHERE s.batch_id IN %(batch_ids)s
+                UNION ALL
+                SELECT h.ojt_batch_id, a.store_fname, a.file_size
+                  FROM ir_attachment a
+                  JOIN hr_applicant h ON a.res_model = 'hr.applicant' AND a.res_id = h.id
+                 WHERE h.ojt_batch_id IN %(batch_ids)s
+            ), blobs AS (
+                SELECT batch_id, SUM(file_size) AS total,
+                       CASE WHEN store_fname IS NULL THEN 0 ELSE SUM(file_size) - MAX(file_size) END AS saved
+                  FROM files
+                 GROUP BY batch_id, store_fname
+            )
+            SELECT batch_id, SUM(total), SUM(saved)
+              FROM blobs
+             GROUP BY batch_id
+            """,
+            batch_ids=batch_ids,
+        ))
+        sizes = {batch_id: (total, saved) for batch_id, total, saved in self.env.cr.fetchall()}
+        for record in self:
+            total, saved = sizes.get(record._origin.id, (0, 0))
+            record.attachment_size = (total or 0) / (1024 * 1024)
+            record.attachment_saved_size = (saved or 0) / (1024 * 1024)
+
     def _compute_progress_ratio(self):
         for record in self:
             if not record.participant_ids:
@@ -100,13 +147,15 @@ class OjtBatch(models.Model):
             if record.start_date and record.end_date and record.start_date > record.end_date:
                 raise ValidationError(_('End date must be after start date.'))
 
-    @api.constrains('certificate_rule_attendance', 'certificate_rule_score')
+    @api.constrains('certificate_rule_attendance', 'certificate_rule_score', 'late_threshold_minutes')
     def _check_rules(self):
         for record in self:
             if not (0 <= record.certificate_rule_attendance <= 100):
                 raise ValidationError(_('Attendance rule must be between 0 and 100.'))
             if record.certificate_rule_score < 0:
                 raise ValidationError(_('Score rule must be non-negative.'))
+            if record.late_threshold_minutes < 0:
+                raise ValidationError(_('Late threshold must be non-negative.'))
 
     @api.model
     def create(self, vals):
@@ -269,3 +318,24 @@ class OjtBatch(models.Model):
             'domain': [('batch_id', '=', self.id), ('state', 'in', ['failed', 'left'])],
             'context': {'default_batch_id': self.id}
         }
+
+    def action_view_attendance_matrix(self):
+        """Participant x event attendance grid of the batch"""
+        self.ensure_one()
+        return {
+            'name': 'Attendance Matrix',
+            'type': 'ir.actions.act_window',
+            'res_model': 'ojt.attendance.matrix',
+            'view_mode': 'pivot,list',
+            'domain': [('batch_id', '=', self.id)],
+            'context': {'search_default_batch_id': self.id},
+        }
+
+    def action_export_attendance_matrix(self):
+        """Download the attendance grid as CSV"""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/ojt/batch/%s/attendance_matrix.csv' % self.id,
+            'target': 'self',
+        }
@@ -42,7 +42,15 @@ class OjtEventLink(models.Model):
 
     @api.model
     def create(self, vals):
-        return super().create(vals)
+        record = super().create(vals)
+        self.env['ojt.attendance.matrix']._refresh_members(event_link_ids=record.ids)
+        return record
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'batch_id', 'event_date'}.intersection(vals):
+            self.env['ojt.attendance.matrix']._refresh_members(event_link_ids=self.ids)
+        return res
 
     def action_mark_done(self):
         self.write({'status': 'done'})
@@ -1,5 +1,18 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+import logging
+
+from odoo import models, fields, api, tools
+from odoo.tools import SQL, sql
+
+_logger = logging.getLogger(__name__)
+
+# automatic badge type -> (participant KPI, badge threshold field)
+BADGE_RULES = {
+    'attendance': ('attendance_rate', 'rule_attendance'),
+    'assignment': ('score_avg', 'rule_assignments'),
+    'participation': ('attendance_count', 'rule_participations'),
+}
+RULE_FIELDS = {'rule_type', 'badge_type', 'active', 'rule_attendance', 'rule_assignments', 'rule_participations'}
 
 class OjtGamification(models.Model):
     _name = 'ojt.gamification'
@@ -27,51 +40,114 @@ class OjtGamification(models.Model):
     rule_participations = fields.Integer(string='Min Participations', default=5)
     active = fields.Boolean(default=True)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        badges = super().create(vals_list)
+        badges._rules_changed()
+        return badges
+
+    def write(self, vals):
+        old_points = {badge.id: badge.points for badge in self} if 'points' in vals else {}
+        res = super().write(vals)
+        if old_points:
+            awards = self.env['ojt.badge.award'].search([('badge_id', 'in', self.ids)])
+            Ledger = self.env['ojt.points.ledger']
+            Ledger._post(Ledger._award_entries(awards, 'adjust', points={
+                award.id: award.badge_id.points - old_points[award.badge_id.id] for award in awards
+            }))
+        if RULE_FIELDS.intersection(vals):
+            self._rules_changed()
+        return res
+
+    def _rules_changed(self):
+        # participants that now meet a rule are picked up by the reconciliation
+        cron = self.env.ref('ojt_batch_management.ir_cron_award_badges', raise_if_not_found=False)
+        if cron and self.filtered(lambda badge: badge.rule_type == 'auto' and badge.active):
+            cron._trigger()
+
+    # ---------------------------------------------------------
+    # RULES
+    # ---------------------------------------------------------
+    @api.model
+    def _get_compiled_rules(self):
+        """``(badge_id, domain)`` of every active automatic badge, the rule
+        compiled to a participant domain. Cached under a stamp of the rules,
+        so a badge change recompiles them without clearing the registry
+        caches."""
+        self.flush_model(['rule_type', 'badge_type', 'active', *(field for _kpi, field in BADGE_RULES.values())])
+        self.env.cr.execute(SQL(
+            """
+            SELECT md5(string_agg(ROW(id, badge_type, rule_attendance, rule_assignments,
+                                      rule_participations)::text, ',' ORDER BY id))
+              FROM ojt_gamification
+             WHERE rule_type = 'auto' AND active
+            """
+        ))
+        return self._compile_rules(self.env.cr.fetchone()[0])
+
+    @tools.ormcache('stamp')
+    def _compile_rules(self, stamp):
+        rules = []
+        for badge in self.sudo().search([('rule_type', '=', 'auto')]):
+            if badge.badge_type not in BADGE_RULES:
+                # leadership, innovation and teamwork badges are awarded by hand
+                continue
+            kpi, threshold = BADGE_RULES[badge.badge_type]
+            rules.append((badge.id, (('state', '=', 'active'), (kpi, '>=', badge[threshold]))))
+        return tuple(rules)
+
+    @api.model
+    def _evaluate_participants(self, participants):
+        """Award the automatic badges that ``participants`` just became
+        eligible to, evaluating the compiled rules on the records in memory."""
+        pairs = [
+            (badge_id, participant_id)
+            for badge_id, domain in self._get_compiled_rules()
+            for participant_id in participants.filtered_domain(list(domain)).ids
+        ]
+        return self.env['ojt.badge.award'].sudo()._create_missing(pairs)
+
     def _cron_award_badges(self):
-        """Cron job to automatically award badges based on rules"""
-        for badge in self.search([('rule_type', '=', 'auto')]):
-            badge._award_automatic_badges()
+        """Reconciliation behind the event-driven evaluation.
+
+        Awards are normally made when a participant's KPIs change, see
+        ``ojt.participant._queue_badge_evaluation``. This pass catches what
+        that missed (rule changes, data fixed in SQL) with one anti-join
+        per rule, so it only reads the missing pairs.
+        """
+        Participant = self.env['ojt.participant']
+        pairs = []
+        for badge_id, domain in self._get_compiled_rules():
+            self.env.cr.execute(SQL(
+                """
+                SELECT %(badge_id)s, p.id
+                  FROM (%(eligible)s) p(id)
+                 WHERE NOT EXISTS (SELECT 1 FROM ojt_badge_award a
+                                    WHERE a.badge_id = %(badge_id)s AND a.participant_id = p.id)
+                """,
+                badge_id=badge_id, eligible=Participant._search(list(domain)).subselect(),
+            ))
+            pairs += self.env.cr.fetchall()
+        awards = self.env['ojt.badge.award']._create_missing(pairs)
+        _logger.info("Badge reconciliation: %d missing awards created", len(awards))
 
     def _award_automatic_badges(self):
         """Award badges based on automatic rules"""
-        if self.badge_type == 'attendance':
-            self._award_attendance_badges()
-        elif self.badge_type == 'assignment':
-            self._award_assignment_badges()
-        elif self.badge_type == 'participation':
-            self._award_participation_badges()
-
-    def _award_attendance_badges(self):
-        """Award badges for perfect attendance"""
-        Participant = self.env['ojt.participant']
-        participants = Participant.search([
-            ('state', '=', 'active'),
-            ('attendance_rate', '>=', self.rule_attendance)
-        ])
-        self._create_awards(participants)
-
-    def _award_assignment_badges(self):
-        """Award badges for assignment excellence"""
-        Participant = self.env['ojt.participant']
-        participants = Participant.search([
-            ('state', '=', 'active'),
-            ('score_avg', '>=', self.rule_assignments)
-        ])
-        self._create_awards(participants)
+        self._create_awards(self._get_eligible_participants())
+
+    def _get_eligible_participants(self):
+        """Active participants meeting the rule of this badge"""
+        self.ensure_one()
+        domain = dict(self._get_compiled_rules()).get(self.id)
+        if domain is None:
+            return self.env['ojt.participant']
+        return self.env['ojt.participant'].search(list(domain))
 
     def _create_awards(self, participants):
-        """Create badge awards for participants"""
-        Award = self.env['ojt.badge.award']
-        for participant in participants:
-            if not Award.search_count([
-                ('badge_id', '=', self.id),
-                ('participant_id', '=', participant.id)
-            ]):
-                Award.create({
-                    'badge_id': self.id,
-                    'participant_id': participant.id,
-                    'awarded_date': fields.Date.today()
-                })
+        """Create badge awards for participants that do not have this badge yet"""
+        self.ensure_one()
+        return self.env['ojt.badge.award']._create_missing(
+            [(self.id, participant_id) for participant_id in participants.ids])
 
 class OjtBadgeAward(models.Model):
     _name = 'ojt.badge.award'
@@ -85,21 +161,144 @@ class OjtBadgeAward(models.Model):
     awarded_by = fields.Many2one('res.users', string='Awarded By', default=lambda self: self.env.user)
     notes = fields.Text(string='Award Notes')
 
+    _sql_constraints = [
+        ('unique_badge_participant', 'unique(badge_id, participant_id)',
+         'A participant can only receive a badge once!'),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        awards = super().create(vals_list)
+        Ledger = self.env['ojt.points.ledger']
+        Ledger._post(Ledger._award_entries(awards, 'award'))
+        return awards
+
+    def write(self, vals):
+        if not {'badge_id', 'participant_id', 'awarded_date'} & set(vals):
+            return super().write(vals)
+        # a corrected award is booked as its reversal and a new award
+        Ledger = self.env['ojt.points.ledger']
+        entries = Ledger._award_entries(self, 'revoke', sign=-1, on_award_date=True)
+        res = super().write(vals)
+        Ledger._post(entries + Ledger._award_entries(self, 'award'))
+        return res
+
+    def unlink(self):
+        Ledger = self.env['ojt.points.ledger']
+        entries = Ledger._award_entries(self, 'revoke', sign=-1)
+        res = super().unlink()
+        # the award is gone, the entries keep its badge
+        Ledger._post([dict(entry, award_id=False) for entry in entries])
+        return res
+
+    def _auto_init(self):
+        # awards created twice by concurrent passes would block the constraint
+        if sql.table_exists(self.env.cr, self._table):
+            self.env.cr.execute(SQL(
+                """
+                DELETE FROM ojt_badge_award a
+                 USING ojt_badge_award b
+                 WHERE a.badge_id = b.badge_id AND a.participant_id = b.participant_id AND a.id > b.id
+                """
+            ))
+        return super()._auto_init()
+
+    @api.model
+    def _create_missing(self, pairs):
+        """Award the ``(badge_id, participant_id)`` pairs that are not awarded
+        yet, in one insert that skips the existing awards on the unique
+        constraint, so a concurrent pass awarding the same pairs is a no-op."""
+        pairs = sorted({(badge_id, participant_id) for badge_id, participant_id in pairs})
+        if not pairs:
+            return self
+        self.flush_model()
+        now = fields.Datetime.now()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_badge_award (badge_id, participant_id, awarded_date, points, awarded_by,
+                                         create_uid, create_date, write_uid, write_date)
+            SELECT c.badge_id, c.participant_id, %(today)s, g.points, %(uid)s,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(badge_ids)s::int[], %(participant_ids)s::int[]) AS c(badge_id, participant_id)
+              JOIN ojt_gamification g ON g.id = c.badge_id
+              JOIN ojt_participant p ON p.id = c.participant_id
+            ON CONFLICT (badge_id, participant_id) DO NOTHING
+            RETURNING id
+            """,
+            today=fields.Date.today(), uid=self.env.uid, now=now,
+            badge_ids=[pair[0] for pair in pairs], participant_ids=[pair[1] for pair in pairs],
+        ))
+        awards = self.browse(sorted(row[0] for row in self.env.cr.fetchall()))
+        if awards:
+            self.env['ojt.participant'].invalidate_model(['badge_ids'])
+            Ledger = self.env['ojt.points.ledger']
+            Ledger._post(Ledger._award_entries(awards, 'award'))
+        return awards
+
 class OjtParticipant(models.Model):
     _inherit = 'ojt.participant'
 
     badge_ids = fields.One2many('ojt.badge.award', 'participant_id', string='Badges')
-    total_points = fields.Integer(compute='_compute_total_points', store=True, string='Total Points')
-    rank = fields.Integer(compute='_compute_rank', string='Rank')
-    
-    @api.depends('badge_ids.points')
-    def _compute_total_points(self):
-        for record in self:
-            record.total_points = sum(record.badge_ids.mapped('points'))
-
-    def _compute_rank(self):
-        """Compute participant rank based on total points"""
-        participants = self.search([('batch_id', '=', self.batch_id.id)])
-        sorted_participants = participants.sorted(key=lambda r: r.total_points, reverse=True)
-        for idx, participant in enumerate(sorted_participants, 1):
-            participant.rank = idx
\ No newline at end of file
+    total_points = fields.Integer(string='Total Points', readonly=True, copy=False,
+                                  help='Sum of the points ledger of the participant')
+    points_ledger_ids = fields.One2many('ojt.points.ledger', 'participant_id', string='Points History')
+    rank = fields.Integer(string='Rank', readonly=True, copy=False,
+                          help='Dense rank on total points within the batch')
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_participant_batch_rank_idx ON ojt_participant (batch_id, rank, id)"
+        ))
+        self.env['ojt.leaderboard']._refresh()
+
+    def _compute_kpi(self):
+        super()._compute_kpi()
+        self._queue_badge_evaluation()
+
+    def _queue_badge_evaluation(self):
+        """Evaluate the automatic badges of these participants once the
+        transaction committed, in a transaction of its own.
+
+        The caller (a QR scan, an import, a meeting sync) already paid for
+        the matrix upsert and the KPI recompute; the rule evaluation runs
+        after its commit, so a conflicting award can never roll back the
+        attendance write. A failed evaluation is left to the reconciliation
+        cron.
+        """
+        ids = [id_ for id_ in self.ids if isinstance(id_, int)]
+        if not ids:
+            return
+        data = self.env.cr.postcommit.data
+        if 'ojt.badge.evaluate' not in data:
+            data['ojt.badge.evaluate'] = set()
+            registry, uid, context = self.env.registry, self.env.uid, self.env.context
+
+            @self.env.cr.postcommit.add
+            def evaluate_badges():
+                participant_ids = data.pop('ojt.badge.evaluate')
+                try:
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, uid, context)
+                        participants = env['ojt.participant'].sudo().browse(participant_ids).exists()
+                        env['ojt.gamification']._evaluate_participants(participants)
+                        env.flush_all()
+                except Exception:
+                    _logger.exception("Badge evaluation of participants %s failed", sorted(participant_ids))
+        data['ojt.badge.evaluate'].update(ids)
+
+    def write(self, vals):
+        batch_ids = self.batch_id.ids if 'batch_id' in vals else []
+        res = super().write(vals)
+        if batch_ids:
+            self.env['ojt.leaderboard']._refresh(batch_ids + self.batch_id.ids)
+        if 'state' in vals:
+            self._queue_badge_evaluation()
+        return res
+
+    @api.model
+    def create(self, vals):
+        record = super().create(vals)
+        self.env['ojt.leaderboard']._refresh(record.batch_id.ids)
+        return record
+
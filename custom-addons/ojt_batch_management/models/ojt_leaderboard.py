@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+
+class OjtLeaderboard(models.AbstractModel):
+    """Per-batch leaderboard over ``ojt.participant.total_points``.
+
+    Dense ranks are computed with a window function for the batches whose
+    points changed and kept in ``ojt.participant.rank``, so a participant's
+    rank is a column read and a page of the board an index range scan on
+    ``(batch_id, rank)``.
+    """
+    _name = 'ojt.leaderboard'
+    _description = 'OJT Leaderboard'
+
+    @api.model
+    def _refresh(self, batch_ids=None):
+        """Re-rank the given batches (all of them by default)."""
+        if batch_ids is not None:
+            batch_ids = [id_ for id_ in set(batch_ids) if id_]
+            if not batch_ids:
+                return
+        # pending participant writes (batch changes) must be in the table
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ojt_participant p
+               SET rank = r.rank
+              FROM (SELECT id, dense_rank() OVER (PARTITION BY batch_id
+                                                  ORDER BY COALESCE(total_points, 0) DESC) AS rank
+                      FROM ojt_participant
+                     WHERE batch_id IS NOT NULL AND %(where)s) r
+             WHERE p.id = r.id AND p.rank IS DISTINCT FROM r.rank
+            """,
+            where=SQL("batch_id = ANY(%s)", batch_ids) if batch_ids is not None else SQL("TRUE"),
+        ))
+        self.env['ojt.participant'].invalidate_model(['rank'])
+
+    @api.model
+    def get_top(self, batch_id, limit=10, offset=0):
+        """One page of the board of a batch, best first."""
+        return self.env['ojt.participant'].search_read(
+            [('batch_id', '=', batch_id)], ['name', 'total_points', 'rank'],
+            order='rank, id', limit=limit, offset=offset)
+
+    @api.model
+    def get_rank(self, participant_id):
+        """Rank and points of one participant."""
+        participant = self.env['ojt.participant'].browse(participant_id)
+        return {'rank': participant.rank, 'total_points': participant.total_points}
+
+    @api.model
+    def get_top_window(self, batch_id, date_from, date_to, limit=10, offset=0):
+        """One page of the board of a batch over the points earned between
+        ``date_from`` and ``date_to`` (included), read from the points
+        buckets: week buckets for the whole weeks, day buckets for the rest."""
+        date_from = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        first_week = date_from + timedelta(days=-date_from.weekday() % 7)
+        end_weeks = date_to + timedelta(days=1) - timedelta(days=(date_to + timedelta(days=1)).weekday())
+        self.env['ojt.points.bucket'].flush_model()
+        self.env.cr.execute(SQL(
+            """
+            SELECT participant_id, points,
+                   dense_rank() OVER (ORDER BY points DESC) AS rank
+              FROM (SELECT participant_id, sum(points) AS points
+                      FROM ojt_points_bucket
+                     WHERE batch_id = %(batch_id)s
+                       AND CASE WHEN %(first_week)s < %(end_weeks)s
+                                THEN (period = 'week' AND period_start >= %(first_week)s
+                                                      AND period_start < %(end_weeks)s)
+                                  OR (period = 'day' AND period_start BETWEEN %(date_from)s AND %(date_to)s
+                                                     AND (period_start < %(first_week)s
+                                                          OR period_start >= %(end_weeks)s))
+                                ELSE period = 'day' AND period_start BETWEEN %(date_from)s AND %(date_to)s
+                           END
+                     GROUP BY participant_id) totals
+             ORDER BY rank, participant_id
+             LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            batch_id=batch_id, date_from=date_from, date_to=date_to,
+            first_week=first_week, end_weeks=end_weeks, limit=limit, offset=offset,
+        ))
+        rows = self.env.cr.fetchall()
+        names = {participant.id: participant.name
+                 for participant in self.env['ojt.participant'].browse([row[0] for row in rows])}
+        return [{'id': participant_id, 'name': names.get(participant_id), 'points': points, 'rank': rank}
+                for participant_id, points, rank in rows]
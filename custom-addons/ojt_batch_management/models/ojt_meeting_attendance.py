@@ -1,7 +1,22 @@
 # -*- coding: utf-8 -*-
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from odoo import models, fields, api
+from odoo.tools import SQL
 from datetime import timedelta
 
+from .meeting_provider import MeetingProvider, MeetingProviderError
+
+_logger = logging.getLogger(__name__)
+
+# concurrent report downloads per sync run; the per-platform rate limit
+# in MeetingProvider still applies across all of them
+MEETING_SYNC_WORKERS = 8
+# reports are final this long after the meeting ended, syncing stops then
+MEETING_REPORT_DELAY = timedelta(hours=2)
+
 class OjtMeetingAttendance(models.Model):
     _name = 'ojt.meeting.attendance'
     _description = 'OJT Meeting Attendance Integration'
@@ -30,39 +45,137 @@ class OjtMeetingAttendance(models.Model):
     api_secret = fields.Char(string='API Secret')
     company_id = fields.Many2one('res.company', string='Company', required=True, default=lambda self: self.env.company)
 
+    last_sync_date = fields.Datetime(string='Last Sync', readonly=True)
+    sync_error = fields.Text(string='Sync Error', readonly=True)
+    sync_cursor = fields.Json(string='Sync Cursor', readonly=True, copy=False,
+                              help='Provider page token and watermark of the last checkpoint')
+    sync_done = fields.Boolean(string='Sync Complete', readonly=True, copy=False)
+
     def action_fetch_attendance(self):
         """Fetch attendance data from the meeting platform"""
-        if not self.meeting_id or not self.api_key:
+        return self._sync_attendance()
+
+    def _get_provider(self):
+        """Client for the meeting platform, ``None`` when not configured.
+
+        The API root can be overridden per platform with the
+        ``ojt_batch_management.meeting_api_url.<platform>`` parameter.
+        """
+        self.ensure_one()
+        provider_class = MeetingProvider.get(self.platform)
+        if not provider_class or not self.meeting_id or not self.api_key:
+            return None
+        base_url = self.env['ir.config_parameter'].sudo().get_param(
+            f'ojt_batch_management.meeting_api_url.{self.platform}')
+        return provider_class(self.api_key, self.api_secret, base_url=base_url)
+
+    def _get_identity_map(self):
+        """``({email: participant_id}, {casefolded name: participant_id})`` for
+        the batch of the meeting, read in one query. Names shared by several
+        participants are left out."""
+        self.ensure_one()
+        rows = self.env['ojt.participant'].search_read(
+            [('batch_id', '=', self.event_link_id.batch_id.id)], ['partner_id', 'name'])
+        partners = {
+            partner['id']: partner['email']
+            for partner in self.env['res.partner'].browse(
+                [row['partner_id'][0] for row in rows if row['partner_id']]
+            ).read(['email'])
+        }
+        by_email, by_name, names = {}, {}, {}
+        for row in rows:
+            email = (partners.get(row['partner_id'] and row['partner_id'][0]) or '').strip().lower()
+            if email:
+                by_email.setdefault(email, row['id'])
+            name = ' '.join((row['name'] or '').split()).casefold()
+            if name:
+                names[name] = names.get(name, 0) + 1
+                by_name[name] = row['id']
+        return by_email, {name: pid for name, pid in by_name.items() if names[name] == 1}
+
+    def _sync_attendance(self, auto_commit=False):
+        """Import the new part of the attendance reports of all meetings in ``self``.
+
+        Provider clients page through the reports concurrently in a thread
+        pool (no ORM access there), starting from each meeting's
+        ``sync_cursor``. Pages are handed to this thread, which upserts them
+        and checkpoints the cursor page by page; with ``auto_commit`` each
+        checkpoint is committed, so an interrupted run resumes where it
+        stopped instead of downloading the reports again.
+        """
+        jobs = {}
+        for meeting in self:
+            provider = meeting._get_provider()
+            if provider:
+                jobs[meeting.id] = (provider, meeting.meeting_id.strip(), meeting.sync_cursor)
+        if not jobs:
             return False
-        if self.platform == 'teams':
-            return self._fetch_teams_attendance()
-        elif self.platform == 'zoom':
-            return self._fetch_zoom_attendance()
-        elif self.platform == 'meet':
-            return self._fetch_meet_attendance()
 
-    def _fetch_teams_attendance(self):
-        """Fetch attendance data from Microsoft Teams"""
-        pass
+        # bounded, so fetching does not run far ahead of the checkpoints
+        pages = queue.Queue(maxsize=MEETING_SYNC_WORKERS * 2)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-    def _fetch_zoom_attendance(self):
-        """Fetch attendance data from Zoom"""
-        pass
+        def fetch(meeting_id, provider, meeting_ref, cursor):
+            try:
+                for segments, next_cursor in provider.fetch_pages(meeting_ref, cursor):
+                    if not put((meeting_id, segments, next_cursor, None)):
+                        return
+            except Exception as e:
+                if not isinstance(e, MeetingProviderError):
+                    _logger.exception("Attendance sync of meeting %s failed", meeting_id)
+                put((meeting_id, None, None, str(e)))
+            finally:
+                put((meeting_id, None, None, None))
 
-    def _fetch_meet_attendance(self):
-        """Fetch attendance data from Google Meet"""
-        pass
+        Attendee = self.env['ojt.meeting.attendee']
+        pending = len(jobs)
+        with ThreadPoolExecutor(max_workers=min(MEETING_SYNC_WORKERS, len(jobs))) as pool:
+            for meeting_id, job in jobs.items():
+                pool.submit(fetch, meeting_id, *job)
+            try:
+                while pending:
+                    meeting_id, segments, cursor, error = pages.get()
+                    meeting = self.browse(meeting_id)
+                    if error:
+                        _logger.warning("Attendance sync of meeting %s failed: %s", meeting_id, error)
+                        meeting.sync_error = error
+                    elif cursor is None:
+                        pending -= 1
+                        continue
+                    else:
+                        Attendee._upsert_segments(meeting, segments)
+                        vals = {'sync_cursor': cursor, 'sync_error': False}
+                        if not cursor.get('page'):
+                            now = fields.Datetime.now()
+                            vals['last_sync_date'] = now
+                            vals['sync_done'] = bool(meeting.end_time and now > meeting.end_time + MEETING_REPORT_DELAY)
+                        meeting.write(vals)
+                    if auto_commit:
+                        self.env.cr.commit()
+            finally:
+                # let the workers give up instead of blocking on a full queue
+                stop.set()
+        return True
 
     @api.model
     def _cron_sync_meeting_attendance(self):
         """Cron job to sync meeting attendance data"""
         meetings = self.search([
-            ('state', 'in', ['ongoing', 'scheduled']),
+            ('state', '!=', 'cancelled'),
+            ('sync_done', '=', False),
             ('start_time', '<=', fields.Datetime.now()),
             ('end_time', '>=', fields.Datetime.now() - timedelta(hours=24))
         ])
-        for meeting in meetings:
-            meeting.action_fetch_attendance()
+        meetings._sync_attendance(auto_commit=True)
 
 
 class OjtMeetingAttendee(models.Model):
@@ -71,8 +184,12 @@ class OjtMeetingAttendee(models.Model):
 
     meeting_id = fields.Many2one('ojt.meeting.attendance', string='Meeting', required=True)
     participant_id = fields.Many2one('ojt.participant', string='Participant')
+    email = fields.Char(string='Email', help='Address reported by the meeting platform')
+    attendee_name = fields.Char(string='Reported Name', help='Name reported by the meeting platform')
     join_time = fields.Datetime(string='Join Time')
     leave_time = fields.Datetime(string='Leave Time')
+    segments = fields.Json(string='Join/Leave Segments', readonly=True,
+                           help='Merged [join, leave] intervals reported for this attendee')
     duration = fields.Float(string='Duration (minutes)', compute='_compute_duration', store=True)
     attendance_status = fields.Selection([
         ('present', 'Present'),
@@ -80,10 +197,16 @@ class OjtMeetingAttendee(models.Model):
         ('absent', 'Absent')
     ], string='Status', compute='_compute_status', store=True)
 
-    @api.depends('join_time', 'leave_time')
+    @api.depends('join_time', 'leave_time', 'segments')
     def _compute_duration(self):
         for record in self:
-            if record.join_time and record.leave_time:
+            if record.segments:
+                # time actually spent in the meeting, gaps between segments excluded
+                record.duration = sum(
+                    (fields.Datetime.to_datetime(leave) - fields.Datetime.to_datetime(join)).total_seconds()
+                    for join, leave in record.segments if leave
+                ) / 60
+            elif record.join_time and record.leave_time:
                 delta = record.leave_time - record.join_time
                 record.duration = delta.total_seconds() / 60
             else:
@@ -98,3 +221,165 @@ class OjtMeetingAttendee(models.Model):
                 record.attendance_status = 'present'
             else:
                 record.attendance_status = 'late'
+
+    @api.model
+    def _merge_segments(self, segments):
+        """Union of ``(join, leave)`` intervals; ``leave`` is None while the
+        attendee is still in the meeting."""
+        by_join = {}
+        for join, leave in segments:
+            # the same interval is reported open first, closed later
+            if join not in by_join or (leave and (not by_join[join] or leave > by_join[join])):
+                by_join[join] = leave
+        merged = []
+        for join, leave in sorted(by_join.items()):
+            if merged and merged[-1][1] and join <= merged[-1][1]:
+                if leave is None or leave > merged[-1][1]:
+                    merged[-1][1] = leave
+            elif merged and merged[-1][1] is None:
+                continue
+            else:
+                merged.append([join, leave])
+        return merged
+
+    @api.model
+    def _upsert_segments(self, meeting, segments):
+        """Write (part of) a meeting report in bulk.
+
+        Report rows are resolved to participants of the batch through an
+        e-mail map (display name as fallback), the join/leave segments of a
+        person are merged into one attendee, and all attendees are written
+        with one multi-create plus writes of the changed ones. Rows without
+        a match are kept, keyed by e-mail or name, for manual linking.
+        Matched attendees are projected into ``ojt.attendance``.
+        """
+        by_email, by_name = meeting._get_identity_map()
+
+        people = {}  # key -> {'participant_id', 'email', 'attendee_name', 'segments'}
+        for segment in segments:
+            if not segment.get('join_time'):
+                continue
+            email = (segment.get('email') or '').strip().lower()
+            name = ' '.join((segment.get('name') or '').split())
+            participant_id = by_email.get(email) or by_name.get(name.casefold())
+            key = ('participant', participant_id) if participant_id else ('email', email) if email \
+                else ('name', name.casefold())
+            person = people.setdefault(key, {
+                'participant_id': participant_id or False,
+                'email': email or False,
+                'attendee_name': name or False,
+                'segments': [],
+            })
+            person['segments'].append((segment['join_time'], segment.get('leave_time')))
+        if not people:
+            return self.browse()
+
+        existing = {}
+        for attendee in meeting.attendee_ids:
+            if attendee.participant_id:
+                existing[('participant', attendee.participant_id.id)] = attendee
+            elif attendee.email:
+                existing[('email', attendee.email)] = attendee
+            elif attendee.attendee_name:
+                existing[('name', attendee.attendee_name.casefold())] = attendee
+
+        to_create = []
+        touched = self.browse()
+        for key, person in people.items():
+            attendee = existing.get(key)
+            intervals = person['segments']
+            if attendee and attendee.segments:
+                # reports come in pages and increments, merge with what is stored
+                intervals = intervals + [
+                    (fields.Datetime.to_datetime(join), fields.Datetime.to_datetime(leave))
+                    for join, leave in attendee.segments
+                ]
+            merged = self._merge_segments(intervals)
+            vals = {
+                'join_time': merged[0][0],
+                'leave_time': False if any(leave is None for _join, leave in merged)
+                else max(leave for _join, leave in merged),
+                'segments': [[fields.Datetime.to_string(join), fields.Datetime.to_string(leave)]
+                             for join, leave in merged],
+            }
+            if not attendee:
+                to_create.append(dict(person, meeting_id=meeting.id, **vals))
+            elif attendee.segments != vals['segments']:
+                attendee.write(vals)
+                touched |= attendee
+
+        attendees = touched | self.create(to_create)
+        attendees._project_attendance()
+        return attendees
+
+    def _project_attendance(self):
+        """Create or refresh the ``ojt.attendance`` of matched attendees for
+        the event of their meeting. Records checked in by other means (QR,
+        manual) are left alone."""
+        attendees = self.filtered(lambda a: a.participant_id and a.join_time and a.meeting_id.event_link_id)
+        if not attendees:
+            return
+        Attendance = self.env['ojt.attendance']
+        existing = {
+            (attendance.participant_id.id, attendance.event_link_id.id): attendance
+            for attendance in Attendance.search([
+                ('participant_id', 'in', attendees.participant_id.ids),
+                ('event_link_id', 'in', attendees.meeting_id.event_link_id.ids),
+            ])
+        }
+        to_create = []
+        to_update = []
+        for attendee in attendees:
+            key = (attendee.participant_id.id, attendee.meeting_id.event_link_id.id)
+            vals = {
+                'event_link_id': key[1],
+                'check_in': attendee.join_time,
+                'check_out': attendee.leave_time,
+                'presence': 'present' if attendee.attendance_status == 'present' else 'late',
+            }
+            attendance = existing.get(key)
+            if not attendance:
+                to_create.append(dict(vals, participant_id=key[0], method='online'))
+            elif attendance.method == 'online':
+                to_update.append((attendance, vals))
+
+        # late check-ins stay late on refresh, as create classifies them
+        Attendance._apply_late_rule([vals for _attendance, vals in to_update])
+        changed = [
+            (attendance, vals) for attendance, vals in to_update
+            if (attendance.check_in, attendance.check_out, attendance.presence)
+            != (vals['check_in'], vals['check_out'], vals['presence'])
+        ]
+        if changed:
+            self._write_attendance_changes(changed)
+        Attendance.create(to_create)
+
+    @api.model
+    def _write_attendance_changes(self, changes):
+        """Write ``[(attendance, vals)]`` check-in/check-out/presence changes
+        with one UPDATE, then refresh the matrix and KPIs like ``write``."""
+        Attendance = self.env['ojt.attendance']
+        attendances = Attendance.browse([attendance.id for attendance, _vals in changes])
+        attendances.flush_recordset()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ojt_attendance a
+               SET check_in = v.check_in,
+                   check_out = v.check_out,
+                   presence = v.presence,
+                   duration_minutes = CASE WHEN v.check_out IS NULL THEN 0
+                        ELSE GREATEST(EXTRACT(EPOCH FROM (v.check_out - v.check_in)) / 60, 0) END,
+                   write_uid = %(uid)s,
+                   write_date = %(now)s
+              FROM unnest(%(ids)s::int[], %(check_ins)s::timestamp[], %(check_outs)s::timestamp[],
+                          %(presences)s::varchar[]) AS v(id, check_in, check_out, presence)
+             WHERE a.id = v.id
+            """,
+            uid=self.env.uid, now=fields.Datetime.now(),
+            ids=[attendance.id for attendance, _vals in changes],
+            check_ins=[vals['check_in'] for _attendance, vals in changes],
+            check_outs=[vals['check_out'] or None for _attendance, vals in changes],
+            presences=[vals['presence'] for _attendance, vals in changes],
+        ))
+        attendances.invalidate_recordset()
+        Attendance._after_attendance_change(attendances._get_matrix_pairs())
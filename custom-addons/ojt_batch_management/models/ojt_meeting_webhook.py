@@ -0,0 +1,179 @@
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# position of the folding before the ``folded`` flag, migrated by init
+FOLDED_ID_PARAM = 'ojt_batch_management.meeting_webhook_folded_id'
+FOLD_BATCH_SIZE = 5000
+WEBHOOK_EVENT_RETENTION_DAYS = 7
+
+
+class OjtMeetingWebhookEvent(models.Model):
+    """Append-only staging table for join/leave events pushed by meeting
+    platforms. The webhook only inserts rows; ``_fold_pending`` turns them
+    into ``ojt.meeting.attendee`` records in the background and flags them
+    ``folded``."""
+    _name = 'ojt.meeting.webhook.event'
+    _description = 'OJT Meeting Webhook Event'
+    _order = 'id'
+    _log_access = False
+
+    platform = fields.Char(string='Platform', required=True, readonly=True)
+    meeting_ref = fields.Char(string='Meeting ID', required=True, readonly=True)
+    event_type = fields.Selection([
+        ('join', 'Join'),
+        ('leave', 'Leave'),
+    ], string='Event', required=True, readonly=True)
+    email = fields.Char(string='Email', readonly=True)
+    attendee_name = fields.Char(string='Name', readonly=True)
+    event_time = fields.Datetime(string='Event Time', required=True, readonly=True)
+    received_at = fields.Datetime(string='Received At', required=True, readonly=True)
+    folded = fields.Boolean(string='Folded', readonly=True, default=False)
+
+    def init(self):
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_meeting_webhook_event_meeting_idx "
+            "ON ojt_meeting_webhook_event (platform, meeting_ref)"
+        ))
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_meeting_webhook_event_pending_idx "
+            "ON ojt_meeting_webhook_event (id) WHERE NOT folded"
+        ))
+        Param = self.env['ir.config_parameter'].sudo()
+        folded_id = Param.get_param(FOLDED_ID_PARAM)
+        if folded_id:
+            self.env.cr.execute(SQL(
+                "UPDATE ojt_meeting_webhook_event SET folded = true WHERE id <= %s AND NOT folded",
+                int(folded_id),
+            ))
+            Param.set_param(FOLDED_ID_PARAM, False)
+
+    @api.model
+    def _append(self, platform, events):
+        """Insert normalized events with a single statement, no ORM."""
+        if not events:
+            return 0
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_meeting_webhook_event
+                   (platform, meeting_ref, event_type, email, attendee_name, event_time, received_at, folded)
+            SELECT %(platform)s, e.meeting_ref, e.event_type, e.email, e.attendee_name, e.event_time,
+                   now() AT TIME ZONE 'UTC', false
+              FROM unnest(%(meeting_refs)s::varchar[], %(event_types)s::varchar[], %(emails)s::varchar[],
+                          %(names)s::varchar[], %(times)s::timestamp[])
+                   AS e(meeting_ref, event_type, email, attendee_name, event_time)
+            """,
+            platform=platform,
+            meeting_refs=[event['meeting_ref'] for event in events],
+            event_types=[event['event_type'] for event in events],
+            emails=[event.get('email') for event in events],
+            names=[event.get('name') for event in events],
+            times=[event['event_time'] for event in events],
+        ))
+        return len(events)
+
+    # ---------------------------------------------------------
+    # FOLDING
+    # ---------------------------------------------------------
+    @api.model
+    def _fold_pending(self, limit=FOLD_BATCH_SIZE, auto_commit=False):
+        """Fold staged events into meeting attendees, ``limit`` rows at a time.
+
+        The join/leave events of every person touched by a batch are replayed
+        from the staging table into segments, so a leave arriving batches
+        after its join still closes the right interval. Unfolded rows are
+        picked by their ``folded`` flag, so a webhook transaction committing
+        late is folded by the next pass whatever its ids.
+        """
+        while True:
+            self.env.cr.execute(SQL(
+                """
+                SELECT array_agg(id), array_agg(DISTINCT platform || ' ' || meeting_ref)
+                  FROM (SELECT id, platform, meeting_ref
+                          FROM ojt_meeting_webhook_event
+                         WHERE NOT folded
+                         ORDER BY id
+                         LIMIT %(limit)s) pending
+                """,
+                limit=limit,
+            ))
+            event_ids, keys = self.env.cr.fetchone()
+            if not event_ids:
+                return
+            self._fold_events(event_ids, keys)
+            self.env.cr.execute(SQL(
+                "UPDATE ojt_meeting_webhook_event SET folded = true WHERE id = ANY(%s)", event_ids,
+            ))
+            self.invalidate_model(['folded'])
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _fold_events(self, event_ids, keys):
+        meetings = {}
+        for key in keys:
+            platform, meeting_ref = key.split(' ', 1)
+            meeting = self.env['ojt.meeting.attendance'].search([
+                ('platform', '=', platform), ('meeting_id', '=', meeting_ref),
+                ('state', '!=', 'cancelled'),
+            ], limit=1)
+            if meeting:
+                meetings[(platform, meeting_ref)] = meeting
+            else:
+                _logger.info("Webhook events for unknown %s meeting %s ignored", platform, meeting_ref)
+        if not meetings:
+            return
+
+        # every event so far of the people seen in ``event_ids``
+        self.env.cr.execute(SQL(
+            """
+            SELECT e.platform, e.meeting_ref, e.event_type, e.email, e.attendee_name, e.event_time
+              FROM ojt_meeting_webhook_event e
+              JOIN (SELECT DISTINCT platform, meeting_ref,
+                           COALESCE(lower(email), ''), COALESCE(attendee_name, '')
+                      FROM ojt_meeting_webhook_event
+                     WHERE id = ANY(%(event_ids)s)) touched(platform, meeting_ref, email, name)
+                ON touched.platform = e.platform AND touched.meeting_ref = e.meeting_ref
+               AND touched.email = COALESCE(lower(e.email), '') AND touched.name = COALESCE(e.attendee_name, '')
+             ORDER BY e.event_time, e.id
+            """,
+            event_ids=event_ids,
+        ))
+        people = {}
+        for platform, meeting_ref, event_type, email, name, event_time in self.env.cr.fetchall():
+            if (platform, meeting_ref) not in meetings:
+                continue
+            key = (platform, meeting_ref, (email or '').lower(), name or '')
+            person = people.setdefault(key, {'segments': [], 'open': None})
+            if event_type == 'join':
+                if person['open'] is None:
+                    person['open'] = event_time
+            elif person['open'] is not None:
+                person['segments'].append((person['open'], event_time))
+                person['open'] = None
+
+        segments_by_meeting = {}
+        for (platform, meeting_ref, email, name), person in people.items():
+            intervals = person['segments'] + ([(person['open'], None)] if person['open'] else [])
+            segments_by_meeting.setdefault((platform, meeting_ref), []).extend(
+                {'email': email or None, 'name': name, 'join_time': join, 'leave_time': leave}
+                for join, leave in intervals
+            )
+        Attendee = self.env['ojt.meeting.attendee']
+        for key, segments in segments_by_meeting.items():
+            Attendee._upsert_segments(meetings[key], segments)
+
+    @api.model
+    def _cron_fold_webhook_events(self):
+        self._fold_pending(auto_commit=True)
+
+    @api.autovacuum
+    def _gc_folded_events(self):
+        """Drop folded events once no late leave can refer to them anymore."""
+        cutoff = fields.Datetime.now() - timedelta(days=WEBHOOK_EVENT_RETENTION_DAYS)
+        self.env.cr.execute(SQL(
+            "DELETE FROM ojt_meeting_webhook_event WHERE folded AND received_at < %s", cutoff,
+        ))
@@ -1,6 +1,36 @@
 import uuid
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import SQL
+
+# Portal home counters served by ojt.participant._get_portal_counters
+PORTAL_COUNTERS = {
+    'ojt_count': SQL("""
+        (SELECT COUNT(*) FROM ojt_participant WHERE partner_id = me.partner_id)
+    """),
+    'meeting_count': SQL("""
+        (SELECT COUNT(*)
+           FROM ojt_meeting_attendance m
+           JOIN ojt_event_link l ON l.id = m.event_link_id
+          WHERE l.batch_id = me.batch_id
+            AND m.state IN ('scheduled', 'ongoing', 'completed'))
+    """),
+    'ojt_assignment_count': SQL("""
+        (SELECT COUNT(*)
+           FROM ojt_assignment a
+          WHERE a.batch_id = me.batch_id
+            AND a.state = 'open'
+            AND NOT EXISTS (SELECT 1 FROM ojt_assignment_submit s
+                             WHERE s.assignment_id = a.id AND s.participant_id = me.id))
+    """),
+    'ojt_attendance_count': SQL("""
+        (SELECT COUNT(*) FROM ojt_attendance WHERE participant_id = me.id)
+    """),
+    'ojt_certificate_count': SQL("""
+        (SELECT COUNT(*) FROM ojt_certificate
+          WHERE participant_id = me.id AND state = 'issued')
+    """),
+}
 
 
 class OjtParticipant(models.Model):
@@ -118,6 +148,12 @@ class OjtParticipant(models.Model):
                 record.score_avg = 0.0
                 record.score_final = record.mentor_score or 0.0
 
+    def _recompute_kpi_later(self):
+        """Mark the KPIs for recomputation after attendance changes, which
+        are not dependencies of ``_compute_kpi``."""
+        for fname in ('attendance_count', 'attendance_rate', 'score_avg', 'score_final'):
+            self.env.add_to_compute(self._fields[fname], self)
+
     # ---------------------------------------------------------
     # CREATE OVERRIDE
     # ---------------------------------------------------------
@@ -173,8 +209,15 @@ class OjtParticipant(models.Model):
                     'groups_id': [(6, 0, [group_portal.id])],
                 })
 
+        self.env['ojt.attendance.matrix']._refresh_members(participant_ids=record.ids)
         return record
 
+    def write(self, vals):
+        res = super().write(vals)
+        if 'batch_id' in vals:
+            self.env['ojt.attendance.matrix']._refresh_members(participant_ids=self.ids)
+        return res
+
     # ---------------------------------------------------------
     # ACTION METHODS
     # ---------------------------------------------------------
@@ -187,6 +230,37 @@ class OjtParticipant(models.Model):
     def action_left(self):
         self.write({'state': 'left'})
 
+    # ---------------------------------------------------------
+    # PORTAL HELPERS
+    # ---------------------------------------------------------
+    @api.model
+    def _get_portal_counters(self, partner, counters):
+        """Return the OJT portal home counters asked for in ``counters``
+        for ``partner``, computed in one aggregated query."""
+        wanted = [name for name in counters if name in PORTAL_COUNTERS]
+        if not wanted or not partner:
+            return {}
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT %s
+              FROM (SELECT %s::int AS partner_id) AS who
+              LEFT JOIN LATERAL (
+                    SELECT id, batch_id, partner_id
+                      FROM ojt_participant
+                     WHERE partner_id = who.partner_id
+                     ORDER BY id DESC
+                     LIMIT 1
+              ) AS me ON TRUE
+            """,
+            SQL(", ").join(
+                SQL("COALESCE(%s, 0) AS %s", PORTAL_COUNTERS[name], SQL.identifier(name))
+                for name in wanted
+            ),
+            partner.id,
+        ))
+        return self.env.cr.dictfetchone()
+
     def get_portal_url(self):
         """Get portal URL for the participant"""
         self.ensure_one()
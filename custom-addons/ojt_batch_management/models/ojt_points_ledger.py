@@ -0,0 +1,180 @@
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+
+class OjtPointsLedger(models.Model):
+    """Append-only journal of the points of participants.
+
+    Every award, revocation and change of a badge's points adds entries;
+    nothing is ever rewritten. Each posting also updates, by delta, the
+    daily and weekly buckets of ``ojt.points.bucket`` and the all-time
+    ``ojt.participant.total_points``, so point trends and leaderboards are
+    read from the aggregates instead of the awards.
+    """
+    _name = 'ojt.points.ledger'
+    _description = 'OJT Points Ledger'
+    _order = 'date desc, id desc'
+
+    participant_id = fields.Many2one('ojt.participant', string='Participant', required=True,
+                                     readonly=True, index=True, ondelete='cascade')
+    batch_id = fields.Many2one('ojt.batch', string='Batch', required=True, readonly=True,
+                               index=True, ondelete='cascade')
+    badge_id = fields.Many2one('ojt.gamification', string='Badge', readonly=True, ondelete='set null')
+    award_id = fields.Many2one('ojt.badge.award', string='Award', readonly=True, ondelete='set null')
+    date = fields.Date(string='Date', required=True, readonly=True)
+    points = fields.Integer(string='Points', required=True, readonly=True, aggregator='sum')
+    reason = fields.Selection([
+        ('award', 'Badge Awarded'),
+        ('revoke', 'Badge Revoked'),
+        ('adjust', 'Badge Points Changed'),
+    ], string='Reason', required=True, readonly=True)
+
+    def init(self):
+        # ledger of the awards that predate it
+        self.env.cr.execute(SQL("SELECT 1 FROM ojt_points_ledger LIMIT 1"))
+        if self.env.cr.fetchone():
+            return
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_points_ledger (participant_id, batch_id, badge_id, award_id, date, points, reason,
+                                           create_uid, create_date, write_uid, write_date)
+            SELECT a.participant_id, p.batch_id, a.badge_id, a.id,
+                   COALESCE(a.awarded_date, a.create_date::date), g.points, 'award',
+                   %(uid)s, now() AT TIME ZONE 'UTC', %(uid)s, now() AT TIME ZONE 'UTC'
+              FROM ojt_badge_award a
+              JOIN ojt_participant p ON p.id = a.participant_id
+              JOIN ojt_gamification g ON g.id = a.badge_id
+             WHERE p.batch_id IS NOT NULL AND COALESCE(g.points, 0) != 0
+            """,
+            uid=self.env.uid,
+        ))
+        self._rebuild()
+
+    def write(self, vals):
+        raise UserError(_('Points ledger entries cannot be modified, post a correcting entry instead.'))
+
+    @api.model
+    def _post(self, entries):
+        """Append ``entries`` (``create`` values) and update the aggregates."""
+        entries = [entry for entry in entries if entry.get('points')]
+        if not entries:
+            return self
+        lines = self.sudo().create(entries)
+        self.env['ojt.points.bucket']._add(lines)
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ojt_participant p
+               SET total_points = COALESCE(p.total_points, 0) + d.delta
+              FROM (SELECT participant_id, sum(delta) AS delta
+                      FROM unnest(%s::int[], %s::int[]) AS e(participant_id, delta)
+                     GROUP BY participant_id) d
+             WHERE p.id = d.participant_id
+            """,
+            [line.participant_id.id for line in lines],
+            [line.points for line in lines],
+        ))
+        self.env['ojt.participant'].invalidate_model(['total_points'])
+        self.env['ojt.leaderboard']._refresh(lines.batch_id.ids)
+        return lines
+
+    @api.model
+    def _award_entries(self, awards, reason, sign=1, points=None, on_award_date=None):
+        """Entries for ``awards``, with the badge points unless ``points``
+        (``{award_id: points}``) is given. Awards are dated on their award
+        date and other entries today, unless ``on_award_date`` says otherwise."""
+        today = fields.Date.context_today(self)
+        if on_award_date is None:
+            on_award_date = reason == 'award'
+        return [{
+            'participant_id': award.participant_id.id,
+            'batch_id': award.participant_id.batch_id.id,
+            'badge_id': award.badge_id.id,
+            'award_id': award.id,
+            'date': (award.awarded_date or today) if on_award_date else today,
+            'points': sign * (points[award.id] if points is not None else award.badge_id.points),
+            'reason': reason,
+        } for award in awards if award.participant_id.batch_id]
+
+    @api.model
+    def _rebuild(self):
+        """Recompute every aggregate from the ledger."""
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM ojt_points_bucket;
+            INSERT INTO ojt_points_bucket (batch_id, participant_id, period, period_start, points)
+            SELECT batch_id, participant_id, 'day', date, sum(points)
+              FROM ojt_points_ledger
+             GROUP BY batch_id, participant_id, date
+            UNION ALL
+            SELECT batch_id, participant_id, 'week', date_trunc('week', date)::date, sum(points)
+              FROM ojt_points_ledger
+             GROUP BY batch_id, participant_id, date_trunc('week', date);
+            UPDATE ojt_participant p
+               SET total_points = COALESCE(
+                       (SELECT sum(points) FROM ojt_points_ledger l WHERE l.participant_id = p.id), 0)
+            """
+        ))
+        self.env['ojt.points.bucket'].invalidate_model()
+        self.env['ojt.participant'].invalidate_model(['total_points'])
+        self.env['ojt.leaderboard']._refresh()
+
+
+class OjtPointsBucket(models.Model):
+    """Points of a participant per day and per week (weeks start on Monday)."""
+    _name = 'ojt.points.bucket'
+    _description = 'OJT Points Bucket'
+    _order = 'period_start desc, batch_id, participant_id'
+    _log_access = False
+
+    batch_id = fields.Many2one('ojt.batch', string='Batch', required=True, readonly=True,
+                               ondelete='cascade')
+    participant_id = fields.Many2one('ojt.participant', string='Participant', required=True,
+                                     readonly=True, ondelete='cascade')
+    period = fields.Selection([
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ], string='Period', required=True, readonly=True)
+    period_start = fields.Date(string='Period Start', required=True, readonly=True)
+    points = fields.Integer(string='Points', readonly=True, aggregator='sum')
+
+    _sql_constraints = [
+        ('unique_bucket', 'unique(batch_id, participant_id, period, period_start)',
+         'Points bucket must be unique per batch, participant and period!'),
+    ]
+
+    def init(self):
+        self.env.cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_points_bucket_batch_period_idx "
+            "ON ojt_points_bucket (batch_id, period, period_start)"
+        ))
+
+    @api.model
+    def _add(self, lines):
+        """Add ledger ``lines`` to their day and week buckets. Buckets are
+        per batch: points stay with the batch they were earned in, so a
+        participant moved to another batch starts new buckets there."""
+        deltas = {}
+        for line in lines:
+            for period, start in (('day', line.date), ('week', line.date - timedelta(days=line.date.weekday()))):
+                key = (line.batch_id.id, line.participant_id.id, period, start)
+                deltas[key] = deltas.get(key, 0) + line.points
+        keys = sorted(deltas)
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_points_bucket (batch_id, participant_id, period, period_start, points)
+            SELECT * FROM unnest(%(batch_ids)s::int[], %(participant_ids)s::int[], %(periods)s::varchar[],
+                                 %(starts)s::date[], %(points)s::int[])
+            ON CONFLICT (batch_id, participant_id, period, period_start) DO UPDATE SET
+                points = ojt_points_bucket.points + EXCLUDED.points
+            """,
+            batch_ids=[key[0] for key in keys],
+            participant_ids=[key[1] for key in keys],
+            periods=[key[2] for key in keys],
+            starts=[key[3] for key in keys],
+            points=[deltas[key] for key in keys],
+        ))
+        self.invalidate_model()
@@ -1,10 +1,44 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.tools import SQL, sql
+from odoo.tools.image import image_process
 import json
 import base64
+import binascii
+import logging
+import os
+import time
 from datetime import datetime, timedelta
 
+
+_logger = logging.getLogger(__name__)
+
+MAX_INGEST_EVENTS = 500
+# snapshots per ingest call, and default cap of the whole request body
+MAX_INGEST_SNAPSHOTS = 5
+DEFAULT_INGEST_MAX_REQUEST_MB = 16
+# sessions with more participants get their penalties applied in the background
+PROCESS_VIOLATIONS_SYNC_LIMIT = 200
+MAX_SNAPSHOT_SIZE = 2 * 1024 * 1024  # 2 MB, decoded
+SNAPSHOT_BATCH_SIZE = 200
+SPOOL_ORPHAN_SECONDS = 3600
+SNAPSHOT_MAX_SIZE = (1280, 1280)
+SNAPSHOT_QUALITY = 70
+THUMBNAIL_SIZE = (256, 256)
+DEFAULT_SNAPSHOT_RETENTION_DAYS = 30
+# ojt_proctoring_log is range-partitioned on session_id, this many sessions per partition
+LOG_PARTITION_SESSIONS = 50
+LOG_PARTITION_PREFIX = 'ojt_proctoring_log_p'
+# partitions are created this many blocks ahead of the last session
+LOG_PARTITIONS_AHEAD = 2
+# catches logs of sessions without a range partition (e.g. archived ranges)
+LOG_DEFAULT_PARTITION = 'ojt_proctoring_log_default'
+# violations of a participant closer than this to the previous one raise no new toast
+VIOLATION_ALERT_WINDOW = 60
+# bus channel of the live tally of a session, see ir.websocket
+PROCTORING_CHANNEL_PREFIX = 'ojt.quiz.proctoring_'
+
 class OjtQuizProctoring(models.Model):
     _name = 'ojt.quiz.proctoring'
     _description = 'OJT Quiz Proctoring'
@@ -32,8 +66,16 @@ class OjtQuizProctoring(models.Model):
     webcam_required = fields.Boolean(string='Webcam Required', default=True)
     screenshot_interval = fields.Integer(string='Screenshot Interval (seconds)', default=60)
     browser_lock = fields.Boolean(string='Enable Browser Lock', default=False)
-    violation_count = fields.Integer(compute='_compute_violations', store=True)
+    violation_count = fields.Integer(string='Violations', readonly=True, copy=False, default=0,
+                                     help='Maintained by delta from the proctoring logs')
+    violation_count_ids = fields.One2many('ojt.proctoring.violation.count', 'session_id',
+                                          string='Violations per Participant')
     session_logs = fields.One2many('ojt.proctoring.log', 'session_id', string='Session Logs')
+    penalty_state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Applied'),
+    ], string='Violation Penalties', readonly=True, copy=False,
+        help='Violation penalties are applied once, when the session ends')
 
     @api.model
     def create(self, vals):
@@ -66,29 +108,95 @@ class OjtQuizProctoring(models.Model):
         self._process_violations()
 
     def _process_violations(self):
-        """Process violations and adjust scores if necessary"""
-        for participant in self.participant_ids:
-            violations = self.env['ojt.proctoring.log'].search_count([
-                ('session_id', '=', self.id),
-                ('participant_id', '=', participant.id),
-                ('violation_type', '!=', False)
-            ])
-            if violations > 0:
-                # Adjust score based on violations
-                survey_response = self.env['survey.user_input'].search([
-                    ('survey_id', '=', self.survey_id.id),
-                    ('partner_id', '=', participant.partner_id.id)
-                ], limit=1)
-                if survey_response:
-                    penalty = min(violations * 5, 100)  # 5% penalty per violation, max 100%
-                    new_score = survey_response.scoring_percentage * (100 - penalty) / 100
-                    survey_response.write({'scoring_percentage': new_score})
-
-    @api.depends('session_logs.violation_type')
-    def _compute_violations(self):
-        """Compute the number of violations in the session"""
-        for record in self:
-            record.violation_count = len(record.session_logs.filtered(lambda l: l.violation_type))
+        """Process violations and adjust scores if necessary.
+
+        Large sessions are queued for the background job instead of keeping
+        the proctor waiting.
+        """
+        large = self.filtered(lambda s: len(s.participant_ids) > PROCESS_VIOLATIONS_SYNC_LIMIT)
+        if large:
+            large.write({'penalty_state': 'pending'})
+            self.env.ref('ojt_batch_management.ir_cron_process_proctoring_violations')._trigger()
+        (self - large)._apply_violation_penalties()
+
+    def _apply_violation_penalties(self):
+        """Apply the violation penalty of every participant from the violation
+        counters, with one survey input search and one UPDATE per session."""
+        for session in self.filtered(lambda s: s.penalty_state != 'done'):
+            counts = {
+                participant.id: count
+                for participant, count in self.env['ojt.proctoring.violation.count']._read_group(
+                    [('session_id', '=', session.id),
+                     ('participant_id', 'in', session.participant_ids.ids)],
+                    ['participant_id'], ['violation_count:sum'])
+            }
+            partner_violations = {
+                participant.partner_id.id: counts[participant.id]
+                for participant in session.participant_ids if counts.get(participant.id)
+            }
+            penalties = {}
+            if partner_violations:
+                # first input of each partner, in the default user_input order
+                for user_input in self.env['survey.user_input'].search([
+                    ('survey_id', '=', session.survey_id.id),
+                    ('partner_id', 'in', list(partner_violations)),
+                ]):
+                    if user_input.partner_id.id not in penalties:
+                        # 5% penalty per violation, max 100%
+                        penalty = min(partner_violations[user_input.partner_id.id] * 5, 100)
+                        penalties[user_input.partner_id.id] = (user_input.id, penalty)
+            if penalties:
+                self.env.flush_all()
+                self.env.cr.execute(SQL(
+                    """
+                    UPDATE survey_user_input u
+                       SET scoring_percentage = u.scoring_percentage * (100 - p.penalty) / 100
+                      FROM unnest(%s::int[], %s::float[]) AS p(id, penalty)
+                     WHERE u.id = p.id
+                    """,
+                    [value[0] for value in penalties.values()],
+                    [value[1] for value in penalties.values()],
+                ))
+                self.env['survey.user_input'].invalidate_model(['scoring_percentage'])
+            session.penalty_state = 'done'
+
+    @api.model
+    def _cron_process_violations(self):
+        """Background run of the penalties queued by ``_process_violations``."""
+        for session in self.search([('penalty_state', '=', 'pending')]):
+            session._apply_violation_penalties()
+            self.env.cr.commit()
+
+    def action_view_violation_counts(self):
+        self.ensure_one()
+        action = self.env['ir.actions.act_window']._for_xml_id(
+            'ojt_batch_management.action_ojt_proctoring_violation_count')
+        action['domain'] = [('session_id', '=', self.id)]
+        action['context'] = {'search_default_group_participant': 1}
+        return action
+
+    def get_violation_tally(self):
+        """State of the live violation tally of the session form, reloaded
+        client side on the ``ojt.proctoring/violations`` bus messages of
+        ``ojt.proctoring.log._stream_violations``."""
+        self.ensure_one()
+        tally = {}
+        for counter in self.violation_count_ids:
+            row = tally.setdefault(counter.participant_id.id, {
+                'participant_id': counter.participant_id.id,
+                'participant_name': counter.participant_id.name,
+                'counts': {},
+                'last_time': False,
+            })
+            row['counts'][counter.violation_type] = counter.violation_count
+            if counter.last_violation and (not row['last_time'] or counter.last_violation > row['last_time']):
+                row['last_time'] = counter.last_violation
+        for row in tally.values():
+            row['last_time'] = fields.Datetime.to_string(row['last_time'])
+        return {
+            'labels': dict(self.env['ojt.proctoring.log']._fields['violation_type']._description_selection(self.env)),
+            'rows': list(tally.values()),
+        }
 
 class OjtProctoringLog(models.Model):
     _name = 'ojt.proctoring.log'
@@ -113,17 +221,761 @@ class OjtProctoringLog(models.Model):
         ('copy_paste', 'Copy-Paste Detected')
     ], string='Violation Type')
     snapshot = fields.Binary(string='Snapshot', attachment=True)
+    snapshot_pending = fields.Boolean(string='Snapshot Pending', readonly=True,
+                                      help='Snapshot received and waiting to be stored')
+    snapshot_thumbnail = fields.Image(string='Thumbnail', attachment=True, readonly=True)
+    snapshot_compressed = fields.Boolean(string='Snapshot Compressed', readonly=True, default=False)
+    snapshot_deduplicated = fields.Boolean(string='Snapshot Deduplicated', readonly=True, default=False)
     details = fields.Text(string='Event Details')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        logs = super().create(vals_list)
+        logs._count_violations(1)
+        return logs
+
+    def write(self, vals):
+        counted = {'session_id', 'participant_id', 'violation_type'} & set(vals)
+        if counted:
+            self._count_violations(-1)
+        res = super().write(vals)
+        if counted:
+            self._count_violations(1)
+        return res
+
+    def unlink(self):
+        self._count_violations(-1)
+        return super().unlink()
+
+    def _count_violations(self, sign):
+        self.env['ojt.proctoring.violation.count']._add_counts([
+            (log.session_id.id, log.participant_id.id, log.violation_type, sign, log.timestamp)
+            for log in self if log.violation_type
+        ])
+
     def record_violation(self, violation_type, details=None):
-        """Record a proctoring violation"""
-        self.create({
+        """Record a proctoring violation for the session and participant of this log"""
+        self.ensure_one()
+        log = self.create({
+            'session_id': self.session_id.id,
+            'participant_id': self.participant_id.id,
             'event_type': 'violation',
             'violation_type': violation_type,
             'details': details
         })
-        # Notify proctor in real-time
-        self.session_id.proctor_id.notify_info(
-            message=f'Violation detected: {violation_type}',
-            title='Proctoring Alert'
-        )
\ No newline at end of file
+        self._stream_violations(self.session_id, self.participant_id, [(log.timestamp, violation_type)])
+        return log
+
+    @api.model
+    def _stream_violations(self, session, participant, violations):
+        """Push new violations of one participant to the session form.
+
+        ``violations`` is a list of ``(timestamp, violation_type)``, sent as a
+        single ``ojt.proctoring/violations`` message on the bus channel of the
+        session, which every user allowed to read the session may listen to,
+        and that refreshes the live tally of the session form. The session
+        proctor also gets a toast, only when the participant had no violation
+        in the ``VIOLATION_ALERT_WINDOW`` seconds before, so a burst of
+        violations raises one alert.
+        """
+        if not violations:
+            return
+        counts = {}
+        for _timestamp, violation_type in violations:
+            counts[violation_type] = counts.get(violation_type, 0) + 1
+        first = min(timestamp for timestamp, _violation_type in violations)
+        self.env['bus.bus']._sendone(session, 'ojt.proctoring/violations', {
+            'session_id': session.id,
+            'participant_id': participant.id,
+            'participant_name': participant.name,
+            'counts': counts,
+            'last_time': fields.Datetime.to_string(max(timestamp for timestamp, _type in violations)),
+        })
+        proctor = session.proctor_id
+        if not proctor:
+            return
+
+        self.env.flush_all()
+        self.env.cr.execute(SQL(
+            """
+            SELECT 1
+              FROM ojt_proctoring_log
+             WHERE session_id = %(session_id)s AND participant_id = %(participant_id)s
+               AND violation_type IS NOT NULL
+               AND timestamp < %(first)s AND timestamp >= %(first)s - make_interval(secs => %(window)s)
+             LIMIT 1
+            """,
+            session_id=session.id, participant_id=participant.id, first=first, window=VIOLATION_ALERT_WINDOW,
+        ))
+        if self.env.cr.fetchone():
+            return
+        labels = dict(self._fields['violation_type']._description_selection(self.env))
+        proctor._bus_send('simple_notification', {
+            'type': 'warning',
+            'title': _('Proctoring Alert: %s', session.name),
+            'message': _('%(participant)s: %(violations)s', participant=participant.name, violations=', '.join(
+                f'{labels.get(violation_type, violation_type)} x{count}' if count > 1
+                else labels.get(violation_type, violation_type)
+                for violation_type, count in counts.items()
+            )),
+        })
+
+    # ---------------------------------------------------------
+    # BATCHED INGESTION
+    # ---------------------------------------------------------
+    @api.model
+    def _ingest_max_request_size(self):
+        """Maximum size (bytes) of an ingest call, configurable through the
+        ``ojt_batch_management.proctoring_max_request_mb`` system parameter,
+        0 disables the limit."""
+        value = self.env['ir.config_parameter'].sudo().get_param(
+            'ojt_batch_management.proctoring_max_request_mb', DEFAULT_INGEST_MAX_REQUEST_MB)
+        try:
+            return int(float(value) * 1024 * 1024)
+        except (TypeError, ValueError):
+            return DEFAULT_INGEST_MAX_REQUEST_MB * 1024 * 1024
+
+    @api.model
+    def _ingest_events(self, session, participant, events):
+        """Store a batch of client events of one participant.
+
+        ``events`` are dicts with ``event_type``, ``timestamp`` (ISO 8601),
+        optional ``violation_type``, ``details`` and ``snapshot`` (base64).
+        Rows are inserted with one statement; snapshots are only spooled to
+        disk here and attached by ``_cron_store_snapshots``, outside the
+        request.
+
+        Returns ``{'accepted': n, 'rejected': [indexes]}``.
+        """
+        event_types = dict(self._fields['event_type'].selection)
+        violation_types = dict(self._fields['violation_type'].selection)
+        Attendance = self.env['ojt.attendance']
+        rows, snapshots, rejected = [], {}, []
+        for index, event in enumerate(events):
+            if not isinstance(event, dict):
+                rejected.append(index)
+                continue
+            timestamp = Attendance._parse_scanned_at(event.get('timestamp'))
+            violation_type = event.get('violation_type') or None
+            if event.get('event_type') not in event_types or not timestamp \
+                    or (violation_type and violation_type not in violation_types):
+                rejected.append(index)
+                continue
+            if event.get('snapshot'):
+                try:
+                    snapshot = base64.b64decode(event['snapshot'], validate=True)
+                except (binascii.Error, TypeError, ValueError):
+                    rejected.append(index)
+                    continue
+                if len(snapshot) > MAX_SNAPSHOT_SIZE:
+                    rejected.append(index)
+                    continue
+                snapshots[len(rows)] = snapshot
+            rows.append((timestamp, event['event_type'], violation_type,
+                         str(event['details']) if event.get('details') else None))
+        if not rows:
+            return {'accepted': 0, 'rejected': rejected}
+
+        now = fields.Datetime.now()
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_proctoring_log (
+                session_id, participant_id, timestamp, event_type, violation_type, details,
+                snapshot_pending, create_uid, create_date, write_uid, write_date
+            )
+            SELECT %(session_id)s, %(participant_id)s, e.timestamp, e.event_type, e.violation_type,
+                   e.details, e.pending, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(timestamps)s::timestamp[], %(event_types)s::varchar[],
+                          %(violation_types)s::varchar[], %(details)s::text[], %(pending)s::bool[])
+                   WITH ORDINALITY AS e(timestamp, event_type, violation_type, details, pending, ord)
+             ORDER BY e.ord
+            RETURNING id
+            """,
+            session_id=session.id, participant_id=participant.id, uid=self.env.uid, now=now,
+            timestamps=[row[0] for row in rows],
+            event_types=[row[1] for row in rows],
+            violation_types=[row[2] for row in rows],
+            details=[row[3] for row in rows],
+            pending=[index in snapshots for index in range(len(rows))],
+        ))
+        # ids come from the sequence in insertion (ordinality) order
+        log_ids = sorted(row[0] for row in self.env.cr.fetchall())
+        for index, snapshot in snapshots.items():
+            self._spool_snapshot(log_ids[index], snapshot)
+
+        self.invalidate_model()
+        session.invalidate_recordset(['session_logs'])
+        violations = [(row[0], row[2]) for row in rows if row[2]]
+        if violations:
+            self.env['ojt.proctoring.violation.count']._add_counts([
+                (session.id, participant.id, violation_type, 1, timestamp)
+                for timestamp, violation_type in violations
+            ])
+            self._stream_violations(session, participant, violations)
+        return {'accepted': len(rows), 'rejected': rejected}
+
+    @api.model
+    def _spool_dir(self):
+        return os.path.join(self.env['ir.attachment']._filestore(), 'ojt_proctoring_spool')
+
+    @api.model
+    def _spool_snapshot(self, log_id, snapshot):
+        spool_dir = self._spool_dir()
+        os.makedirs(spool_dir, exist_ok=True)
+        tmp_path = os.path.join(spool_dir, f'.{log_id}.tmp')
+        with open(tmp_path, 'wb') as fp:
+            fp.write(snapshot)
+        os.replace(tmp_path, os.path.join(spool_dir, str(log_id)))
+
+    @api.model
+    def _cron_store_snapshots(self, limit=SNAPSHOT_BATCH_SIZE):
+        """Attach spooled snapshots to their logs, ``limit`` at a time."""
+        spool_dir = self._spool_dir()
+        while True:
+            self.env.cr.execute(SQL(
+                "SELECT id FROM ojt_proctoring_log WHERE snapshot_pending ORDER BY id LIMIT %s", limit,
+            ))
+            log_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not log_ids:
+                break
+            vals_list, paths = [], []
+            for log_id in log_ids:
+                path = os.path.join(spool_dir, str(log_id))
+                try:
+                    with open(path, 'rb') as fp:
+                        raw = fp.read()
+                except FileNotFoundError:
+                    _logger.warning("Spooled snapshot of proctoring log %s is missing", log_id)
+                    continue
+                paths.append(path)
+                compact, thumbnail = self._compress_snapshot(raw)
+                vals_list += self._snapshot_attachment_values(log_id, compact, thumbnail)
+            self.env['ir.attachment'].sudo().create(vals_list)
+            self.env.cr.execute(SQL(
+                "UPDATE ojt_proctoring_log SET snapshot_pending = false, snapshot_compressed = true "
+                "WHERE id = ANY(%s)", log_ids,
+            ))
+            self.invalidate_model(['snapshot', 'snapshot_thumbnail', 'snapshot_pending', 'snapshot_compressed'])
+            self.env.cr.commit()
+            for path in paths:
+                os.unlink(path)
+
+        # files of rolled back ingestions
+        if os.path.isdir(spool_dir):
+            cutoff = time.time() - SPOOL_ORPHAN_SECONDS
+            names = [name for name in os.listdir(spool_dir)
+                     if os.path.getmtime(os.path.join(spool_dir, name)) < cutoff]
+            self.env.cr.execute(SQL(
+                "SELECT id FROM ojt_proctoring_log WHERE snapshot_pending AND id = ANY(%s)",
+                [int(name) for name in names if name.isdigit()],
+            ))
+            pending = {str(row[0]) for row in self.env.cr.fetchall()}
+            for name in names:
+                if name not in pending:
+                    os.unlink(os.path.join(spool_dir, name))
+
+    # ---------------------------------------------------------
+    # SNAPSHOT PIPELINE
+    # ---------------------------------------------------------
+    @api.model
+    def _compress_snapshot(self, raw):
+        """Return ``(compact, thumbnail)``: the capture re-encoded as a bounded
+        JPEG, and a small JPEG for the review lists. Unreadable images are
+        kept as they are, without thumbnail."""
+        try:
+            compact = image_process(raw, size=SNAPSHOT_MAX_SIZE, quality=SNAPSHOT_QUALITY, output_format='JPEG')
+            thumbnail = image_process(raw, size=THUMBNAIL_SIZE, quality=SNAPSHOT_QUALITY, output_format='JPEG')
+        except UserError:
+            return raw, None
+        # a capture that is already compact stays as it was
+        return (compact if len(compact) < len(raw) else raw), thumbnail
+
+    @api.model
+    def _snapshot_attachment_values(self, log_id, snapshot, thumbnail):
+        vals_list = [{
+            'name': 'snapshot',
+            'res_model': self._name,
+            'res_field': 'snapshot',
+            'res_id': log_id,
+            'raw': snapshot,
+        }]
+        if thumbnail:
+            vals_list.append(dict(vals_list[0], name='snapshot_thumbnail',
+                                  res_field='snapshot_thumbnail', raw=thumbnail))
+        return vals_list
+
+    @api.model
+    def _snapshot_attachments(self, where, limit):
+        """Snapshot attachments of logs matching ``where`` (SQL on ``l``)."""
+        self.env.cr.execute(SQL(
+            """
+            SELECT a.id
+              FROM ir_attachment a
+              JOIN ojt_proctoring_log l ON l.id = a.res_id
+             WHERE a.res_model = %(model)s AND a.res_field = 'snapshot' AND %(where)s
+             ORDER BY a.id
+             LIMIT %(limit)s
+            """,
+            model=self._name, where=where, limit=limit,
+        ))
+        return self.env['ir.attachment'].sudo().browse([row[0] for row in self.env.cr.fetchall()])
+
+    @api.model
+    def _cron_process_snapshots(self, limit=SNAPSHOT_BATCH_SIZE):
+        """Compress, deduplicate and expire snapshots in chunks of ``limit``.
+
+        - captures stored before compression existed are re-encoded and get
+          a thumbnail;
+        - a snapshot identical to the previous one of the same participant
+          (static screen, covered webcam) is dropped; each snapshot is
+          checked once, after its compression;
+        - snapshots older than ``ojt_batch_management.snapshot_retention_days``
+          are dropped, their thumbnail stays.
+
+        Snapshots of logs with a ``violation_type`` are never dropped.
+        Returns the number of bytes reclaimed, which is also logged.
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        reclaimed = 0
+
+        # 1. compression backlog
+        while True:
+            attachments = self._snapshot_attachments(SQL("NOT COALESCE(l.snapshot_compressed, false)"), limit)
+            if not attachments:
+                break
+            old_thumbnails = Attachment.search([
+                ('res_model', '=', self._name), ('res_field', '=', 'snapshot_thumbnail'),
+                ('res_id', 'in', attachments.mapped('res_id')),
+            ])
+            compressed, thumbnails = [], []
+            for attachment in attachments:
+                raw = attachment.raw
+                compact, thumbnail = self._compress_snapshot(raw)
+                if compact is not raw:
+                    compressed.append((attachment, compact))
+                if thumbnail:
+                    thumbnails += self._snapshot_attachment_values(attachment.res_id, compact, thumbnail)[1:]
+            replaced = self._blob_sizes(old_thumbnails) | self._blob_sizes(
+                Attachment.browse([attachment.id for attachment, _compact in compressed]))
+            added = self._new_blob_size([compact for _attachment, compact in compressed]
+                                        + [vals['raw'] for vals in thumbnails])
+            for attachment, compact in compressed:
+                attachment.write({'raw': compact})
+            old_thumbnails.unlink()
+            Attachment.create(thumbnails)
+            self.env.cr.execute(SQL(
+                "UPDATE ojt_proctoring_log SET snapshot_compressed = true WHERE id = ANY(%s)",
+                attachments.mapped('res_id'),
+            ))
+            reclaimed += self._freed_size(replaced) - added
+            self.invalidate_model(['snapshot', 'snapshot_thumbnail', 'snapshot_compressed'])
+            self.env.cr.commit()
+
+        # 2. consecutive duplicates of unflagged captures, each snapshot is
+        # compared once, with the previous one of its participant
+        while True:
+            self.env.cr.execute(SQL(
+                """
+                SELECT l.id, a.id, l.violation_type IS NULL AND a.checksum = (
+                           SELECT pa.checksum
+                             FROM ojt_proctoring_log p
+                             JOIN ir_attachment pa ON pa.res_model = %(model)s AND pa.res_field = 'snapshot'
+                                                  AND pa.res_id = p.id
+                            WHERE p.session_id = l.session_id AND p.participant_id = l.participant_id
+                              AND p.event_type IS NOT DISTINCT FROM l.event_type
+                              AND (p.timestamp, p.id) < (l.timestamp, l.id)
+                            ORDER BY p.timestamp DESC, p.id DESC
+                            LIMIT 1)
+                  FROM ojt_proctoring_log l
+                  JOIN ir_attachment a ON a.res_model = %(model)s AND a.res_field = 'snapshot' AND a.res_id = l.id
+                 WHERE l.snapshot_compressed AND NOT COALESCE(l.snapshot_deduplicated, false)
+                 ORDER BY l.id
+                 LIMIT %(limit)s
+                """,
+                model=self._name, limit=limit,
+            ))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            duplicates = Attachment.browse([attachment_id for _log_id, attachment_id, repeated in rows if repeated])
+            # duplicates share the blob of the capture they repeat, which
+            # usually stays: only what the filestore GC can drop is counted
+            blobs = self._blob_sizes(duplicates)
+            duplicates.unlink()
+            self.env.cr.execute(SQL(
+                "UPDATE ojt_proctoring_log SET snapshot_deduplicated = true WHERE id = ANY(%s)",
+                [log_id for log_id, _attachment_id, _repeated in rows],
+            ))
+            reclaimed += self._freed_size(blobs)
+            self.invalidate_model(['snapshot', 'snapshot_deduplicated'])
+            self.env.cr.commit()
+
+        # 3. retention of unflagged captures
+        retention_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            'ojt_batch_management.snapshot_retention_days', DEFAULT_SNAPSHOT_RETENTION_DAYS))
+        if retention_days > 0:
+            cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+            while True:
+                attachments = self._snapshot_attachments(
+                    SQL("l.violation_type IS NULL AND l.timestamp < %s", cutoff), limit)
+                if not attachments:
+                    break
+                blobs = self._blob_sizes(attachments)
+                attachments.unlink()
+                reclaimed += self._freed_size(blobs)
+                self.env.cr.commit()
+
+        _logger.info("Proctoring snapshot pipeline reclaimed %.1f MB", reclaimed / (1024 * 1024))
+        return reclaimed
+
+    @api.model
+    def _blob_sizes(self, attachments):
+        """``{blob: size}`` of attachments, a blob being a filestore file (shared
+        by identical contents) or the database content of one attachment."""
+        return {
+            attachment.store_fname or ('db', attachment.id): attachment.file_size or 0
+            for attachment in attachments
+        }
+
+    @api.model
+    def _freed_size(self, blobs):
+        """Bytes freed once the attachments of ``blobs`` are gone or rewritten:
+        filestore files still referenced by another attachment are kept by
+        ``_gc_file_store`` and do not count."""
+        fnames = [blob for blob in blobs if isinstance(blob, str)]
+        kept = set()
+        if fnames:
+            self.env['ir.attachment'].flush_model(['store_fname'])
+            self.env.cr.execute(SQL(
+                "SELECT DISTINCT store_fname FROM ir_attachment WHERE store_fname = ANY(%s)", fnames,
+            ))
+            kept = {row[0] for row in self.env.cr.fetchall()}
+        return sum(size for blob, size in blobs.items() if blob not in kept)
+
+    @api.model
+    def _new_blob_size(self, contents):
+        """Bytes added by storing ``contents``; contents already in the
+        filestore are shared and add nothing."""
+        Attachment = self.env['ir.attachment']
+        sizes = {Attachment._compute_checksum(content): len(content) for content in contents}
+        if not sizes:
+            return 0
+        if Attachment._storage() != 'file':
+            return sum(len(content) for content in contents)
+        self.env.cr.execute(SQL(
+            "SELECT DISTINCT checksum FROM ir_attachment WHERE checksum = ANY(%s) AND store_fname IS NOT NULL",
+            list(sizes),
+        ))
+        stored = {row[0] for row in self.env.cr.fetchall()}
+        return sum(size for checksum, size in sizes.items() if checksum not in stored)
+
+    # ---------------------------------------------------------
+    # PARTITIONING
+    # ---------------------------------------------------------
+    def init(self):
+        """Keep ``ojt_proctoring_log`` range-partitioned on ``session_id``.
+
+        Blocks of ``LOG_PARTITION_SESSIONS`` consecutive sessions share a
+        partition, so the queries of a session only scan its own partition
+        and the logs of old exams can be detached as a whole. Odoo does not
+        manage the schema of partitioned tables, new stored fields are added
+        here instead.
+        """
+        cr = self.env.cr
+        if sql.table_kind(cr, self._table) == sql.TableKind.Regular:
+            self._convert_to_partitioned()
+        columns = sql.table_columns(cr, self._table)
+        for field in self._fields.values():
+            if field.store and field.column_type and field.name not in columns:
+                sql.create_column(cr, self._table, field.name, field.column_type[1], field.string)
+        # logs that predate the snapshot pipeline still have to go through it
+        cr.execute(SQL(
+            "UPDATE ojt_proctoring_log SET snapshot_compressed = false WHERE snapshot_compressed IS NULL"
+        ))
+        cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_proctoring_log_session_participant_idx "
+            "ON ojt_proctoring_log (session_id, participant_id, timestamp)"
+        ))
+        cr.execute(SQL(
+            "CREATE INDEX IF NOT EXISTS ojt_proctoring_log_dedup_pending_idx ON ojt_proctoring_log (id) "
+            "WHERE snapshot_compressed AND NOT COALESCE(snapshot_deduplicated, false)"
+        ))
+        self._ensure_partitions()
+
+    def _convert_to_partitioned(self):
+        """One-off migration of the regular table into a partitioned one."""
+        cr = self.env.cr
+        _logger.info("Converting %s into a partitioned table", self._table)
+        cr.execute(SQL(
+            """
+            SELECT conname, pg_get_constraintdef(oid)
+              FROM pg_constraint
+             WHERE conrelid = 'ojt_proctoring_log'::regclass AND contype = 'f'
+            """
+        ))
+        foreign_keys = cr.fetchall()
+        cr.execute(SQL(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'ojt_proctoring_log'"
+        ))
+        for (index_name,) in cr.fetchall():
+            # free the names for the indexes of the new table
+            cr.execute(SQL("ALTER INDEX %s RENAME TO %s",
+                           SQL.identifier(index_name), SQL.identifier(f'legacy_{index_name}'[:63])))
+        for name, _definition in foreign_keys:
+            cr.execute(SQL("ALTER TABLE ojt_proctoring_log DROP CONSTRAINT %s", SQL.identifier(name)))
+        cr.execute(SQL(
+            """
+            ALTER TABLE ojt_proctoring_log RENAME TO ojt_proctoring_log_legacy;
+            ALTER SEQUENCE ojt_proctoring_log_id_seq OWNED BY NONE;
+            CREATE TABLE ojt_proctoring_log (LIKE ojt_proctoring_log_legacy INCLUDING DEFAULTS)
+                PARTITION BY RANGE (session_id);
+            ALTER TABLE ojt_proctoring_log ADD CONSTRAINT ojt_proctoring_log_pkey PRIMARY KEY (id, session_id);
+            ALTER SEQUENCE ojt_proctoring_log_id_seq OWNED BY ojt_proctoring_log.id;
+            """
+        ))
+        cr.execute(SQL("SELECT max(session_id) FROM ojt_proctoring_log_legacy"))
+        self._ensure_partitions(cr.fetchone()[0])
+        cr.execute(SQL(
+            """
+            INSERT INTO ojt_proctoring_log SELECT * FROM ojt_proctoring_log_legacy;
+            DROP TABLE ojt_proctoring_log_legacy;
+            """
+        ))
+        for name, definition in foreign_keys:
+            cr.execute(SQL("ALTER TABLE ojt_proctoring_log ADD CONSTRAINT %s %s",
+                           SQL.identifier(name), SQL(definition)))
+
+    @api.model
+    def _ensure_partitions(self, session_id=None):
+        """Create the partitions up to ``LOG_PARTITIONS_AHEAD`` blocks after
+        ``session_id`` (by default the last session).
+
+        Creating a partition locks the whole log table, so this only runs
+        from ``init`` and ``_cron_create_partitions``, never in the
+        transaction of a session: sessions created faster than that have
+        their logs in the DEFAULT partition, moved to their own partition
+        once it is created. Concurrent callers are serialized by a
+        transaction-level advisory lock.
+        """
+        cr = self.env.cr
+        if sql.table_kind(cr, self._table) == sql.TableKind.Regular:
+            return
+        if session_id is None:
+            cr.execute(SQL("SELECT max(id) FROM ojt_quiz_proctoring"))
+            session_id = cr.fetchone()[0]
+        last_block = (session_id or 0) // LOG_PARTITION_SESSIONS + LOG_PARTITIONS_AHEAD
+
+        cr.execute(SQL("SELECT pg_advisory_xact_lock(hashtext(%s))", self._table))
+        cr.execute(SQL(
+            """
+            SELECT c.relname
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = 'ojt_proctoring_log'::regclass
+            """
+        ))
+        existing = {row[0] for row in cr.fetchall()}
+        if LOG_DEFAULT_PARTITION not in existing:
+            cr.execute(SQL(
+                "CREATE TABLE IF NOT EXISTS %s PARTITION OF ojt_proctoring_log DEFAULT",
+                SQL.identifier(LOG_DEFAULT_PARTITION),
+            ))
+        cr.execute(SQL(
+            "SELECT relname FROM pg_class WHERE relname LIKE %s", f'{LOG_PARTITION_PREFIX}%_archived',
+        ))
+        archived = {row[0].removesuffix('_archived') for row in cr.fetchall()}
+        for block in range(last_block + 1):
+            start = block * LOG_PARTITION_SESSIONS
+            name = f'{LOG_PARTITION_PREFIX}{start}'
+            if name in existing or name in archived:
+                continue
+            self._create_partition(name, start, start + LOG_PARTITION_SESSIONS)
+
+    def _create_partition(self, name, start, end):
+        """Create the partition of sessions ``[start, end)``, moving the rows
+        the DEFAULT partition holds for that range (Postgres refuses to create
+        a range overlapping rows of the default partition)."""
+        cr = self.env.cr
+        in_range = SQL("session_id >= %s AND session_id < %s", start, end)
+        cr.execute(SQL("SELECT 1 FROM %s WHERE %s LIMIT 1", SQL.identifier(LOG_DEFAULT_PARTITION), in_range))
+        if not cr.fetchone():
+            cr.execute(SQL(
+                "CREATE TABLE IF NOT EXISTS %s PARTITION OF ojt_proctoring_log FOR VALUES FROM (%s) TO (%s)",
+                SQL.identifier(name), start, end,
+            ))
+            return
+        _logger.info("Moving proctoring logs of sessions %s-%s out of the default partition", start, end - 1)
+        cr.execute(SQL(
+            """
+            CREATE TEMP TABLE ojt_proctoring_log_moved ON COMMIT DROP AS
+              WITH moved AS (DELETE FROM %(default)s WHERE %(in_range)s RETURNING *)
+            SELECT * FROM moved;
+            CREATE TABLE %(name)s PARTITION OF ojt_proctoring_log FOR VALUES FROM (%(start)s) TO (%(end)s);
+            INSERT INTO ojt_proctoring_log SELECT * FROM ojt_proctoring_log_moved;
+            DROP TABLE ojt_proctoring_log_moved;
+            """,
+            default=SQL.identifier(LOG_DEFAULT_PARTITION), in_range=in_range,
+            name=SQL.identifier(name), start=start, end=end,
+        ))
+
+    @api.model
+    def _cron_create_partitions(self):
+        """Create the partitions of upcoming sessions, in a short transaction
+        of its own."""
+        self._ensure_partitions()
+        self.env.cr.commit()
+
+    @api.model
+    def _cron_archive_partitions(self):
+        """Detach the partitions whose sessions all ended more than
+        ``ojt_batch_management.proctoring_log_archive_months`` months ago
+        (0, the default, keeps everything attached).
+
+        Detached partitions are renamed ``<partition>_archived`` and stay in
+        the database, out of the ORM's sight, until they are dumped and dropped.
+        """
+        months = int(self.env['ir.config_parameter'].sudo().get_param(
+            'ojt_batch_management.proctoring_log_archive_months', 0))
+        if months <= 0:
+            return
+        cr = self.env.cr
+        cutoff = fields.Datetime.now() - timedelta(days=30 * months)
+        # the first session that still needs its logs (or the next one to be
+        # created) bounds what can go
+        cr.execute(SQL(
+            """
+            SELECT COALESCE(
+                (SELECT min(id) FROM ojt_quiz_proctoring
+                  WHERE state NOT IN ('completed', 'cancelled') OR end_time IS NULL OR end_time >= %s),
+                (SELECT COALESCE(max(id), 0) + 1 FROM ojt_quiz_proctoring))
+            """,
+            cutoff,
+        ))
+        boundary = cr.fetchone()[0]
+        cr.execute(SQL(
+            """
+            SELECT c.relname
+              FROM pg_inherits i
+              JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = 'ojt_proctoring_log'::regclass
+            """
+        ))
+        for (name,) in cr.fetchall():
+            if name == LOG_DEFAULT_PARTITION:
+                continue
+            start = int(name.removeprefix(LOG_PARTITION_PREFIX))
+            if start + LOG_PARTITION_SESSIONS > boundary:
+                continue
+            _logger.info("Detaching proctoring log partition %s", name)
+            cr.execute(SQL("ALTER TABLE ojt_proctoring_log DETACH PARTITION %s", SQL.identifier(name)))
+            cr.execute(SQL("ALTER TABLE %s RENAME TO %s",
+                           SQL.identifier(name), SQL.identifier(f'{name}_archived')))
+        self.invalidate_model()
+
+
+class OjtProctoringViolationCount(models.Model):
+    """Violation counter per session, participant and violation type.
+
+    Rows are only changed by delta, with one upsert per batch of logs, so
+    reading the violations of a session never scans its logs. The session
+    total is kept in ``ojt.quiz.proctoring.violation_count`` by the same
+    statements. Counts stay when old log partitions are detached.
+    """
+    _name = 'ojt.proctoring.violation.count'
+    _description = 'OJT Proctoring Violation Count'
+    _order = 'session_id, violation_count desc'
+    _log_access = False
+
+    session_id = fields.Many2one('ojt.quiz.proctoring', string='Proctoring Session', required=True,
+                                 readonly=True, ondelete='cascade')
+    participant_id = fields.Many2one('ojt.participant', string='Participant', required=True,
+                                     readonly=True, index=True, ondelete='cascade')
+    violation_type = fields.Selection(
+        lambda self: self.env['ojt.proctoring.log']._fields['violation_type'].selection,
+        string='Violation Type', required=True, readonly=True)
+    violation_count = fields.Integer(string='Violations', readonly=True, aggregator='sum')
+    last_violation = fields.Datetime(string='Last Violation', readonly=True)
+
+    _sql_constraints = [
+        ('unique_counter', 'unique(session_id, participant_id, violation_type)',
+         'Violation counter must be unique per session, participant and type!'),
+    ]
+
+    def init(self):
+        # counters of logs that predate them
+        self.env.cr.execute(SQL("SELECT 1 FROM ojt_proctoring_violation_count LIMIT 1"))
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _add_counts(self, deltas):
+        """Apply ``(session_id, participant_id, violation_type, delta, timestamp)``
+        deltas to the counters and the session totals."""
+        merged = {}
+        for session_id, participant_id, violation_type, delta, timestamp in deltas:
+            key = (session_id, participant_id, violation_type)
+            count, last = merged.get(key, (0, None))
+            merged[key] = (count + delta, max(filter(None, (last, timestamp)), default=None))
+        merged = {key: value for key, value in merged.items() if value[0]}
+        if not merged:
+            return
+        # always the same lock order between concurrent ingestions
+        keys = sorted(merged)
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO ojt_proctoring_violation_count
+                   (session_id, participant_id, violation_type, violation_count, last_violation)
+            SELECT * FROM unnest(%(session_ids)s::int[], %(participant_ids)s::int[],
+                                 %(types)s::varchar[], %(deltas)s::int[], %(times)s::timestamp[])
+            ON CONFLICT (session_id, participant_id, violation_type) DO UPDATE SET
+                violation_count = ojt_proctoring_violation_count.violation_count + EXCLUDED.violation_count,
+                last_violation = GREATEST(ojt_proctoring_violation_count.last_violation,
+                                          EXCLUDED.last_violation)
+            """,
+            session_ids=[key[0] for key in keys],
+            participant_ids=[key[1] for key in keys],
+            types=[key[2] for key in keys],
+            deltas=[merged[key][0] for key in keys],
+            times=[merged[key][1] for key in keys],
+        ))
+        totals = {}
+        for (session_id, _participant_id, _violation_type), (count, _last) in merged.items():
+            totals[session_id] = totals.get(session_id, 0) + count
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ojt_quiz_proctoring s
+               SET violation_count = COALESCE(s.violation_count, 0) + d.delta
+              FROM unnest(%s::int[], %s::int[]) AS d(session_id, delta)
+             WHERE s.id = d.session_id
+            """,
+            sorted(totals), [totals[session_id] for session_id in sorted(totals)],
+        ))
+        self.invalidate_model()
+        self.env['ojt.quiz.proctoring'].browse(totals).invalidate_recordset(['violation_count'])
+
+    @api.model
+    def _rebuild(self, session_ids=None):
+        """Recount from the logs, e.g. after raw data fixes. Logs in detached
+        partitions are not counted anymore."""
+        self.env.flush_all()
+        where = SQL("session_id = ANY(%s)", list(session_ids)) if session_ids else SQL("TRUE")
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM ojt_proctoring_violation_count WHERE %(where)s;
+            INSERT INTO ojt_proctoring_violation_count
+                   (session_id, participant_id, violation_type, violation_count, last_violation)
+            SELECT session_id, participant_id, violation_type, count(*), max(timestamp)
+              FROM ojt_proctoring_log
+             WHERE violation_type IS NOT NULL AND %(where)s
+             GROUP BY session_id, participant_id, violation_type;
+            UPDATE ojt_quiz_proctoring s
+               SET violation_count = COALESCE(
+                       (SELECT sum(violation_count) FROM ojt_proctoring_violation_count c
+                         WHERE c.session_id = s.id), 0)
+             WHERE %(session_where)s
+            """,
+            where=where,
+            session_where=SQL("s.id = ANY(%s)", list(session_ids)) if session_ids else SQL("TRUE"),
+        ))
+        self.invalidate_model()
+        self.env['ojt.quiz.proctoring'].invalidate_model(['violation_count'])
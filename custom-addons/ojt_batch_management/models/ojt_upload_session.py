@@ -0,0 +1,250 @@
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.tools import SQL
+from odoo.tools.mimetypes import guess_mimetype
+
+from .ir_attachment import MIMETYPE_SNIFF_SIZE, UPLOAD_CHUNK_SIZE
+
+_logger = logging.getLogger(__name__)
+
+RESUMABLE_CHUNK_SIZE = 5 * 1024 * 1024  # 5 MB
+UPLOAD_SESSION_TIMEOUT_HOURS = 24
+SHA1_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+class OjtUploadSession(models.Model):
+    _name = 'ojt.upload.session'
+    _description = 'OJT Resumable Upload Session'
+    _order = 'create_date desc'
+
+    name = fields.Char(string='Token', required=True, readonly=True, index=True, copy=False,
+                       default=lambda self: uuid.uuid4().hex)
+    user_id = fields.Many2one('res.users', string='Uploaded By', required=True, ondelete='cascade',
+                              default=lambda self: self.env.user)
+    participant_id = fields.Many2one('ojt.participant', string='Participant', required=True,
+                                     ondelete='cascade')
+    assignment_id = fields.Many2one('ojt.assignment', string='Assignment', required=True,
+                                    ondelete='cascade')
+    filename = fields.Char(string='File Name', required=True)
+    file_size = fields.Integer(string='File Size', required=True)
+    checksum = fields.Char(string='Checksum (SHA1)', required=True)
+    chunk_size = fields.Integer(string='Chunk Size', required=True, default=RESUMABLE_CHUNK_SIZE)
+    chunk_count = fields.Integer(string='Chunks', compute='_compute_chunk_count', store=True)
+    state = fields.Selection([
+        ('open', 'In Progress'),
+        ('done', 'Completed'),
+    ], string='State', default='open', required=True)
+
+    _sql_constraints = [
+        ('unique_token', 'unique(name)', 'Upload token must be unique!'),
+    ]
+
+    @api.depends('file_size', 'chunk_size')
+    def _compute_chunk_count(self):
+        for record in self:
+            if record.chunk_size > 0:
+                record.chunk_count = max(1, -(-record.file_size // record.chunk_size))
+            else:
+                record.chunk_count = 0
+
+    @api.constrains('file_size', 'checksum')
+    def _check_upload(self):
+        max_size = self.env['ir.attachment']._ojt_upload_max_size()
+        for record in self:
+            if record.file_size <= 0:
+                raise ValidationError(_('File size must be positive.'))
+            if max_size and record.file_size > max_size:
+                raise ValidationError(_('The uploaded file exceeds the maximum allowed size.'))
+            if not SHA1_RE.match(record.checksum or ''):
+                raise ValidationError(_('Checksum must be a hexadecimal SHA1 digest.'))
+
+    # ---------------------------------------------------------
+    # STORAGE HELPERS
+    # ---------------------------------------------------------
+    @api.model
+    def _upload_root(self):
+        return os.path.join(self.env['ir.attachment']._filestore(), 'ojt_uploads')
+
+    def _upload_dir(self):
+        self.ensure_one()
+        return os.path.join(self._upload_root(), self.name)
+
+    def _chunk_path(self, index):
+        return os.path.join(self._upload_dir(), '%06d.part' % index)
+
+    def _assembled_path(self):
+        return os.path.join(self._upload_dir(), 'assembled')
+
+    def _expected_chunk_size(self, index):
+        self.ensure_one()
+        if index == self.chunk_count - 1:
+            return self.file_size - self.chunk_size * (self.chunk_count - 1)
+        return self.chunk_size
+
+    # ---------------------------------------------------------
+    # UPLOAD STEPS
+    # ---------------------------------------------------------
+    def get_received_chunks(self):
+        """Indexes of the chunks already stored, used by clients to resume."""
+        self.ensure_one()
+        upload_dir = self._upload_dir()
+        if not os.path.isdir(upload_dir):
+            return []
+        return sorted(
+            int(name.split('.')[0]) for name in os.listdir(upload_dir) if name.endswith('.part')
+        )
+
+    def write_chunk(self, index, stream):
+        """Store chunk ``index`` from ``stream``; re-sending a chunk overwrites it."""
+        self.ensure_one()
+        if self.state != 'open':
+            raise UserError(_('This upload is already finalized.'))
+        if not 0 <= index < self.chunk_count:
+            raise UserError(_('Invalid chunk index %s.') % index)
+
+        expected = self._expected_chunk_size(index)
+        upload_dir = self._upload_dir()
+        os.makedirs(upload_dir, exist_ok=True)
+        tmp_path = self._chunk_path(index) + '.tmp'
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as fp:
+                for data in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                    size += len(data)
+                    if size > expected:
+                        raise UserError(_('Chunk %s is larger than expected.') % index)
+                    fp.write(data)
+            if size != expected:
+                raise UserError(_('Chunk %s is incomplete (%s of %s bytes).') % (index, size, expected))
+            os.replace(tmp_path, self._chunk_path(index))
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return size
+
+    def action_finalize(self):
+        """Assemble the chunks in order, verifying the checksum on the way."""
+        self.ensure_one()
+        if self.state == 'done':
+            return True
+
+        missing = sorted(set(range(self.chunk_count)) - set(self.get_received_chunks()))
+        if missing:
+            raise UserError(_('Missing chunks: %s') % ', '.join(map(str, missing)))
+
+        sha = hashlib.sha1()
+        assembled_path = self._assembled_path()
+        with open(assembled_path, 'wb') as out:
+            for index in range(self.chunk_count):
+                with open(self._chunk_path(index), 'rb') as part:
+                    for data in iter(lambda: part.read(UPLOAD_CHUNK_SIZE), b''):
+                        sha.update(data)
+                        out.write(data)
+
+        if sha.hexdigest() != self.checksum:
+            os.unlink(assembled_path)
+            raise UserError(_('Checksum mismatch, please upload the file again.'))
+
+        self.write({'state': 'done'})
+        chunk_paths = [self._chunk_path(index) for index in range(self.chunk_count)]
+
+        # chunks are kept until the session is committed as done
+        @self.env.cr.postcommit.add
+        def _remove_chunks():
+            for path in chunk_paths:
+                if os.path.exists(path):
+                    os.unlink(path)
+
+        return True
+
+    def _create_attachments(self, res_model, res_id):
+        """Create the attachments of finalized uploads on ``res_model,res_id``.
+
+        The attachment rows are created first, the assembled files are then
+        linked into the filestore; they stay in the session directory until
+        the session itself is deleted, so a rolled back submit can be retried.
+        """
+        Attachment = self.env['ir.attachment']
+        file_storage = Attachment._storage() == 'file'
+        vals_list = []
+        for record in self:
+            if record.state != 'done':
+                raise UserError(_('Upload of %s is not finalized.') % record.filename)
+            vals = {'name': record.filename, 'res_model': res_model, 'res_id': res_id}
+            if not file_storage:
+                with open(record._assembled_path(), 'rb') as fp:
+                    vals['raw'] = fp.read()
+            else:
+                vals.update({
+                    'store_fname': Attachment._ojt_blob_fname(record.checksum, record.file_size),
+                    'checksum': record.checksum,
+                    'file_size': record.file_size,
+                })
+                if not mimetypes.guess_type(record.filename)[0]:
+                    # the blob is not in place yet, sniff the assembled file
+                    with open(record._assembled_path(), 'rb') as fp:
+                        vals['mimetype'] = guess_mimetype(fp.read(MIMETYPE_SNIFF_SIZE))
+            vals_list.append(vals)
+        attachments = Attachment._ojt_create_stored(vals_list)
+        if file_storage:
+            for record in self:
+                Attachment._ojt_store_file(
+                    record._assembled_path(), record.checksum, record.file_size, keep_source=True)
+        return attachments
+
+    # ---------------------------------------------------------
+    # CLEANUP
+    # ---------------------------------------------------------
+    def unlink(self):
+        upload_dirs = {record.name: record._upload_dir() for record in self}
+        res = super().unlink()
+        registry = self.env.registry
+
+        @self.env.cr.postcommit.add
+        def _remove_upload_dirs():
+            # the unlink may have been rolled back with a savepoint
+            with registry.cursor() as cr:
+                cr.execute(SQL(
+                    "SELECT name FROM ojt_upload_session WHERE name = ANY(%s)", list(upload_dirs),
+                ))
+                kept = {name for name, in cr.fetchall()}
+            for name, upload_dir in upload_dirs.items():
+                if name not in kept:
+                    shutil.rmtree(upload_dir, ignore_errors=True)
+
+        return res
+
+    @api.autovacuum
+    def _gc_abandoned_uploads(self):
+        """Drop upload sessions without activity for a day, with their chunks."""
+        timeout = timedelta(hours=UPLOAD_SESSION_TIMEOUT_HOURS)
+        cutoff = fields.Datetime.now() - timeout
+        stale = self.browse()
+        for session in self.search([('write_date', '<', cutoff)]):
+            upload_dir = session._upload_dir()
+            # chunk uploads do not touch the record, the directory mtime does
+            if os.path.isdir(upload_dir) and os.path.getmtime(upload_dir) > time.time() - timeout.total_seconds():
+                continue
+            stale |= session
+        if stale:
+            _logger.info("Removing %d abandoned OJT upload sessions", len(stale))
+            stale.unlink()
+
+        # directories left behind by sessions that no longer exist
+        root = self._upload_root()
+        if os.path.isdir(root):
+            known = set(self.search([]).mapped('name'))
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                if name not in known and os.path.getmtime(path) < time.time() - timeout.total_seconds():
+                    shutil.rmtree(path, ignore_errors=True)
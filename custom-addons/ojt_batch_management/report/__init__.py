@@ -1 +1,4 @@
 # -*- coding: utf-8 -*-
+from . import ojt_score_distribution
+from . import ojt_attendance_summary
+from . import ojt_checkin_qr
@@ -0,0 +1,110 @@
+from odoo import models, fields, api
+from odoo.tools import SQL
+from odoo.tools.misc import DotDict
+
+
+class ReportAttendanceSummary(models.AbstractModel):
+    """Attendance summary of batches, from grouped queries.
+
+    Per-event and per-participant counts of all the printed batches are
+    read with two ``GROUP BY`` queries, whatever the number of batches.
+    """
+    _name = 'report.ojt_batch_management.report_attendance_summary_template'
+    _description = 'OJT Attendance Summary Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        batches = self.env['ojt.batch'].browse(docids)
+        batches.check_access('read')
+        self.env.flush_all()
+        summaries = self._compute_summaries(batches.ids)
+
+        today = fields.Date.context_today(self)
+        reports = []
+        for batch in batches:
+            reports.append(DotDict(
+                summaries[batch.id],
+                batch=batch,
+                batch_name=batch.name,
+                start_date=batch.start_date,
+                end_date=batch.end_date,
+                current_date=today,
+            ))
+        return {
+            'doc_ids': batches.ids,
+            'doc_model': 'ojt.batch',
+            'docs': batches,
+            'reports': reports,
+        }
+
+    @api.model
+    def _compute_summaries(self, batch_ids):
+        """Return ``{batch_id: summary}``."""
+        self.env.cr.execute(SQL(
+            """
+            SELECT l.batch_id, l.name, l.event_date,
+                   count(a.id) FILTER (WHERE a.presence = 'present'),
+                   count(a.id) FILTER (WHERE a.presence = 'late'),
+                   (SELECT count(*) FROM ojt_participant p WHERE p.batch_id = l.batch_id)
+              FROM ojt_event_link l
+              LEFT JOIN ojt_attendance a ON a.event_link_id = l.id
+             WHERE l.batch_id = ANY(%(batch_ids)s)
+             GROUP BY l.batch_id, l.id
+             ORDER BY l.batch_id, l.event_date, l.id
+            """,
+            batch_ids=list(batch_ids),
+        ))
+        events_by_batch = {}
+        for batch_id, name, event_date, present, late, participants in self.env.cr.fetchall():
+            events_by_batch.setdefault(batch_id, []).append({
+                'name': name,
+                'date': event_date,
+                'present': present,
+                'late': late,
+                'absent': max(participants - present - late, 0),
+                'rate': round((present + late) / participants * 100, 1) if participants else 0.0,
+            })
+
+        self.env.cr.execute(SQL(
+            """
+            SELECT p.batch_id, p.name, rp.ref,
+                   count(a.id) FILTER (WHERE a.presence = 'present'),
+                   count(a.id) FILTER (WHERE a.presence = 'late')
+              FROM ojt_participant p
+              LEFT JOIN res_partner rp ON rp.id = p.partner_id
+              LEFT JOIN (ojt_attendance a JOIN ojt_event_link l ON l.id = a.event_link_id)
+                     ON a.participant_id = p.id AND l.batch_id = p.batch_id
+             WHERE p.batch_id = ANY(%(batch_ids)s)
+             GROUP BY p.batch_id, p.id, rp.ref
+             ORDER BY p.batch_id, p.name, p.id
+            """,
+            batch_ids=list(batch_ids),
+        ))
+        participants_by_batch = {}
+        for batch_id, name, ref, present, late in self.env.cr.fetchall():
+            total = len(events_by_batch.get(batch_id, []))
+            participants_by_batch.setdefault(batch_id, []).append({
+                'name': name,
+                'student_id': ref or '',
+                'present': present,
+                'late': late,
+                'absent': max(total - present - late, 0),
+                'total': total,
+                'rate': round((present + late) / total * 100, 1) if total else 0.0,
+            })
+
+        summaries = {}
+        for batch_id in batch_ids:
+            events = events_by_batch.get(batch_id, [])
+            participants = participants_by_batch.get(batch_id, [])
+            summaries[batch_id] = {
+                'total_participants': len(participants),
+                'total_events': len(events),
+                'avg_attendance': round(sum(p['rate'] for p in participants) / len(participants), 1)
+                                  if participants else 0.0,
+                'perfect_attendance_count': sum(
+                    1 for p in participants if p['total'] and p['present'] + p['late'] == p['total']),
+                'event_attendance': tuple(DotDict(event) for event in events),
+                'participant_attendance': tuple(DotDict(participant) for participant in participants),
+            }
+        return summaries
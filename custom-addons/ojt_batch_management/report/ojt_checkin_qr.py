@@ -0,0 +1,35 @@
+from odoo import models, api
+from odoo.tools.misc import DotDict
+
+
+class ReportCheckinQr(models.AbstractModel):
+    """Printable check-in QR cards, one per participant of the event's batch.
+
+    The signed tokens are only produced here, server side, for users allowed
+    to print the report; ``ojt.event.link`` does not expose them.
+    """
+    _name = 'report.ojt_batch_management.report_checkin_qr_template'
+    _description = 'OJT Check-in QR Codes'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        event_links = self.env['ojt.event.link'].browse(docids)
+        event_links.check_access('read')
+        Attendance = self.env['ojt.attendance']
+        reports = []
+        for event_link in event_links:
+            participants = event_link.batch_id.participant_ids.sorted('name')
+            reports.append(DotDict(
+                event_link=event_link,
+                cards=[DotDict(
+                    name=participant.name,
+                    student_id=participant.partner_id.ref or '',
+                    qr_src=Attendance._get_checkin_qr_src(event_link.id, participant.id),
+                ) for participant in participants],
+            ))
+        return {
+            'doc_ids': event_links.ids,
+            'doc_model': 'ojt.event.link',
+            'docs': event_links,
+            'reports': reports,
+        }
@@ -0,0 +1,132 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+from odoo.tools.misc import DotDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# (grade, lower bound included); scores under the last bound get the last grade
+GRADE_SCALE = [('A', 90), ('B', 80), ('C', 70), ('D', 60), ('E', 0)]
+SCORE_RANGE_STEP = 10
+TOP_PERFORMER_SCORE = 90
+AT_RISK_SCORE = 60
+
+
+class ReportScoreDistribution(models.AbstractModel):
+    """Score statistics of batches, computed on arrays.
+
+    Final scores, average scores and attendance rates of all participants
+    of the printed batches are read with one query, then every statistic
+    of a batch is a NumPy operation on its slice.
+    """
+    _name = 'report.ojt_batch_management.report_score_distribution_template'
+    _description = 'OJT Score Distribution Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        if np is None:
+            raise UserError(_('The score distribution report requires the numpy library.'))
+        batches = self.env['ojt.batch'].browse(docids)
+        batches.check_access('read')
+        self.env['ojt.participant'].flush_model(
+            ['batch_id', 'name', 'partner_id', 'score_final', 'score_avg', 'attendance_rate'])
+        self.env.cr.execute(SQL(
+            """
+            SELECT p.batch_id, p.name, rp.ref,
+                   COALESCE(p.score_final, 0), COALESCE(p.score_avg, 0), COALESCE(p.attendance_rate, 0)
+              FROM ojt_participant p
+              LEFT JOIN res_partner rp ON rp.id = p.partner_id
+             WHERE p.batch_id = ANY(%s)
+             ORDER BY p.batch_id, p.name, p.id
+            """,
+            batches.ids,
+        ))
+        rows_by_batch = {}
+        for row in self.env.cr.fetchall():
+            rows_by_batch.setdefault(row[0], []).append(row[1:])
+        return {
+            'doc_ids': batches.ids,
+            'doc_model': 'ojt.batch',
+            'docs': batches,
+            'reports': [self._batch_statistics(batch, rows_by_batch.get(batch.id, [])) for batch in batches],
+        }
+
+    @api.model
+    def _batch_statistics(self, batch, rows):
+        """Template values of one batch; ``rows`` are ``(name, student id,
+        final score, average score, attendance rate)``."""
+        count = len(rows)
+        final = np.array([row[2] for row in rows], dtype=float)
+        average = np.array([row[3] for row in rows], dtype=float)
+        attendance = np.array([row[4] for row in rows], dtype=float)
+
+        # grade index of every participant, 0 being the best grade
+        bounds = np.array([bound for _grade, bound in GRADE_SCALE[:-1]], dtype=float)
+        grade_index = np.searchsorted(-bounds, -final, side='left')
+        grade_counts = np.bincount(grade_index, minlength=len(GRADE_SCALE))
+        grades = [grade for grade, _bound in GRADE_SCALE]
+
+        edges = np.arange(0, 100 + SCORE_RANGE_STEP, SCORE_RANGE_STEP)
+        range_counts, _edges = np.histogram(np.clip(final, 0, 100), bins=edges)
+
+        def percentage(value):
+            return round(float(value) / count * 100, 1) if count else 0.0
+
+        grade_distribution = []
+        upper = 100
+        for (grade, bound), grade_count in zip(GRADE_SCALE, grade_counts):
+            grade_distribution.append(DotDict({
+                'name': grade,
+                'range': f'{bound}-{upper}',
+                'count': int(grade_count),
+                'percentage': percentage(grade_count),
+            }))
+            upper = bound
+        common = int(np.argmax(grade_counts)) if count else 0
+
+        # Pearson coefficient, undefined when either side is constant
+        correlation = 'N/A'
+        if count > 1 and final.std() and attendance.std():
+            correlation = round(float(np.corrcoef(attendance, final)[0, 1]), 2)
+
+        return DotDict({
+            'batch': batch,
+            'batch_name': batch.name,
+            'start_date': batch.start_date,
+            'end_date': batch.end_date,
+            'current_date': fields.Date.context_today(self),
+            'total_participants': count,
+            'highest_score': round(float(final.max()), 2) if count else 0.0,
+            'lowest_score': round(float(final.min()), 2) if count else 0.0,
+            'avg_score': round(float(final.mean()), 2) if count else 0.0,
+            'median_score': round(float(np.median(final)), 2) if count else 0.0,
+            'std_deviation': round(float(final.std()), 2) if count else 0.0,
+            'grade_distribution': grade_distribution,
+            'score_ranges': [
+                DotDict({
+                    'label': f'{int(low)}-{int(high)}',
+                    'count': int(range_count),
+                    'percentage': percentage(range_count),
+                })
+                for low, high, range_count in zip(edges[:-1], edges[1:], range_counts)
+            ],
+            'participant_scores': [
+                DotDict({
+                    'name': row[0],
+                    'student_id': row[1] or '',
+                    'final_score': round(float(final[index]), 2),
+                    'avg_score': round(float(average[index]), 2),
+                    'grade': grades[grade_index[index]],
+                    'attendance_rate': round(float(attendance[index]), 2),
+                })
+                for index, row in enumerate(rows)
+            ],
+            'top_performers_count': int(np.count_nonzero(final > TOP_PERFORMER_SCORE)),
+            'at_risk_count': int(np.count_nonzero(final < AT_RISK_SCORE)),
+            'correlation': correlation,
+            'most_common_grade': grades[common] if count else '-',
+            'most_common_percentage': percentage(grade_counts[common]) if count else 0.0,
+        })
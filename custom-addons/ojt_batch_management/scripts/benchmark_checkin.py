@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Load benchmark for the QR check-in endpoint (/ojt/attend/checkin/scan).
+
+Replays a start-of-session burst: every token is scanned once (check-in),
+then a share of them again (duplicate scans), with N concurrent clients.
+Prints the sustained check-ins per second and latency percentiles.
+
+Export signed tokens for an event from an Odoo shell first::
+
+    link = env['ojt.event.link'].browse(EVENT_LINK_ID)
+    Attendance = env['ojt.attendance']
+    with open('/tmp/tokens.txt', 'w') as fp:
+        for participant in link.batch_id.participant_ids:
+            fp.write(Attendance._get_checkin_token(link.id, participant.id) + '\\n')
+
+Then run::
+
+    python3 benchmark_checkin.py --url http://localhost:8069 --tokens /tmp/tokens.txt -c 32
+
+Use a fresh event (or delete its attendances) between runs, otherwise
+every scan is a duplicate.
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def scan(url, token):
+    data = urllib.parse.urlencode({'qr': token}).encode()
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=30) as response:
+            status = json.loads(response.read()).get('status', 'unknown')
+    except urllib.error.HTTPError as e:
+        status = f'http_{e.code}'
+    except OSError:
+        status = 'error'
+    return status, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:8069', help='Odoo base URL')
+    parser.add_argument('--tokens', required=True, help='file with one signed QR token per line')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='concurrent scanners')
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='share of tokens scanned a second time (default 0.2)')
+    args = parser.parse_args()
+
+    with open(args.tokens) as fp:
+        tokens = [line.strip() for line in fp if line.strip()]
+    tokens += tokens[:int(len(tokens) * args.duplicates)]
+    url = args.url.rstrip('/') + '/ojt/attend/checkin/scan'
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda token: scan(url, token), tokens))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _status, latency in results)
+    statuses = Counter(status for status, _latency in results)
+    print(f"requests:     {len(results)} in {elapsed:.2f}s with {args.concurrency} clients")
+    print(f"throughput:   {len(results) / elapsed:.1f} scans/s "
+          f"({statuses['checked_in'] / elapsed:.1f} check-ins/s)")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+    print(f"latency max:  {latencies[-1] * 1000:.1f} ms")
+    print("statuses:     " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+
+
+if __name__ == '__main__':
+    main()
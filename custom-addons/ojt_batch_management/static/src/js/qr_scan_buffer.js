@@ -0,0 +1,163 @@
+/* OJT QR scanner: buffer scans on the device, sync them in bulk when online. */
+(function () {
+    "use strict";
+
+    var STORAGE_KEY = "ojt_qr_scan_buffer";
+    var SYNC_URL = "/ojt/attend/checkin/bulk";
+    var SYNC_BATCH_SIZE = 500;
+    var SYNC_INTERVAL_MS = 15000;
+
+    var root = document.getElementById("ojt_qr_scanner");
+    if (!root) {
+        return;
+    }
+    var canSync = root.dataset.canSync === "1";
+    var input = document.getElementById("ojt_qr_input");
+    var pendingEl = document.getElementById("ojt_qr_pending");
+    var networkEl = document.getElementById("ojt_qr_network");
+    var logEl = document.getElementById("ojt_qr_log");
+    var video = document.getElementById("ojt_qr_video");
+    var syncing = false;
+
+    function loadBuffer() {
+        try {
+            return JSON.parse(window.localStorage.getItem(STORAGE_KEY)) || [];
+        } catch (e) {
+            return [];
+        }
+    }
+
+    function saveBuffer(buffer) {
+        window.localStorage.setItem(STORAGE_KEY, JSON.stringify(buffer));
+        pendingEl.textContent = buffer.length;
+    }
+
+    function log(text, type) {
+        var item = document.createElement("li");
+        item.className = "list-group-item list-group-item-" + (type || "light");
+        item.textContent = new Date().toLocaleTimeString() + "  " + text;
+        logEl.insertBefore(item, logEl.firstChild);
+        while (logEl.children.length > 50) {
+            logEl.removeChild(logEl.lastChild);
+        }
+    }
+
+    function updateNetwork() {
+        networkEl.textContent = navigator.onLine ? "Online" : "Offline";
+        networkEl.className = "badge " + (navigator.onLine ? "bg-success" : "bg-warning");
+    }
+
+    function addScan(token) {
+        // accept both the bare token and the /ojt/attend/checkin?qr=... URL
+        token = decodeURIComponent((token || "").trim().replace(/^.*[?&]qr=/, "").split("&")[0]);
+        // the signed token starts with the event link id
+        var match = /^(\d+)-(\d+)-[0-9a-f]+$/.exec(token);
+        if (!match) {
+            log("Invalid QR code: " + token, "danger");
+            return;
+        }
+        var buffer = loadBuffer();
+        buffer.push({
+            event_link_id: parseInt(match[1], 10),
+            token: token,
+            scanned_at: new Date().toISOString(),
+        });
+        saveBuffer(buffer);
+        log("Scan stored (participant " + match[2] + ")", "info");
+        sync();
+    }
+
+    function sync() {
+        if (!canSync || syncing || !navigator.onLine) {
+            return;
+        }
+        var buffer = loadBuffer();
+        if (!buffer.length) {
+            return;
+        }
+        var batch = buffer.slice(0, SYNC_BATCH_SIZE);
+        syncing = true;
+        fetch(SYNC_URL, {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            credentials: "same-origin",
+            body: JSON.stringify({jsonrpc: "2.0", method: "call", params: {scans: batch}}),
+        })
+            .then(function (response) {
+                return response.json();
+            })
+            .then(function (payload) {
+                if (!payload.result || !payload.result.results) {
+                    throw new Error((payload.error && payload.error.data && payload.error.data.message) || "sync failed");
+                }
+                var counts = {};
+                payload.result.results.forEach(function (result) {
+                    counts[result.status] = (counts[result.status] || 0) + 1;
+                });
+                // scans added while the request was in flight stay in the buffer
+                saveBuffer(loadBuffer().slice(batch.length));
+                log("Synced " + batch.length + " scans: " + JSON.stringify(counts), "success");
+            })
+            .catch(function (error) {
+                log("Sync postponed: " + error.message, "warning");
+            })
+            .finally(function () {
+                syncing = false;
+                if (loadBuffer().length && navigator.onLine) {
+                    window.setTimeout(sync, 1000);
+                }
+            });
+    }
+
+    function startCamera() {
+        if (!("BarcodeDetector" in window) || !navigator.mediaDevices) {
+            log("Camera scanning is not supported by this browser, use a handheld scanner.", "warning");
+            return;
+        }
+        var detector = new window.BarcodeDetector({formats: ["qr_code"]});
+        var lastToken = null;
+        var lastTime = 0;
+        navigator.mediaDevices.getUserMedia({video: {facingMode: "environment"}}).then(function (stream) {
+            video.srcObject = stream;
+            video.classList.remove("d-none");
+            video.play();
+            (function detect() {
+                detector.detect(video).then(function (codes) {
+                    var now = Date.now();
+                    codes.forEach(function (code) {
+                        // ignore the same code held in front of the camera
+                        if (code.rawValue !== lastToken || now - lastTime > 5000) {
+                            lastToken = code.rawValue;
+                            lastTime = now;
+                            addScan(code.rawValue);
+                        }
+                    });
+                }).finally(function () {
+                    window.requestAnimationFrame(detect);
+                });
+            })();
+        }).catch(function (error) {
+            log("Camera unavailable: " + error.message, "danger");
+        });
+    }
+
+    input.addEventListener("keydown", function (ev) {
+        if (ev.key === "Enter") {
+            ev.preventDefault();
+            addScan(input.value);
+            input.value = "";
+        }
+    });
+    document.getElementById("ojt_qr_sync").addEventListener("click", sync);
+    document.getElementById("ojt_qr_camera").addEventListener("click", startCamera);
+    window.addEventListener("online", function () {
+        updateNetwork();
+        sync();
+    });
+    window.addEventListener("offline", updateNetwork);
+    window.setInterval(sync, SYNC_INTERVAL_MS);
+
+    updateNetwork();
+    saveBuffer(loadBuffer());
+    sync();
+})();
@@ -0,0 +1,99 @@
+/** @odoo-module **/
+/* Live per-participant violation tally of a proctoring session. */
+import { Component, onWillDestroy, onWillStart, useState } from "@odoo/owl";
+import { deserializeDateTime, formatDateTime } from "@web/core/l10n/dates";
+import { registry } from "@web/core/registry";
+import { useService } from "@web/core/utils/hooks";
+import { standardWidgetProps } from "@web/views/widgets/standard_widget_props";
+
+const NOTIFICATION_TYPE = "ojt.proctoring/violations";
+// bus channel of a session, granted by ir.websocket to users who may read it
+const CHANNEL_PREFIX = "ojt.quiz.proctoring_";
+
+export class ViolationTally extends Component {
+    static template = "ojt_batch_management.ViolationTally";
+    static props = { ...standardWidgetProps };
+
+    setup() {
+        this.orm = useService("orm");
+        this.busService = this.env.services.bus_service;
+        // participant id -> {participant_name, counts, total, last_time}
+        this.state = useState({ labels: {}, rows: {} });
+        this.onViolations = this.onViolations.bind(this);
+        this.loading = null;
+        this.reloadPending = false;
+        this.channel = this.props.record.resId && `${CHANNEL_PREFIX}${this.props.record.resId}`;
+
+        onWillStart(async () => {
+            if (!this.channel) {
+                return;
+            }
+            // listen before the first load, so no violation falls in between
+            this.busService.addChannel(this.channel);
+            this.busService.subscribe(NOTIFICATION_TYPE, this.onViolations);
+            await this.load();
+        });
+        onWillDestroy(() => {
+            if (this.channel) {
+                this.busService.unsubscribe(NOTIFICATION_TYPE, this.onViolations);
+                this.busService.deleteChannel(this.channel);
+            }
+        });
+    }
+
+    /**
+     * Read the tally from the session counters. Messages received during a
+     * load trigger one more load once it is done, so the tally never misses
+     * nor counts twice a violation.
+     */
+    async load() {
+        if (this.loading) {
+            this.reloadPending = true;
+            return this.loading;
+        }
+        this.loading = (async () => {
+            try {
+                do {
+                    this.reloadPending = false;
+                    const tally = await this.orm.call("ojt.quiz.proctoring", "get_violation_tally", [
+                        [this.props.record.resId],
+                    ]);
+                    const rows = {};
+                    for (const row of tally.rows) {
+                        rows[row.participant_id] = {
+                            ...row,
+                            total: Object.values(row.counts).reduce((total, count) => total + count, 0),
+                        };
+                    }
+                    this.state.labels = tally.labels;
+                    this.state.rows = rows;
+                } while (this.reloadPending);
+            } finally {
+                this.loading = null;
+            }
+        })();
+        return this.loading;
+    }
+
+    get sortedRows() {
+        return Object.values(this.state.rows).sort((a, b) => b.total - a.total);
+    }
+
+    onViolations(payload) {
+        if (payload.session_id === this.props.record.resId) {
+            this.load();
+        }
+    }
+
+    formatCounts(row) {
+        return Object.entries(row.counts)
+            .map(([type, count]) => `${this.state.labels[type] || type}: ${count}`)
+            .join(", ");
+    }
+
+    formatTime(value) {
+        return value ? formatDateTime(deserializeDateTime(value)) : "";
+    }
+}
+
+registry.category("view_widgets").add("ojt_violation_tally", { component: ViolationTally });
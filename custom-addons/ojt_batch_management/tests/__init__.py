@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_attachment_upload
+from . import test_attendance_checkin
+from . import test_meeting_sync
@@ -0,0 +1,29 @@
+from datetime import date, timedelta
+
+from odoo import fields
+from odoo.tests.common import new_test_user
+
+
+class OjtTestCommon:
+    """Minimal batch / participant / assignment data shared by the tests."""
+
+    @classmethod
+    def setup_ojt_data(cls):
+        cls.batch = cls.env['ojt.batch'].create({
+            'name': 'Test Batch',
+            'start_date': date.today(),
+            'end_date': date.today() + timedelta(days=30),
+            'state': 'ongoing',
+        })
+        cls.portal_user = new_test_user(
+            cls.env, login='ojt_portal', password='ojt_portal', groups='base.group_portal')
+        cls.participant = cls.env['ojt.participant'].create({
+            'batch_id': cls.batch.id,
+            'partner_id': cls.portal_user.partner_id.id,
+            'user_id': cls.portal_user.id,
+        })
+        cls.assignment = cls.env['ojt.assignment'].create({
+            'name': 'Test Assignment',
+            'batch_id': cls.batch.id,
+            'deadline': fields.Datetime.now() + timedelta(days=7),
+        })
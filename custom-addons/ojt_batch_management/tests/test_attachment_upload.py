@@ -0,0 +1,94 @@
+import io
+
+from odoo import http
+from odoo.tests import HttpCase, TransactionCase, tagged
+
+from .common import OjtTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestAttachmentStreaming(TransactionCase):
+
+    def test_streamed_attachment_content(self):
+        Attachment = self.env['ir.attachment']
+        content = b'streamed upload content\n' * 1000
+        vals = Attachment._ojt_stream_to_filestore(io.BytesIO(content))
+        vals['name'] = 'report.txt'
+        attachment = Attachment._ojt_create_stored([vals])
+
+        self.assertEqual(attachment.raw, content)
+        self.assertEqual(attachment.file_size, len(content))
+        self.assertEqual(attachment.mimetype, 'text/plain')
+        if Attachment._storage() == 'file':
+            self.assertEqual(attachment.store_fname, vals['store_fname'])
+
+    def test_identical_uploads_share_blob(self):
+        Attachment = self.env['ir.attachment']
+        content = b'%PDF-1.4 same resume'
+        vals_list = []
+        for name in ('a.pdf', 'b.pdf'):
+            vals = Attachment._ojt_stream_to_filestore(io.BytesIO(content))
+            vals['name'] = name
+            vals_list.append(vals)
+        first, second = Attachment._ojt_create_stored(vals_list)
+
+        self.assertEqual(first.raw, content)
+        self.assertEqual(second.raw, content)
+        self.assertEqual(first.checksum, second.checksum)
+        self.assertEqual(first.store_fname, second.store_fname)
+
+
+@tagged('post_install', '-at_install')
+class TestPortalAssignmentUpload(HttpCase, OjtTestCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_ojt_data()
+
+    def test_portal_upload_keeps_content(self):
+        content = b'assignment deliverable\n' * 5000
+        self.authenticate('ojt_portal', 'ojt_portal')
+        response = self.url_open('/my/ojt/assignment/submit', data={
+            'csrf_token': http.Request.csrf_token(self),
+            'assignment_id': self.assignment.id,
+        }, files={'attachment_1': ('deliverable.txt', content, 'text/plain')})
+        self.assertIn('success=submitted', response.url)
+
+        submission = self.env['ojt.assignment.submit'].search([
+            ('assignment_id', '=', self.assignment.id),
+            ('participant_id', '=', self.participant.id),
+        ])
+        self.assertEqual(len(submission.attachment_ids), 1)
+        attachment = submission.attachment_ids
+        self.assertEqual(attachment.name, 'deliverable.txt')
+        self.assertEqual(attachment.file_size, len(content))
+        self.assertEqual(attachment.raw, content)
+
+
+@tagged('post_install', '-at_install')
+class TestAttachmentStorageSavings(TransactionCase, OjtTestCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_ojt_data()
+
+    def test_shared_resumes_count_as_saved(self):
+        Attachment = self.env['ir.attachment']
+        if Attachment._storage() != 'file':
+            self.skipTest('blobs are only shared in the filestore')
+        content = b'%PDF-1.4 shared resume ' * 100
+        for name in ('Alice', 'Bob'):
+            applicant = self.env['hr.applicant'].create({
+                'candidate_id': self.env['hr.candidate'].create({'partner_name': name}).id,
+                'ojt_batch_id': self.batch.id,
+            })
+            vals = Attachment._ojt_stream_to_filestore(io.BytesIO(content))
+            vals.update(name='resume.pdf', res_model='hr.applicant', res_id=applicant.id)
+            resume = Attachment._ojt_create_stored([vals])
+            self.assertEqual(resume.raw, content)
+
+        self.batch.invalidate_recordset(['attachment_size', 'attachment_saved_size'])
+        self.assertAlmostEqual(self.batch.attachment_size, 2 * len(content) / (1024 * 1024))
+        self.assertAlmostEqual(self.batch.attachment_saved_size, len(content) / (1024 * 1024))
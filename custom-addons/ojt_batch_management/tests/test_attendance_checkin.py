@@ -0,0 +1,47 @@
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+from .common import OjtTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestQrCheckin(TransactionCase, OjtTestCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_ojt_data()
+        cls.event_link = cls.env['ojt.event.link'].create({
+            'name': 'Workshop',
+            'event_date': date.today(),
+            'batch_id': cls.batch.id,
+        })
+        cls.Attendance = cls.env['ojt.attendance']
+        cls.token = cls.Attendance._get_checkin_token(cls.event_link.id, cls.participant.id)
+
+    def test_scan_checks_in_once(self):
+        result = self.Attendance._qr_checkin(self.token)
+        self.assertEqual(result['status'], 'checked_in')
+        attendance = self.Attendance.browse(result['attendance_id'])
+        self.assertEqual(attendance.presence, 'present')
+        self.assertEqual(attendance.method, 'qr')
+
+        result = self.Attendance._qr_checkin(self.token)
+        self.assertEqual(result['status'], 'already_checked_in', "a second scan right away is no check-out")
+
+    def test_scan_checks_in_absent_row(self):
+        attendance = self.Attendance.create({
+            'participant_id': self.participant.id,
+            'event_link_id': self.event_link.id,
+            'presence': 'absent',
+        })
+        attendance.action_mark_absent()
+
+        result = self.Attendance._qr_checkin(self.token)
+        self.assertEqual(result['status'], 'checked_in')
+        self.assertEqual(result['attendance_id'], attendance.id)
+        self.assertEqual(attendance.check_in, result['time'])
+        self.assertFalse(attendance.check_out)
+        self.assertEqual(attendance.presence, 'present', "the participant scanned, so is no longer absent")
+        self.assertEqual(attendance.method, 'qr')
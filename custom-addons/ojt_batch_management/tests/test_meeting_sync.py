@@ -0,0 +1,251 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.ojt_batch_management.models import meeting_provider
+from odoo.addons.ojt_batch_management.models.meeting_provider import (
+    MeetingProviderError, RateLimiter, ZoomProvider,
+)
+
+from .common import OjtTestCommon
+
+MEETING_REF = '8675309'
+START = datetime(2026, 1, 5, 9, 0)
+
+
+class FakeZoomHandler(BaseHTTPRequestHandler):
+    """Zoom report API: pages of ``server.pages``, with ``server.failures``
+    (HTTP statuses) answered first, one per request."""
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server.requests.append((time.monotonic(), url.path, params))
+        if server.failures:
+            status = server.failures.pop(0)
+            self.send_response(status)
+            self.send_header('Retry-After', '0')
+            self.end_headers()
+            return
+        if url.path != f'/report/meetings/{MEETING_REF}/participants':
+            self.send_response(404)
+            self.end_headers()
+            return
+        index = int(params.get('next_page_token') or 0)
+        body = {'participants': server.pages[index]}
+        if index + 1 < len(server.pages):
+            body['next_page_token'] = str(index + 1)
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def participant_row(email, name, join_minutes, leave_minutes):
+    return {
+        'user_email': email,
+        'name': name,
+        'join_time': (START + timedelta(minutes=join_minutes)).isoformat() + 'Z',
+        'leave_time': (START + timedelta(minutes=leave_minutes)).isoformat() + 'Z',
+    }
+
+
+class FakeProviderCase(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeZoomHandler)
+        cls.server.pages = []
+        cls.server.failures = []
+        cls.server.requests = []
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(thread.join)
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        cls.base_url = 'http://127.0.0.1:%s' % cls.server.server_address[1]
+
+    def setUp(self):
+        super().setUp()
+        self.server.pages = [
+            [participant_row('a@example.com', 'Alice', 0, 60)],
+            [participant_row('b@example.com', 'Bob', 5, 50)],
+            [participant_row('c@example.com', 'Carol', 10, 40)],
+        ]
+        self.server.failures = []
+        self.server.requests = []
+        # no waiting between retries, Retry-After is 0
+        patcher = patch.object(meeting_provider, 'RETRY_BACKOFF', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page_tokens(self):
+        return [params.get('next_page_token') for _time, _path, params in self.server.requests]
+
+
+@tagged('post_install', '-at_install')
+class TestMeetingProvider(FakeProviderCase):
+
+    def test_pagination(self):
+        provider = ZoomProvider('token', base_url=self.base_url)
+        pages = list(provider.fetch_pages(MEETING_REF))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(
+            [segment['email'] for segments, _cursor in pages for segment in segments],
+            ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual([cursor['page'] for _segments, cursor in pages], ['1', '2', None])
+        self.assertTrue(pages[-1][1]['since'], "a complete pass moves the watermark")
+        self.assertEqual(self.page_tokens(), [None, '1', '2'])
+
+    def test_retry_on_throttling_and_server_errors(self):
+        self.server.failures = [429, 503, 502]
+        provider = ZoomProvider('token', base_url=self.base_url)
+        pages = list(provider.fetch_pages(MEETING_REF))
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(self.server.requests), 6, "3 retried failures + 3 pages")
+
+    def test_retries_exhausted(self):
+        self.server.failures = [503] * meeting_provider.MAX_RETRIES
+        provider = ZoomProvider('token', base_url=self.base_url)
+        with self.assertRaises(MeetingProviderError) as capture:
+            list(provider.fetch_pages(MEETING_REF))
+        self.assertEqual(capture.exception.status, 503)
+        self.assertEqual(len(self.server.requests), meeting_provider.MAX_RETRIES)
+
+    def test_client_error_not_retried(self):
+        provider = ZoomProvider('token', base_url=self.base_url)
+        with self.assertRaises(MeetingProviderError) as capture:
+            list(provider.fetch_pages('unknown'))
+        self.assertEqual(capture.exception.status, 404)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_token_bucket_spaces_requests(self):
+        # one token, refilled 20 times per second: 5 requests need >= 0.2s
+        with patch.dict(ZoomProvider._limiters, {('zoom', self.base_url): RateLimiter(20, burst=1)}):
+            provider = ZoomProvider('token', base_url=self.base_url)
+            self.server.failures = [429, 429]
+            list(provider.fetch_pages(MEETING_REF))
+
+        times = [request_time for request_time, _path, _params in self.server.requests]
+        self.assertEqual(len(times), 5)
+        self.assertGreaterEqual(times[-1] - times[0], 4 / 20 - 0.02,
+                                "retries and pages all go through the bucket")
+
+
+@tagged('post_install', '-at_install')
+class TestMeetingSync(FakeProviderCase, OjtTestCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setup_ojt_data()
+        cls.env['ir.config_parameter'].sudo().set_param(
+            'ojt_batch_management.meeting_api_url.zoom', cls.base_url)
+        cls.event_link = cls.env['ojt.event.link'].create({
+            'name': 'Kick-off',
+            'event_date': START.date(),
+            'batch_id': cls.batch.id,
+        })
+        for name, email in (('Alice', 'a@example.com'), ('Bob', 'b@example.com'), ('Carol', 'c@example.com')):
+            partner = cls.env['res.partner'].create({'name': name, 'email': email})
+            cls.env['ojt.participant'].create({
+                'batch_id': cls.batch.id,
+                'partner_id': partner.id,
+            })
+
+    def create_meeting(self, end_time):
+        return self.env['ojt.meeting.attendance'].create({
+            'name': 'Kick-off call',
+            'event_link_id': self.event_link.id,
+            'platform': 'zoom',
+            'meeting_id': MEETING_REF,
+            'api_key': 'token',
+            'start_time': START,
+            'end_time': end_time,
+        })
+
+    def test_sync_resumes_from_checkpoint(self):
+        meeting = self.create_meeting(START + timedelta(hours=1))
+
+        # page 1 is served, then page 2 keeps failing past the retries
+        class FailOnPage2(FakeZoomHandler):
+            def do_GET(self):
+                if 'next_page_token=1' in self.path and self.server.fail_page_2:
+                    self.server.failures = [500]
+                super().do_GET()
+
+        self.server.RequestHandlerClass = FailOnPage2
+        self.server.fail_page_2 = True
+        self.addCleanup(setattr, self.server, 'RequestHandlerClass', FakeZoomHandler)
+
+        meeting._sync_attendance()
+        self.assertEqual(meeting.sync_cursor['page'], '1', "checkpointed after page 1")
+        self.assertTrue(meeting.sync_error)
+        self.assertFalse(meeting.sync_done)
+        self.assertEqual(meeting.attendee_ids.mapped('email'), ['a@example.com'])
+
+        self.server.fail_page_2 = False
+        self.server.requests = []
+        meeting._sync_attendance()
+
+        self.assertEqual(self.page_tokens(), ['1', '2'], "resumed at page 2, page 1 not fetched again")
+        self.assertFalse(meeting.sync_cursor['page'])
+        self.assertFalse(meeting.sync_error)
+        self.assertTrue(meeting.sync_done, "the meeting ended long ago, its report is final")
+        self.assertEqual(sorted(meeting.attendee_ids.mapped('email')),
+                         ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(len(meeting.attendee_ids.participant_id), 3)
+
+    def test_incremental_pass_skips_closed_intervals(self):
+        meeting = self.create_meeting(fields.Datetime.now() + timedelta(hours=1))
+        meeting._sync_attendance()
+        self.assertFalse(meeting.sync_done, "the report of a running meeting is not final")
+        since = meeting.sync_cursor['since']
+        self.assertTrue(since)
+
+        self.server.requests = []
+        meeting._sync_attendance()
+        self.assertEqual(self.page_tokens(), [None, '1', '2'], "a new pass starts from the first page")
+        self.assertEqual(len(meeting.attendee_ids), 3, "intervals already imported are not duplicated")
+
+    def test_late_join_stays_late_on_refresh(self):
+        self.event_link.event_id = self.env['event.event'].create({
+            'name': 'Kick-off',
+            'date_begin': START,
+            'date_end': START + timedelta(hours=2),
+        })
+        meeting = self.create_meeting(START + timedelta(hours=2))
+        meeting.min_duration = 30
+        Attendee = self.env['ojt.meeting.attendee']
+        # joins 40 minutes after the start, stays long enough to count as present
+        late_join = START + timedelta(minutes=40)
+        Attendee._upsert_segments(meeting, [{
+            'email': 'a@example.com', 'name': 'Alice',
+            'join_time': late_join, 'leave_time': late_join + timedelta(minutes=45),
+        }])
+        attendance = self.env['ojt.attendance'].search([('event_link_id', '=', self.event_link.id)])
+        self.assertEqual(attendance.presence, 'late')
+
+        Attendee._upsert_segments(meeting, [{
+            'email': 'a@example.com', 'name': 'Alice',
+            'join_time': late_join + timedelta(minutes=50), 'leave_time': late_join + timedelta(minutes=70),
+        }])
+        self.assertEqual(attendance.check_out, late_join + timedelta(minutes=70))
+        self.assertEqual(attendance.duration_minutes, 70)
+        self.assertEqual(attendance.presence, 'late', "a refresh keeps the late check-in")
@@ -0,0 +1 @@
+from . import ojt_attendance_import
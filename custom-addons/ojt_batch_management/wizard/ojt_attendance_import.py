@@ -0,0 +1,340 @@
+import base64
+import csv
+import io
+import logging
+from datetime import date, datetime, time
+
+import pytz
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 200
+
+# accepted spellings of each column header
+COLUMN_ALIASES = {
+    'student_id': ('student_id', 'student', 'ref', 'nim'),
+    'event': ('event', 'event_name', 'session'),
+    'event_date': ('event_date', 'date'),
+    'check_in': ('check_in', 'checkin'),
+    'check_out': ('check_out', 'checkout'),
+    'presence': ('presence', 'status'),
+    'notes': ('notes', 'note', 'remarks'),
+}
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M')
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+TIME_FORMATS = ('%H:%M:%S', '%H:%M')
+
+
+class OjtAttendanceImport(models.TransientModel):
+    _name = 'ojt.attendance.import'
+    _description = 'OJT Attendance Sheet Import'
+
+    batch_id = fields.Many2one('ojt.batch', string='Batch', required=True)
+    file = fields.Binary(string='Attendance Sheet', required=True,
+                         help='CSV or XLSX with columns student_id, event or event_date, '
+                              'check_in, check_out, presence, notes')
+    filename = fields.Char(string='File Name')
+    on_existing = fields.Selection([
+        ('skip', 'Skip'),
+        ('update', 'Update'),
+    ], string='Existing Records', default='skip', required=True,
+        help='What to do when a participant already has attendance for the event')
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('checked', 'Checked'),
+        ('done', 'Imported'),
+    ], default='draft')
+    row_count = fields.Integer(string='Rows', readonly=True)
+    error_count = fields.Integer(string='Errors', readonly=True)
+    log = fields.Text(string='Result', readonly=True)
+
+    # ---------------------------------------------------------
+    # READING
+    # ---------------------------------------------------------
+    def _read_rows(self):
+        """Return the sheet as a list of dicts keyed by canonical column name."""
+        self.ensure_one()
+        content = base64.b64decode(self.file or b'')
+        if (self.filename or '').lower().endswith('.xlsx'):
+            if openpyxl is None:
+                raise UserError(_('Reading XLSX files requires the openpyxl library.'))
+            sheet = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True).active
+            rows = sheet.iter_rows(values_only=True)
+        else:
+            text = content.decode('utf-8-sig')
+            try:
+                dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            rows = csv.reader(io.StringIO(text), dialect)
+
+        header = next(rows, None)
+        if not header:
+            raise UserError(_('The file is empty.'))
+        columns = []
+        for title in header:
+            key = str(title or '').strip().lower().replace(' ', '_').replace('-', '_')
+            columns.append(next((name for name, aliases in COLUMN_ALIASES.items() if key in aliases), None))
+        if 'student_id' not in columns:
+            raise UserError(_('Missing student_id column.'))
+        if 'event' not in columns and 'event_date' not in columns:
+            raise UserError(_('Missing event or event_date column.'))
+
+        result = []
+        for values in rows:
+            if not any(value not in (None, '') for value in values):
+                continue
+            result.append({
+                column: value.strip() if isinstance(value, str) else value
+                for column, value in zip(columns, values) if column
+            })
+        return result
+
+    def _to_ref(self, value):
+        """Student id as text; XLSX returns numeric cells as floats (123.0)."""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value if value is not None else '').strip()
+
+    def _to_date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(str(value), fmt).date()
+            except ValueError:
+                continue
+        return None
+
+    def _to_utc(self, value, day, tz):
+        """Sheet times are in the user's timezone; a bare time uses the event day."""
+        if value in (None, ''):
+            return None
+        if isinstance(value, datetime):
+            local = value
+        elif isinstance(value, time):
+            local = datetime.combine(day, value) if day else None
+        else:
+            local = None
+            for fmt in DATETIME_FORMATS:
+                try:
+                    local = datetime.strptime(str(value), fmt)
+                    break
+                except ValueError:
+                    continue
+            if local is None and day:
+                for fmt in TIME_FORMATS:
+                    try:
+                        local = datetime.combine(day, datetime.strptime(str(value), fmt).time())
+                        break
+                    except ValueError:
+                        continue
+        if local is None:
+            raise ValueError(value)
+        return tz.localize(local.replace(microsecond=0)).astimezone(pytz.utc).replace(tzinfo=None)
+
+    # ---------------------------------------------------------
+    # PREFLIGHT
+    # ---------------------------------------------------------
+    def _preflight(self):
+        """Resolve and validate every row before anything is written.
+
+        Returns ``(vals_list, errors)``; ``vals_list`` holds the ``create``
+        values, with ``id`` set for rows matching an existing attendance.
+        """
+        self.ensure_one()
+        rows = self._read_rows()
+        tz = pytz.timezone(self.env.user.tz or 'UTC')
+        presences = dict(self.env['ojt.attendance']._fields['presence'].selection)
+
+        # one lookup for all participants and one for all events of the batch
+        refs = {self._to_ref(row.get('student_id')) for row in rows} - {''}
+        participants = self.env['ojt.participant'].search([
+            ('batch_id', '=', self.batch_id.id),
+            ('partner_id.ref', 'in', list(refs)),
+        ])
+        participant_by_ref = {participant.partner_id.ref: participant for participant in participants}
+
+        event_links = self.env['ojt.event.link'].search([('batch_id', '=', self.batch_id.id)])
+        link_by_name = {}
+        links_by_date = {}
+        for link in event_links:
+            link_by_name.setdefault(link.name.strip().lower(), link)
+            links_by_date.setdefault(link.event_date, []).append(link)
+
+        existing = {
+            (attendance.participant_id.id, attendance.event_link_id.id): attendance.id
+            for attendance in self.env['ojt.attendance'].search([
+                ('participant_id', 'in', participants.ids),
+                ('event_link_id', 'in', event_links.ids),
+            ])
+        }
+
+        vals_list = []
+        errors = []
+        seen = {}
+        for line, row in enumerate(rows, start=2):
+            def error(message):
+                errors.append(_('Line %(line)s: %(message)s', line=line, message=message))
+
+            ref = self._to_ref(row.get('student_id'))
+            participant = participant_by_ref.get(ref)
+            if not participant:
+                error(_('unknown student_id "%s" in this batch', ref))
+                continue
+
+            link = None
+            if row.get('event'):
+                link = link_by_name.get(str(row['event']).strip().lower())
+            elif row.get('event_date'):
+                candidates = links_by_date.get(self._to_date(row['event_date']), [])
+                if len(candidates) > 1:
+                    error(_('several events on %s, use the event column', row['event_date']))
+                    continue
+                link = candidates[0] if candidates else None
+            if not link:
+                error(_('event not found'))
+                continue
+
+            try:
+                check_in = self._to_utc(row.get('check_in'), link.event_date, tz)
+                check_out = self._to_utc(row.get('check_out'), link.event_date, tz)
+            except ValueError as e:
+                error(_('invalid time "%s"', e.args[0]))
+                continue
+
+            presence = str(row.get('presence') or ('present' if check_in else 'absent')).lower()
+            if presence not in presences:
+                error(_('invalid presence "%s"', presence))
+                continue
+            # same rules as ojt.attendance constraints
+            if presence == 'present' and not check_in:
+                error(_('check-in time is required for present status'))
+                continue
+            if check_in and check_out and check_in > check_out:
+                error(_('check-out time must be after check-in time'))
+                continue
+
+            key = (participant.id, link.id)
+            if key in seen:
+                error(_('duplicate of line %s', seen[key]))
+                continue
+            seen[key] = line
+
+            vals = {
+                'participant_id': participant.id,
+                'event_link_id': link.id,
+                'check_in': check_in,
+                'check_out': check_out,
+                'presence': presence,
+                'method': 'manual',
+                'notes': row.get('notes') or False,
+            }
+            if key in existing:
+                if self.on_existing == 'skip':
+                    continue
+                vals['id'] = existing[key]
+            vals_list.append(vals)
+
+        self.row_count = len(rows)
+        return vals_list, errors
+
+    def _report(self, errors, summary):
+        lines = [summary]
+        if errors:
+            lines += errors[:MAX_REPORTED_ERRORS]
+            if len(errors) > MAX_REPORTED_ERRORS:
+                lines.append(_('... and %s more errors', len(errors) - MAX_REPORTED_ERRORS))
+        self.write({'error_count': len(errors), 'log': '\n'.join(lines)})
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _update_attendances(self, vals_list):
+        """Write the imported values on existing attendances with one UPDATE,
+        then refresh the matrix and KPIs like ``ojt.attendance.write``. The
+        participant and event of an existing attendance are its matching key,
+        they do not change."""
+        Attendance = self.env['ojt.attendance']
+        attendances = Attendance.browse([vals['id'] for vals in vals_list])
+        attendances.flush_recordset()
+        self.env.cr.execute(SQL(
+            """
+            UPDATE ojt_attendance a
+               SET check_in = v.check_in,
+                   check_out = v.check_out,
+                   presence = v.presence,
+                   method = v.method,
+                   notes = v.notes,
+                   duration_minutes = CASE WHEN v.check_in IS NULL OR v.check_out IS NULL THEN 0
+                        ELSE GREATEST(EXTRACT(EPOCH FROM (v.check_out - v.check_in)) / 60, 0) END,
+                   write_uid = %(uid)s,
+                   write_date = %(now)s
+              FROM unnest(%(ids)s::int[], %(check_ins)s::timestamp[], %(check_outs)s::timestamp[],
+                          %(presences)s::varchar[], %(methods)s::varchar[], %(notes)s::text[])
+                   AS v(id, check_in, check_out, presence, method, notes)
+             WHERE a.id = v.id
+            """,
+            uid=self.env.uid, now=fields.Datetime.now(),
+            ids=attendances.ids,
+            check_ins=[vals['check_in'] or None for vals in vals_list],
+            check_outs=[vals['check_out'] or None for vals in vals_list],
+            presences=[vals['presence'] for vals in vals_list],
+            methods=[vals['method'] for vals in vals_list],
+            notes=[vals['notes'] or None for vals in vals_list],
+        ))
+        attendances.invalidate_recordset()
+        Attendance._after_attendance_change(attendances._get_matrix_pairs())
+
+    # ---------------------------------------------------------
+    # ACTIONS
+    # ---------------------------------------------------------
+    def action_check(self):
+        self.ensure_one()
+        vals_list, errors = self._preflight()
+        self._report(errors, _('%(rows)s rows read, %(ok)s ready to import, %(errors)s errors.',
+                               rows=self.row_count, ok=len(vals_list), errors=len(errors)))
+        self.state = 'checked'
+        return self._reopen()
+
+    def action_import(self):
+        self.ensure_one()
+        vals_list, errors = self._preflight()
+        if errors:
+            self._report(errors, _('Nothing imported, fix the errors below first.'))
+            self.state = 'checked'
+            return self._reopen()
+
+        Attendance = self.env['ojt.attendance'].with_context(
+            tracking_disable=True, mail_create_nolog=True, mail_notrack=True)
+        to_create = [vals for vals in vals_list if 'id' not in vals]
+        to_update = [vals for vals in vals_list if 'id' in vals]
+        for start in range(0, len(to_create), IMPORT_CHUNK_SIZE):
+            Attendance.create(to_create[start:start + IMPORT_CHUNK_SIZE])
+        for start in range(0, len(to_update), IMPORT_CHUNK_SIZE):
+            self._update_attendances(to_update[start:start + IMPORT_CHUNK_SIZE])
+
+        _logger.info("Imported attendance sheet for batch %s: %d created, %d updated",
+                     self.batch_id.id, len(to_create), len(to_update))
+        self._report([], _('%(created)s attendances created, %(updated)s updated.',
+                           created=len(to_create), updated=len(to_update)))
+        self.state = 'done'
+        return self._reopen()